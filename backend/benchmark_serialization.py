@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for response serialization
+
+Measures how fast a GET /posts envelope with 100 posts is turned into JSON
+bytes by each serialization path:
+- jsonable_encoder + json.dumps (routes without a response_model)
+- Dict[str, Any] response_model (the previous route declarations)
+- Envelope[PostListResponse] response_model (typed envelopes)
+- prevalidated_response (what GET /posts returns: orjson, no validation)
+
+The typed and Dict[str, Any] paths run exactly what FastAPI does for a
+route with a response_model: validate, then dump JSON in pydantic-core.
+A route that returns a Response skips both steps.
+
+Usage:
+    python benchmark_serialization.py [--posts 100] [--iterations 2000]
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from fastapi import Response
+
+from models.post import PostListResponse
+from models.response import Envelope, prevalidated_response
+
+
+def build_payload(post_count: int) -> Dict[str, Any]:
+    """Envelope shaped like a Supabase sparkle_posts response"""
+    user_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, "user@example.com"))
+    now = datetime.now(timezone.utc)
+    posts = []
+    for i in range(post_count):
+        created = now - timedelta(hours=i)
+        posts.append({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "content": ("Leadership is about making tough decisions and owning them. " * 12).strip(),
+            "hashtags": ["Leadership", "DecisionMaking", "GrowthMindset", "Careers"],
+            "image_url": f"https://example.supabase.co/storage/v1/object/public/sparkle_pic/{user_id}/{i:064x}.png",
+            "status": "draft",
+            "source_type": "ai_generated",
+            "source_article_id": None,
+            "scheduled_for": None,
+            "published_at": None,
+            "engagement_metrics": {"likes": 12, "comments": 3, "shares": 1, "impressions": 480},
+            "created_at": created.isoformat(),
+            "updated_at": created.isoformat(),
+        })
+
+    return {
+        "status": "success",
+        "data": {"posts": posts, "count": len(posts), "filter": None},
+        "message": "Posts retrieved successfully"
+    }
+
+
+def measure(label: str, serialize: Callable[[], bytes], iterations: int) -> None:
+    """Print per-call latency and throughput for one serialization path"""
+    body = serialize()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serialize()
+    elapsed = time.perf_counter() - start
+
+    per_call_us = elapsed / iterations * 1e6
+    print(f"{label:<42} {per_call_us:>9.1f} µs/response {iterations / elapsed:>9.0f} responses/s {len(body):>8} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization paths")
+    parser.add_argument("--posts", type=int, default=100, help="Posts per list response")
+    parser.add_argument("--iterations", type=int, default=2000, help="Serializations per path")
+    args = parser.parse_args()
+
+    payload = build_payload(args.posts)
+    untyped = TypeAdapter(Dict[str, Any])
+    typed = TypeAdapter(Envelope[PostListResponse])
+
+    print("=" * 70)
+    print(f"SERIALIZATION BENCHMARK - {args.posts} posts, {args.iterations} iterations")
+    print("=" * 70)
+
+    measure(
+        "jsonable_encoder + json.dumps",
+        lambda: json.dumps(jsonable_encoder(payload)).encode("utf-8"),
+        args.iterations
+    )
+    measure(
+        "Dict[str, Any] response_model",
+        lambda: untyped.dump_json(untyped.validate_python(payload)),
+        args.iterations
+    )
+    measure(
+        "Envelope[PostListResponse] response_model",
+        lambda: typed.dump_json(typed.validate_python(payload)),
+        args.iterations
+    )
+
+    if isinstance(prevalidated_response(payload, Response()), Response):
+        measure(
+            "prevalidated_response (GET /posts)",
+            lambda: prevalidated_response(payload, Response()).body,
+            args.iterations
+        )
+    else:
+        print("orjson not installed - GET /posts uses the typed response_model path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Check the Redis token-bucket script against the in-memory backend
+
+Runs the same request sequence through RedisRateLimitBackend (Lua script)
+and InMemoryRateLimitBackend and checks that both:
+- allow a burst of `capacity` requests, then reject with the right wait
+- refill continuously at capacity / period
+- share one bucket between two workers (Redis only)
+- expire idle buckets once they would be full again (Redis only)
+
+Uses a real Redis if --redis-url is given, otherwise fakeredis (which
+runs the Lua script through lupa: pip install "fakeredis[lua]").
+
+Usage:
+    python check_rate_limiter.py [--redis-url redis://localhost:6379/15]
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+from services.rate_limiter import InMemoryRateLimitBackend, RateLimit, RedisRateLimitBackend
+
+# 5 requests per second: short enough to observe refill quickly
+LIMIT = RateLimit(capacity=5, period=1.0)
+
+failures = []
+
+
+def check(label: str, ok: bool, detail: str = "") -> None:
+    """Record and print one check"""
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+
+async def check_backend(name: str, backend, key: str) -> None:
+    """Burst, reject and refill checks for one backend"""
+    waits = [await backend.hit(key, LIMIT) for _ in range(LIMIT.capacity)]
+    check(f"{name}: burst of {LIMIT.capacity} allowed", all(wait == 0 for wait in waits), str(waits))
+
+    wait = await backend.hit(key, LIMIT)
+    expected = 1 / LIMIT.rate
+    check(f"{name}: request over the limit rejected", 0 < wait <= expected, f"wait {wait:.3f}s, expected <= {expected:.3f}s")
+
+    await asyncio.sleep(wait + 0.05)
+    check(f"{name}: token refilled after the wait", await backend.hit(key, LIMIT) == 0)
+    check(f"{name}: bucket empty again", await backend.hit(key, LIMIT) > 0)
+
+
+async def main(redis_url: str) -> None:
+    if redis_url:
+        from redis.asyncio import Redis
+        client = Redis.from_url(redis_url)
+        source = redis_url
+    else:
+        try:
+            from fakeredis import FakeAsyncRedis
+        except ImportError:
+            print('fakeredis not installed. Run: pip install "fakeredis[lua]" or pass --redis-url')
+            sys.exit(2)
+        client = FakeAsyncRedis()
+        source = "fakeredis"
+
+    print("=" * 70)
+    print(f"RATE LIMITER CHECK - {LIMIT.capacity}/{LIMIT.period:.0f}s buckets on {source}")
+    print("=" * 70)
+
+    key = f"check:{uuid.uuid4()}"
+    prefix = "sparkle:ratelimit:check:"
+    worker_a = RedisRateLimitBackend(client, prefix=prefix)
+    worker_b = RedisRateLimitBackend(client, prefix=prefix)
+
+    await check_backend("memory", InMemoryRateLimitBackend(), key)
+    await check_backend("redis", worker_a, key)
+
+    # Two workers draw from the same bucket
+    shared = f"{key}:shared"
+    allowed = 0
+    for i in range(LIMIT.capacity + 2):
+        worker = worker_a if i % 2 == 0 else worker_b
+        allowed += await worker.hit(shared, LIMIT) == 0
+    check("redis: bucket shared between workers", allowed == LIMIT.capacity, f"{allowed} allowed")
+
+    ttl_ms = await client.pttl(prefix + shared)
+    check("redis: idle bucket expires when full again", 0 < ttl_ms <= LIMIT.period * 1000, f"pttl {ttl_ms}ms")
+
+    await client.delete(prefix + key, prefix + shared)
+    await worker_a.close()
+
+    print("-" * 70)
+    print("All checks passed" if not failures else f"{len(failures)} check(s) failed")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the Redis rate limiter script")
+    parser.add_argument("--redis-url", default="", help="Redis to test against (default: fakeredis)")
+    asyncio.run(main(parser.parse_args().redis_url))
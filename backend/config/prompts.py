@@ -92,6 +92,37 @@ IMPORTANT RULES FOR HASHTAGS AND HOOK:
 - Hashtags: Analyze the ACTUAL topics in the post content. Generate 3-5 relevant hashtags based on what the post is specifically about (not generic career topics). Return as array of strings WITHOUT # symbols.
 - Hook: Create an alternative opening line based on the post's actual topic/theme. Make it attention-grabbing and relevant to what the user is discussing. Max 120 characters."""
 
+CORRECT_GRAMMAR_PARAGRAPHS_PROMPT = """You are an expert editor helping fix spelling and grammar in a LinkedIn post.
+
+The user edited part of their post. Only the changed paragraphs are included below.
+
+POST EXCERPT (for context only - do NOT correct or return this):
+{post_excerpt}
+
+PARAGRAPHS TO CORRECT (JSON array, one string per paragraph):
+{paragraphs}
+
+TASK: Fix all spelling, grammar, and punctuation errors in EACH paragraph. Make minimal changes - only fix actual mistakes. Do NOT:
+- Change the writing style or tone
+- Rephrase sentences unnecessarily
+- Add new content
+- Merge, split, or reorder paragraphs
+
+Keep the original voice and message intact.
+
+OUTPUT FORMAT: You must respond with ONLY a valid JSON object (no markdown, no code blocks) with this exact structure:
+{{
+  "paragraphs": ["corrected paragraph 1", "corrected paragraph 2"],
+  "hashtags": ["hashtag1", "hashtag2", "hashtag3"],
+  "hook": "an alternative opening line for better engagement"
+}}
+
+The "paragraphs" array MUST contain exactly {count} strings, in the same order as the input.
+
+IMPORTANT RULES FOR HASHTAGS AND HOOK:
+- Hashtags: Analyze the ACTUAL topics in the post content. Generate 3-5 relevant hashtags based on what the post is specifically about (not generic career topics). Return as array of strings WITHOUT # symbols.
+- Hook: Create an alternative opening line based on the post's actual topic/theme. Make it attention-grabbing and relevant to what the user is discussing. Max 120 characters."""
+
 IMPROVE_ENGAGEMENT_PROMPT = """You are an expert LinkedIn content strategist helping make a post more engaging.
 
 USER'S BRAND BLUEPRINT:
@@ -158,6 +189,30 @@ IMPORTANT RULES FOR HASHTAGS AND HOOK:
 - Hashtags: Analyze the ACTUAL topics in the post content. Generate 3-5 relevant hashtags based on what the post is specifically about (not generic career topics). Return as array of strings WITHOUT # symbols.
 - Hook: Create an alternative opening line based on the post's actual topic/theme. Make it attention-grabbing and relevant to what the user is discussing. Max 120 characters. Match the tone: {tone}"""
 
+CHUNK_MERGE_PROMPT = """You are an expert LinkedIn content creator reviewing a post that was edited in sections.
+
+USER'S BRAND BLUEPRINT:
+- Tone: {tone}
+- Topics: {topics}
+
+FINAL POST TEXT:
+{content}
+
+HASHTAGS SUGGESTED FOR THE INDIVIDUAL SECTIONS:
+{candidate_hashtags}
+
+TASK: Pick the hashtags and hook for the post as a whole. Do NOT rewrite the post.
+
+OUTPUT FORMAT: You must respond with ONLY a valid JSON object (no markdown, no code blocks) with this exact structure:
+{{
+  "hashtags": ["hashtag1", "hashtag2", "hashtag3"],
+  "hook": "an alternative opening line for better engagement"
+}}
+
+IMPORTANT RULES FOR HASHTAGS AND HOOK:
+- Hashtags: 3-5 hashtags that fit the WHOLE post. Prefer the suggested ones when they fit. Return as array of strings WITHOUT # symbols.
+- Hook: Create an alternative opening line based on the post's actual topic/theme. Max 120 characters. Match the tone: {tone}"""
+
 # ============================================================================
 # SUPPORTING PROMPTS (hashtags and hooks)
 # ============================================================================
@@ -212,6 +267,69 @@ Use a tone that matches: {tone}
 
 OUTPUT: Return ONLY the hook (one sentence, max 120 characters)."""
 
+# ============================================================================
+# STRUCTURED OUTPUT SCHEMAS
+# ============================================================================
+# Passed to the LLM provider so the response is guaranteed to match the
+# JSON contract above (OpenAI json_schema / Anthropic forced tool use).
+# Strict mode requires every property to be listed as required.
+
+_HASHTAGS_PROPERTY = {
+    "type": "array",
+    "items": {"type": "string"},
+    "description": "3-5 relevant hashtags without the # symbol"
+}
+
+_HOOK_PROPERTY = {
+    "type": "string",
+    "description": "Alternative opening line for better engagement"
+}
+
+POST_RESPONSE_SCHEMA = {
+    "name": "linkedin_post",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "content": {"type": "string", "description": "The generated or improved text"},
+            "hashtags": _HASHTAGS_PROPERTY,
+            "hook": _HOOK_PROPERTY,
+        },
+        "required": ["content", "hashtags", "hook"],
+        "additionalProperties": False,
+    },
+}
+
+GRAMMAR_PARAGRAPHS_SCHEMA = {
+    "name": "corrected_paragraphs",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "paragraphs": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Corrected paragraphs in the same order as the input"
+            },
+            "hashtags": _HASHTAGS_PROPERTY,
+            "hook": _HOOK_PROPERTY,
+        },
+        "required": ["paragraphs", "hashtags", "hook"],
+        "additionalProperties": False,
+    },
+}
+
+CHUNK_MERGE_SCHEMA = {
+    "name": "post_hashtags_and_hook",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "hashtags": _HASHTAGS_PROPERTY,
+            "hook": _HOOK_PROPERTY,
+        },
+        "required": ["hashtags", "hook"],
+        "additionalProperties": False,
+    },
+}
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
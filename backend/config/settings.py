@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Dict, Any
 
 
 class Settings(BaseSettings):
@@ -22,6 +22,9 @@ class Settings(BaseSettings):
     # Phase 1: Use mock auth (no real JWT verification)
     # Phase 2: Switch to real Supabase Auth (set to False)
     USE_MOCK_AUTH: bool = True
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified tokens kept in memory
+    AUTH_TOKEN_CACHE_MAX_TTL: float = 3600.0  # seconds (never beyond the token's exp)
+    AUTH_NEGATIVE_CACHE_TTL: float = 60.0  # seconds an invalid token is remembered
 
     # CORS Settings
     ALLOWED_ORIGINS: str = "*"
@@ -29,6 +32,9 @@ class Settings(BaseSettings):
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WARMUP_ON_STARTUP: bool = True  # Build clients and open connections before serving
+    WARMUP_TIMEOUT: float = 15.0  # seconds per component
+    METRICS_TOKEN: str = ""  # Bearer token required by /metrics (empty disables the endpoint)
 
     # LLM Configuration (Phase 1.2 - AI Post Generation)
     LLM_PROVIDER: str = "openai"  # openai or anthropic
@@ -37,6 +43,81 @@ class Settings(BaseSettings):
     LLM_MAX_TOKENS: int = 700  # Optimized for LinkedIn posts (reduced from 1000)
     LLM_TEMPERATURE: float = 0.7
     LLM_TIMEOUT: float = 30.0  # seconds
+    # Per-action model routes, JSON overrides of the defaults in services/ai/model_router.py
+    # e.g. {"grammar": {"model": "gpt-4o-mini", "temperature": 0.1, "slo_ms": 3000}}
+    LLM_ROUTES: Dict[str, Dict[str, Any]] = {}
+    LLM_SLO_WINDOW: int = 20  # Recent calls considered per route
+    LLM_SLO_MISS_RATIO: float = 0.5  # Share of SLO misses that triggers fallback
+    LLM_SLO_COOLDOWN: float = 300.0  # seconds on the fallback route before retrying primary
+    LLM_CHUNK_THRESHOLD_CHARS: int = 2500  # Longer rephrase/shorter inputs are chunked
+    LLM_CHUNK_SIZE_CHARS: int = 1200  # Target size of each chunk
+    SPECULATIVE_CONTINUE_ENABLED: bool = False  # Pre-compute "continue" when a draft is saved
+    SPECULATIVE_CONTINUE_TTL: float = 600.0  # seconds a pre-computed result stays valid
+    SPECULATIVE_CONTINUE_DELAY: float = 2.0  # seconds to wait before starting (debounce)
+    SPECULATIVE_CONTINUE_MIN_INTERVAL: float = 30.0  # seconds between speculations per user
+    SPECULATIVE_CONTINUE_CONCURRENCY: int = 2  # Max speculative generations at once
+    GRAMMAR_CACHE_SIZE: int = 5000  # Cached per-paragraph grammar corrections
+    GRAMMAR_CACHE_TTL: float = 86400.0  # seconds
+
+    # Image Generation (DALL-E 3)
+    IMAGE_GENERATION_TIMEOUT: float = 90.0  # seconds for the DALL-E API call
+    IMAGE_DOWNLOAD_TIMEOUT: float = 30.0  # seconds for downloading the generated image
+    IMAGE_OPTIMIZE_ENABLED: bool = True  # Store WebP/JPEG variants and thumbnails (needs Pillow)
+    IMAGE_OPTIMIZE_WORKERS: int = 2  # Processes used for transcoding
+    IMAGE_CANDIDATE_CONCURRENCY: int = 2  # Candidates generated at once per request (max half the image bulkhead)
+    IMAGE_CACHE_SIZE: int = 2000  # Remembered prompt -> image URL entries
+    IMAGE_CACHE_TTL: float = 86400.0  # seconds a generated image is reused for the same prompt
+    IMAGE_GENERATION_ASYNC_DEFAULT: bool = False  # Answer every generate-ai-image with a 202 job
+    IMAGE_JOB_WORKERS: int = 2  # Concurrent async image jobs per process
+    IMAGE_JOB_QUEUE_SIZE: int = 50  # Pending jobs before new submissions get 503
+    IMAGE_JOB_TTL: float = 3600.0  # seconds a job's status is kept
+    IMAGE_JOB_POLL_INTERVAL: float = 1.0  # seconds between SSE status checks
+
+    # Bulkheads (separate concurrency budgets per class of work; excess waiters get 503)
+    BULKHEAD_IMAGE_CONCURRENCY: int = 4  # Image generations/uploads at once
+    BULKHEAD_IMAGE_QUEUE: int = 20  # Image work waiting for a slot
+    BULKHEAD_IMAGE_THREADS: int = 8  # Threads for blocking storage calls
+    BULKHEAD_LLM_CONCURRENCY: int = 20  # LLM calls at once (also the provider connection pool size)
+    BULKHEAD_LLM_QUEUE: int = 100  # LLM calls waiting for a slot
+    BULKHEAD_DB_CONCURRENCY: int = 10  # Database queries at once (one thread each)
+    BULKHEAD_DB_QUEUE: int = 200  # Queries waiting for a slot
+
+    # Orphaned image cleanup (sparkle_pic bucket)
+    STORAGE_GC_ENABLED: bool = False  # Run the background sweeper
+    STORAGE_GC_DRY_RUN: bool = True  # Only log orphans, don't delete
+    STORAGE_GC_INTERVAL: float = 21600.0  # seconds between sweeps
+    STORAGE_GC_GRACE_PERIOD: float = 604800.0  # seconds before an unreferenced image can be deleted
+    STORAGE_GC_BATCH_SIZE: int = 100  # Objects per remove() call
+    STORAGE_GC_PAUSE: float = 1.0  # seconds to pause between storage calls
+
+    # Response Compression (Brotli if installed, else gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller responses are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1 (fastest) - 9 (smallest)
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11; higher costs much more CPU per response
+
+    # Server-Timing (per-phase breakdown header and JSON access log per request)
+    SERVER_TIMING_ENABLED: bool = True
+    SERVER_TIMING_SAMPLE_RATE: float = 1.0  # Share of requests measured (0.0-1.0)
+    SERVER_TIMING_HEADER: bool = True  # Add the Server-Timing header (False: access log only)
+
+    # Rate Limiting (token bucket per client and route; over-limit requests get 429)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per process) or redis (shared, needs REDIS_URL)
+    RATE_LIMIT_DEFAULT: str = "120/minute"  # Other /api routes, per client ("" disables)
+    # Limits for expensive routes, keyed by "METHOD /path" (JSON in .env)
+    RATE_LIMIT_ROUTES: Dict[str, str] = {
+        "POST /api/v1/posts/ai-assist": "20/minute",
+        "POST /api/v1/posts/generate-ai-image": "5/minute",
+        "POST /api/v1/posts/upload-image": "20/minute",
+        "POST /api/v1/posts/upload-image/sign": "20/minute",
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Buckets kept by the in-memory backend
+    REDIS_URL: str = ""
+
+    # Token Quotas (per user, per UTC day)
+    DAILY_TOKEN_QUOTA: int = 200000  # 0 disables enforcement
+    USAGE_FLUSH_INTERVAL: float = 30.0  # seconds between batched usage writes
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,7 +1,74 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config.settings import settings
 from routers import health_router, auth_router, onboarding_router, posts_router
+from services.quota_service import get_quota_service
+from services.warmup_service import warm_up
+from services.ai.speculation_service import get_speculation_service
+from services.ai.image_service import close_image_service
+from services.ai.image_job_service import get_image_job_service
+from services.image_optimizer import shutdown_image_optimizer
+from services.storage_gc import get_storage_gc
+from services.storage_service import close_storage_service
+from services.bulkhead import shutdown_bulkheads
+from services.rate_limiter import get_rate_limiter, close_rate_limiter
+from middleware.rate_limit import RateLimitMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.server_timing import ServerTimingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    print("🚀 Sparkle API starting up...")
+    print(f"📍 Environment: {settings.ENVIRONMENT}")
+    print(f"🔧 Debug mode: {settings.DEBUG}")
+    print(f"🌐 CORS origins: {settings.cors_origins}")
+
+    # Build provider/storage/database clients before accepting traffic
+    if settings.WARMUP_ON_STARTUP:
+        await warm_up()
+
+    # Start batched token usage persistence
+    get_quota_service().start()
+
+    # Start the async image generation workers
+    get_image_job_service().start()
+
+    # Start orphaned image cleanup
+    if settings.STORAGE_GC_ENABLED:
+        get_storage_gc().start()
+
+    yield
+
+    print("👋 Sparkle API shutting down...")
+
+    # Stop orphaned image cleanup
+    await get_storage_gc().stop()
+
+    # Drop pending speculative generations
+    await get_speculation_service().shutdown()
+
+    # Stop image job workers
+    await get_image_job_service().stop()
+
+    # Persist any token usage not yet flushed
+    await get_quota_service().stop()
+
+    # Close pooled image HTTP connections
+    await close_image_service()
+    await close_storage_service()
+
+    # Stop image transcoding processes
+    shutdown_image_optimizer()
+
+    # Stop bulkhead thread pools
+    shutdown_bulkheads()
+
+    # Close the shared rate limit backend
+    await close_rate_limiter()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -9,9 +76,23 @@ app = FastAPI(
     description="AI personal-branding copilot for LinkedIn",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Response compression (innermost, so it sees the final response body)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Rate limiting (added before CORS so 429 responses still get CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, get_limiter=get_rate_limiter)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,8 +100,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Server-Timing (outermost, so the total covers every other middleware)
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(
+        ServerTimingMiddleware,
+        sample_rate=settings.SERVER_TIMING_SAMPLE_RATE,
+        emit_header=settings.SERVER_TIMING_HEADER,
+    )
+
 
 # Root endpoint
 @app.get("/", tags=["Root"])
@@ -42,19 +132,3 @@ app.include_router(auth_router, prefix="/api/v1")
 app.include_router(onboarding_router, prefix="/api/v1")
 app.include_router(posts_router, prefix="/api/v1")
 
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Run on application startup"""
-    print("🚀 Sparkle API starting up...")
-    print(f"📍 Environment: {settings.ENVIRONMENT}")
-    print(f"🔧 Debug mode: {settings.DEBUG}")
-    print(f"🌐 CORS origins: {settings.cors_origins}")
-
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Run on application shutdown"""
-    print("👋 Sparkle API shutting down...")
\ No newline at end of file
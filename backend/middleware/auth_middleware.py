@@ -1,12 +1,96 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import jwt
 from services.auth_service import get_user_from_token, get_mock_user_from_token
+from services.cache import TTLCache
+from services import metrics
+from services.timing import timed
 from config.settings import settings
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
+import hashlib
+import time
 
 
 security = HTTPBearer(auto_error=False)  # Don't auto-error if no token (for mock auth)
 
+# Verified users by token hash, kept until the token expires. Invalid tokens
+# are cached briefly too, so a client retrying a bad token doesn't cost a
+# signature check per request.
+_token_cache = TTLCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+class _InvalidToken:
+    """Negative cache entry for a token that failed verification"""
+
+    def __init__(self, detail: str):
+        self.detail = detail
+
+
+def _resolve_user(token: str, decode: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Get the user for a token, verifying it only on a cache miss.
+
+    Args:
+        token: Bearer token
+        decode: Verifies the token and returns the user (raises HTTPException 401)
+
+    Returns:
+        Current user information (a copy the caller may modify)
+
+    Raises:
+        HTTPException 401: If the token is invalid
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+
+    cached = _token_cache.get(key)
+    if cached is not None:
+        metrics.increment("auth.token_cache.hit")
+        if isinstance(cached, _InvalidToken):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=cached.detail,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return dict(cached)
+
+    metrics.increment("auth.token_cache.miss")
+    try:
+        user = decode(token)
+    except HTTPException as e:
+        _token_cache.set(key, _InvalidToken(e.detail), ttl=settings.AUTH_NEGATIVE_CACHE_TTL)
+        raise
+
+    # Signature already verified - read exp without verifying again
+    ttl = settings.AUTH_TOKEN_CACHE_MAX_TTL
+    exp = jwt.get_unverified_claims(token).get("exp")
+    if exp is not None:
+        ttl = min(ttl, float(exp) - time.time())
+    if ttl > 0:
+        _token_cache.set(key, dict(user), ttl=ttl)
+
+    return user
+
+
+def get_verified_user_id(token: str) -> Optional[str]:
+    """
+    User id for a token this worker has already verified (no verification here).
+
+    Args:
+        token: Bearer token
+
+    Returns:
+        The user's id, or None if the token isn't in the cache or was invalid
+    """
+    cached = _token_cache.peek(hashlib.sha256(token.encode("utf-8")).digest())
+    if cached is None or isinstance(cached, _InvalidToken):
+        return None
+    return cached.get("id")
+
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the verified-token cache"""
+    return _token_cache.stats()
+
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
@@ -47,7 +131,8 @@ async def get_current_user(
 
         # Decode mock JWT token and extract user info
         token = credentials.credentials
-        return get_mock_user_from_token(token)
+        with timed("auth"):
+            return _resolve_user(token, get_mock_user_from_token)
 
     # ==============================================================================
     # PHASE 2: Real Authentication (Currently Disabled)
@@ -65,6 +150,7 @@ async def get_current_user(
 
     # Verify and decode JWT token
     token = credentials.credentials
-    user = get_user_from_token(token)
+    with timed("auth"):
+        user = _resolve_user(token, get_user_from_token)
 
     return user
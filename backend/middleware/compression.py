@@ -0,0 +1,267 @@
+"""
+Response compression middleware
+
+Post lists and AI outputs are verbose JSON sent to phones on cellular
+networks. This middleware compresses responses with Brotli (if the brotli
+package is installed and the client accepts it) or gzip, chosen from the
+request's Accept-Encoding.
+
+Skipped:
+- Bodies smaller than the minimum size (compression overhead isn't worth it)
+- Server-Sent Events and NDJSON streams (compressing them would buffer
+  events and delay delivery)
+- Images and other already-compressed media
+- Responses that already have a Content-Encoding
+
+Bytes in/out and the CPU time spent compressing are recorded per API
+resource (e.g. "posts"), so /metrics shows the bandwidth saved.
+"""
+
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, MutableMapping, Optional, Set
+
+from services import metrics
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+# Content types that are streamed or already compressed
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/x-ndjson",
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+)
+
+# Resource labels seen so far (for get_compression_stats)
+_labels: Set[str] = set()
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding from an Accept-Encoding header (br over gzip)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def _resource_label(path: str) -> str:
+    """Metrics label for a path: /api/v1/posts/123 -> posts"""
+    parts = [part for part in path.split("/") if part]
+    if len(parts) >= 3 and parts[0] == "api":
+        return parts[2]
+    return parts[0] if parts else "root"
+
+
+class _Compressor:
+    """Incremental gzip or Brotli encoder"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes the gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk; flush so streamed chunks reach the client promptly"""
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Compress eligible responses with Brotli or gzip.
+
+    Usage:
+        app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        """
+        Args:
+            app: Next ASGI app
+            minimum_size: Smallest body (bytes) worth compressing
+            gzip_level: zlib level 1-9
+            brotli_quality: Brotli quality 0-11 (4 is fast enough for dynamic responses)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = _choose_encoding(value.decode("latin-1"))
+                break
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, send, encoding, _resource_label(scope["path"]))
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Wraps send() for one response and decides whether to compress it"""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str, label: str):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.label = label
+
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._cpu = 0.0
+
+    async def send(self, message: Message) -> None:
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk decides the encoding
+            self._start = message
+            if not self._eligible(message):
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Small single-chunk response: send as is
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+
+            self._compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            await self._send(self._compressed_start(self._start))
+
+        started = time.thread_time()
+        compressed = self._compressor.compress(body, final=not more_body)
+        self._cpu += time.thread_time() - started
+        self._bytes_in += len(body)
+        self._bytes_out += len(compressed)
+
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        if not more_body:
+            self._record()
+
+    def _eligible(self, start: Message) -> bool:
+        """True if the response type and headers allow compression"""
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+
+        content_type = b""
+        for name, value in start.get("headers", []):
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        content_type = content_type.decode("latin-1").lower()
+        return not any(content_type.startswith(excluded) for excluded in EXCLUDED_CONTENT_TYPES)
+
+    def _compressed_start(self, start: Message) -> Message:
+        """Response start with Content-Encoding set and Content-Length dropped"""
+        headers: List = [
+            (name, value) for name, value in start.get("headers", [])
+            if name != b"content-length"
+        ]
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+
+        vary = [value for name, value in headers if name == b"vary"]
+        if not any(b"accept-encoding" in value.lower() for value in vary):
+            headers.append((b"vary", b"Accept-Encoding"))
+
+        return {**start, "headers": headers}
+
+    def _record(self) -> None:
+        """Record bytes saved and CPU time for this response"""
+        _labels.add(self.label)
+        prefix = f"compression.{self.label}"
+        metrics.increment(f"{prefix}.responses")
+        metrics.increment(f"{prefix}.{self.encoding}")
+        metrics.increment(f"{prefix}.bytes_in", self._bytes_in)
+        metrics.increment(f"{prefix}.bytes_out", self._bytes_out)
+        metrics.increment(f"{prefix}.cpu_ms", self._cpu * 1000)
+
+
+def get_compression_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Compression totals per API resource.
+
+    Returns:
+        Dict of resource -> responses, bytes_in, bytes_out, bytes_saved,
+        ratio (out/in) and cpu_ms
+    """
+    stats = {}
+    for label in sorted(_labels):
+        prefix = f"compression.{label}"
+        bytes_in = metrics.get_counter(f"{prefix}.bytes_in")
+        bytes_out = metrics.get_counter(f"{prefix}.bytes_out")
+        stats[label] = {
+            "responses": int(metrics.get_counter(f"{prefix}.responses")),
+            "bytes_in": int(bytes_in),
+            "bytes_out": int(bytes_out),
+            "bytes_saved": int(bytes_in - bytes_out),
+            "ratio": round(bytes_out / bytes_in, 4) if bytes_in else 0.0,
+            "cpu_ms": round(metrics.get_counter(f"{prefix}.cpu_ms"), 2),
+        }
+    return stats
@@ -0,0 +1,75 @@
+"""
+Client disconnect handling for long-running endpoints
+
+AI and image endpoints can run for many seconds (LLM retries, DALL-E,
+storage uploads). If the mobile user leaves the screen, finishing that
+work only burns tokens and worker capacity. run_until_disconnected() races
+the work against the client connection and cancels it as soon as the
+client goes away; asyncio cancellation then propagates into provider
+calls, retry sleeps and uploads.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, TypeVar
+
+from fastapi import HTTPException, Request
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# How often to check whether the client is still connected (seconds)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# Non-standard status (nginx convention) for requests closed by the client
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    """Return once the client has disconnected"""
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run_until_disconnected(request: Request, work: Awaitable[T], label: str) -> T:
+    """
+    Run work, cancelling it if the client disconnects first.
+
+    Args:
+        request: Incoming request (used to watch the connection)
+        work: Coroutine doing the actual work
+        label: Short name for logs and metrics (e.g. "ai_assist")
+
+    Returns:
+        Result of work
+
+    Raises:
+        HTTPException 499: If the client disconnected (nobody receives it)
+    """
+    work_task = asyncio.ensure_future(work)
+    watch_task = asyncio.ensure_future(_wait_for_disconnect(request))
+
+    try:
+        await asyncio.wait({work_task, watch_task}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work_task.cancel()
+        raise
+    finally:
+        watch_task.cancel()
+
+    if work_task.done():
+        return work_task.result()
+
+    # Client went away first - stop the work
+    work_task.cancel()
+    try:
+        await work_task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+    metrics.increment(f"requests.cancelled.{label}")
+    logger.info(f"🛑 Client disconnected - cancelled {label}")
+    raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
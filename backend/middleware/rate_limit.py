@@ -0,0 +1,102 @@
+"""
+Rate limiting middleware
+
+Checks every request against the rate limiter before it reaches routing,
+auth or any database/AI work, and answers 429 with a Retry-After header
+when the client's bucket is empty.
+
+Written as a plain ASGI middleware (not BaseHTTPMiddleware) so allowed
+requests pay only for a header scan, a hash and one bucket update, and
+streaming responses (SSE, NDJSON) pass through untouched.
+
+Clients are identified by:
+- the user id, once auth has verified their token (read from the auth
+  token cache, so new tokens from a login or refresh share the user's
+  buckets instead of starting full)
+- otherwise a hash of the token (a token's first request, before auth
+  has verified it)
+- otherwise the client IP
+
+Claims are never trusted unverified: a token signed with any key could
+carry another user's id and drain that user's buckets.
+"""
+
+import hashlib
+import json
+import math
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Optional
+
+from middleware.auth_middleware import get_verified_user_id
+from services.rate_limiter import RateLimiter
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+def _client_key(scope: Scope) -> str:
+    """Verified user id, else token hash, else client IP"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            if value[:7].lower() == b"bearer ":
+                token = value[7:].decode("latin-1")
+                user_id = get_verified_user_id(token)
+                if user_id:
+                    return "u:" + user_id
+                return "t:" + hashlib.sha256(value[7:]).hexdigest()[:32]
+            break
+
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimitMiddleware:
+    """
+    Reject requests over their rate limit with 429.
+
+    Usage:
+        app.add_middleware(RateLimitMiddleware, get_limiter=get_rate_limiter)
+    """
+
+    def __init__(self, app: ASGIApp, get_limiter: Callable[[], RateLimiter]):
+        """
+        Args:
+            app: Next ASGI app
+            get_limiter: Returns the rate limiter (resolved on first request)
+        """
+        self.app = app
+        self.get_limiter = get_limiter
+        self._limiter: Optional[RateLimiter] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            # CORS preflights carry no credentials and must not use up the budget
+            await self.app(scope, receive, send)
+            return
+
+        if self._limiter is None:
+            self._limiter = self.get_limiter()
+
+        retry_after = await self._limiter.check(_client_key(scope), scope["method"], scope["path"])
+        if retry_after > 0:
+            await self._reject(send, retry_after)
+            return
+
+        await self.app(scope, receive, send)
+
+    async def _reject(self, send: Send, retry_after: float) -> None:
+        """Send a 429 in FastAPI's HTTPException format"""
+        seconds = max(1, math.ceil(retry_after))
+        body = json.dumps({
+            "detail": f"Too many requests. Please try again in {seconds} seconds."
+        }).encode("utf-8")
+
+        headers: Dict[bytes, bytes] = {
+            b"content-type": b"application/json",
+            b"content-length": str(len(body)).encode("latin-1"),
+            b"retry-after": str(seconds).encode("latin-1"),
+        }
+        await send({"type": "http.response.start", "status": 429, "headers": list(headers.items())})
+        await send({"type": "http.response.body", "body": body})
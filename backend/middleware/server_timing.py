@@ -0,0 +1,143 @@
+"""
+Server-Timing middleware and timed route class
+
+For each sampled request, collects the time spent per phase (auth, db,
+llm, image, storage, serialize; see services/timing.py) and reports it:
+- as a Server-Timing response header, readable in browser dev tools and
+  by the mobile app's network inspector
+- as one structured JSON access-log line on the "sparkle.access" logger
+
+Example header:
+    Server-Timing: auth;dur=0.1, db;dur=38.2, llm;dur=2210.5, serialize;dur=0.9, total;dur=2251.0
+
+TimedRoute is the route class for the API routers: it notes when the
+endpoint function returns and times response validation and JSON encoding
+as the serialize phase.
+
+Sampling: SERVER_TIMING_SAMPLE_RATE controls the share of requests
+measured; unsampled requests skip all bookkeeping.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, MutableMapping
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from services.timing import ENDPOINT_DONE, end_request, get_timings, mark_endpoint_done, record, start_request
+
+access_logger = logging.getLogger("sparkle.access")
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+def _mark_when_done(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an async endpoint so it records when it returned"""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            mark_endpoint_done()
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records response serialization time.
+
+    Usage:
+        router = APIRouter(prefix="/posts", route_class=TimedRoute)
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _mark_when_done(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            timings = get_timings()
+            if timings is not None:
+                endpoint_done = timings.pop(ENDPOINT_DONE, None)
+                if endpoint_done is not None:
+                    record("serialize", time.perf_counter() - endpoint_done)
+            return response
+
+        return timed_handler
+
+
+def _format_header(timings: Dict[str, float], total: float) -> bytes:
+    """Server-Timing header value (milliseconds)"""
+    entries = [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in timings.items() if phase != ENDPOINT_DONE]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries).encode("latin-1")
+
+
+class ServerTimingMiddleware:
+    """
+    Report per-phase request timings in a header and an access-log line.
+
+    Usage:
+        app.add_middleware(ServerTimingMiddleware, sample_rate=0.1, emit_header=True)
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, emit_header: bool = True):
+        """
+        Args:
+            app: Next ASGI app
+            sample_rate: Share of requests measured (0.0-1.0)
+            emit_header: Add the Server-Timing header (the access log is always written)
+        """
+        self.app = app
+        self.sample_rate = sample_rate
+        self.emit_header = emit_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        token = start_request()
+        timings = get_timings()
+        started = time.perf_counter()
+        status_code = 500  # Reported if the app fails before responding
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.emit_header:
+                    header = _format_header(timings, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration = time.perf_counter() - started
+            end_request(token)
+            access_logger.info(json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 1),
+                "phases": {
+                    phase: round(seconds * 1000, 1)
+                    for phase, seconds in timings.items() if phase != ENDPOINT_DONE
+                },
+            }, separators=(",", ":")))
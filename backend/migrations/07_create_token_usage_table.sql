@@ -0,0 +1,52 @@
+-- ============================================================
+-- CREATE SPARKLE_TOKEN_USAGE TABLE
+-- Migration 07: Per-user daily LLM token usage for quota accounting
+-- ============================================================
+-- The API keeps usage counters in memory and flushes the deltas
+-- in batches through sparkle_increment_token_usage(), so a single
+-- RPC call persists usage for every active user at once.
+
+-- 1. Usage table (one row per user per UTC day)
+CREATE TABLE IF NOT EXISTS public.sparkle_token_usage (
+    user_id UUID NOT NULL,
+    usage_date DATE NOT NULL,
+    tokens_used BIGINT NOT NULL DEFAULT 0,
+    request_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, usage_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sparkle_token_usage_date
+    ON public.sparkle_token_usage(usage_date);
+
+-- 2. Batched increment function
+-- p_rows: [{"user_id": "...", "usage_date": "YYYY-MM-DD", "tokens": 123, "requests": 2}, ...]
+-- Returns the new totals so the API can re-sync its in-memory counters.
+CREATE OR REPLACE FUNCTION public.sparkle_increment_token_usage(p_rows JSONB)
+RETURNS TABLE (user_id UUID, usage_date DATE, tokens_used BIGINT)
+LANGUAGE sql
+AS $$
+    INSERT INTO public.sparkle_token_usage AS u (user_id, usage_date, tokens_used, request_count, updated_at)
+    SELECT
+        (r->>'user_id')::UUID,
+        (r->>'usage_date')::DATE,
+        (r->>'tokens')::BIGINT,
+        (r->>'requests')::INTEGER,
+        NOW()
+    FROM jsonb_array_elements(p_rows) AS r
+    ON CONFLICT (user_id, usage_date) DO UPDATE
+    SET tokens_used = u.tokens_used + EXCLUDED.tokens_used,
+        request_count = u.request_count + EXCLUDED.request_count,
+        updated_at = NOW()
+    RETURNING u.user_id, u.usage_date, u.tokens_used;
+$$;
+
+-- 3. Phase 1 permissions (mock auth, same as sparkle_posts)
+ALTER TABLE public.sparkle_token_usage DISABLE ROW LEVEL SECURITY;
+GRANT ALL ON public.sparkle_token_usage TO service_role;
+GRANT ALL ON public.sparkle_token_usage TO authenticated;
+GRANT ALL ON public.sparkle_token_usage TO anon;
+GRANT EXECUTE ON FUNCTION public.sparkle_increment_token_usage(JSONB) TO service_role, authenticated, anon;
+
+-- Reload the schema cache (this is important for PostgREST/Supabase)
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,40 @@
+-- ============================================================
+-- KEEP updated_at CURRENT ON POSTS AND BRAND BLUEPRINTS
+-- Migration 08: updated_at triggers for ETag / conditional GET support
+-- ============================================================
+-- GET /posts, GET /posts/{id} and GET /onboarding/brand-blueprint derive
+-- their ETags from (id, updated_at). updated_at must therefore change on
+-- every UPDATE, whichever client or endpoint makes it. The triggers from
+-- schema.sql were created on the old table names, so they are recreated
+-- here on the public.sparkle_* tables.
+
+-- 1. Make sure both tables have updated_at
+ALTER TABLE public.sparkle_posts
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE public.sparkle_brand_blueprints
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+-- 2. Trigger function (same as schema.sql)
+CREATE OR REPLACE FUNCTION public.update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 3. Triggers
+DROP TRIGGER IF EXISTS update_sparkle_posts_updated_at ON public.sparkle_posts;
+CREATE TRIGGER update_sparkle_posts_updated_at BEFORE UPDATE ON public.sparkle_posts
+    FOR EACH ROW EXECUTE FUNCTION public.update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_sparkle_brand_blueprints_updated_at ON public.sparkle_brand_blueprints;
+CREATE TRIGGER update_sparkle_brand_blueprints_updated_at BEFORE UPDATE ON public.sparkle_brand_blueprints
+    FOR EACH ROW EXECUTE FUNCTION public.update_updated_at_column();
+
+-- 4. Index for the post list and its (id, updated_at) projection
+CREATE INDEX IF NOT EXISTS idx_sparkle_posts_user_created
+    ON public.sparkle_posts(user_id, created_at DESC);
+
+-- Reload the schema cache (this is important for PostgREST/Supabase)
+NOTIFY pgrst, 'reload schema';
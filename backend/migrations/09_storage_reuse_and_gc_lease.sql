@@ -0,0 +1,70 @@
+-- ============================================================
+-- SHARED STATE FOR THE STORAGE ORPHAN COLLECTOR
+-- Migration 09: Reuse refresh for deduplicated images + sweeper lease
+-- ============================================================
+-- Images are content-addressed, so an upload of known bytes reuses the
+-- stored object instead of uploading it again. The orphan collector must
+-- not delete such an object before a post references it, whichever API
+-- worker handed it out. Deduplication therefore refreshes the object's
+-- last_accessed_at through sparkle_touch_storage_objects(), and the
+-- collector measures its grace period from the latest of created_at,
+-- updated_at and last_accessed_at.
+--
+-- The sweeper runs in only one worker at a time: each sweep first takes
+-- the 'storage_gc' lease through sparkle_acquire_lease().
+--
+-- Only the backend (service_role) may call these functions or touch the
+-- lease table. Running this migration again also removes earlier grants
+-- to anon/authenticated.
+
+-- 1. Refresh last_accessed_at of reused objects
+-- Returns the names that exist (missing objects are not returned).
+-- Limited to the sparkle_pic bucket: it runs with the owner's rights.
+CREATE OR REPLACE FUNCTION public.sparkle_touch_storage_objects(p_bucket TEXT, p_names TEXT[])
+RETURNS TABLE (name TEXT)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    UPDATE storage.objects AS o
+    SET last_accessed_at = NOW()
+    WHERE p_bucket = 'sparkle_pic'
+      AND o.bucket_id = p_bucket
+      AND o.name = ANY(p_names)
+    RETURNING o.name;
+$$;
+
+-- 2. Leases for background jobs that must run in a single worker
+CREATE TABLE IF NOT EXISTS public.sparkle_job_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Take or renew a lease. Returns TRUE if p_holder holds it afterwards
+-- (it was free, expired, or already held by p_holder), NULL otherwise.
+-- The TTL is clamped to 1 minute - 1 day.
+CREATE OR REPLACE FUNCTION public.sparkle_acquire_lease(p_name TEXT, p_holder TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE sql
+AS $$
+    INSERT INTO public.sparkle_job_leases AS l (name, holder, expires_at)
+    VALUES (p_name, p_holder, NOW() + make_interval(secs => LEAST(GREATEST(p_ttl_seconds, 60), 86400)))
+    ON CONFLICT (name) DO UPDATE
+    SET holder = EXCLUDED.holder,
+        expires_at = EXCLUDED.expires_at
+    WHERE l.expires_at < NOW() OR l.holder = EXCLUDED.holder
+    RETURNING TRUE;
+$$;
+
+-- 3. Permissions: backend only (functions are executable by PUBLIC by default)
+ALTER TABLE public.sparkle_job_leases DISABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.sparkle_job_leases FROM PUBLIC, anon, authenticated;
+GRANT ALL ON public.sparkle_job_leases TO service_role;
+REVOKE ALL ON FUNCTION public.sparkle_touch_storage_objects(TEXT, TEXT[]) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.sparkle_acquire_lease(TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.sparkle_touch_storage_objects(TEXT, TEXT[]) TO service_role;
+GRANT EXECUTE ON FUNCTION public.sparkle_acquire_lease(TEXT, TEXT, INTEGER) TO service_role;
+
+-- Reload the schema cache (this is important for PostgREST/Supabase)
+NOTIFY pgrst, 'reload schema';
@@ -20,11 +20,23 @@ class SignupRequest(BaseModel):
     full_name: str
 
 
+class AuthUser(BaseModel):
+    """Schema for the authenticated user returned by auth endpoints"""
+    id: str
+    email: str
+    full_name: Optional[str] = None
+    role: str = "authenticated"
+    avatar_url: Optional[str] = None
+    linkedin_profile_url: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
 class AuthResponse(BaseModel):
     """Schema for authentication response"""
     access_token: str
     token_type: str = "bearer"
-    user: dict
+    user: AuthUser
 
 
 class UserInToken(BaseModel):
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, UUID4
+from pydantic import BaseModel
+from uuid import UUID
 from typing import List, Optional, Dict, Any
 from datetime import time, datetime
 
@@ -36,8 +37,8 @@ class BrandBlueprintUpdate(BaseModel):
 
 class BrandBlueprintResponse(BrandBlueprintBase):
     """Schema for brand blueprint response"""
-    id: UUID4
-    user_id: UUID4
+    id: UUID
+    user_id: UUID  # Mock-auth user ids are UUID5
     created_at: datetime
     updated_at: Optional[datetime] = None
 
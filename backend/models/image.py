@@ -1,5 +1,6 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional
+from datetime import datetime
 from enum import Enum
 
 
@@ -14,6 +15,8 @@ class ImageGenerateRequest(BaseModel):
     post_text: str = ""
     source: ImageSource = ImageSource.POST_CONTENT
     custom_prompt: Optional[str] = None
+    force_new: bool = False  # Regenerate even if the same prompt was used recently
+    candidates: int = Field(1, ge=1, le=4, description="Number of image options to generate")
 
     @field_validator('custom_prompt')
     @classmethod
@@ -51,3 +54,63 @@ class ImageGenerateRequest(BaseModel):
 class ImageGenerateResponse(BaseModel):
     """Schema for AI image generation response"""
     image_url: str
+    variants: Dict[str, str] = {}
+
+
+class StoredImage(BaseModel):
+    """An image in storage with its optimized variants"""
+    image_url: str
+    variants: Dict[str, str] = {}  # e.g. large, large_jpeg, thumb -> public URL
+
+
+class ImageCandidate(BaseModel):
+    """One of several generated image options"""
+    index: int
+    image_url: Optional[str] = None
+    variants: Dict[str, str] = {}
+    error: Optional[str] = None  # Set if this candidate failed
+
+
+class SignedUploadRequest(BaseModel):
+    """Schema for requesting a direct-to-storage upload URL"""
+    content_type: str = Field(..., description="MIME type of the image (image/jpeg or image/png)")
+    file_size: int = Field(..., gt=0, description="Size of the image in bytes")
+
+
+class SignedUploadResponse(BaseModel):
+    """Schema for a signed direct-to-storage upload URL"""
+    signed_url: str
+    token: str
+    path: str
+
+
+class SignedUploadFinalizeRequest(BaseModel):
+    """Schema for finalizing a direct-to-storage upload"""
+    path: str = Field(..., description="Object path returned with the signed upload URL")
+
+
+class ImageJobStatus(str, Enum):
+    """Progress stages of an asynchronous image generation job"""
+    QUEUED = "queued"
+    GENERATING = "generating"
+    UPLOADING = "uploading"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ImageJob(BaseModel):
+    """Schema for an asynchronous image generation job"""
+    id: str
+    user_id: str
+    status: ImageJobStatus = ImageJobStatus.QUEUED
+    image_url: Optional[str] = None
+    variants: Dict[str, str] = {}
+    candidates: List[ImageCandidate] = []  # Filled as they finish when candidates > 1
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def finished(self) -> bool:
+        """True once the job reached a terminal state"""
+        return self.status in (ImageJobStatus.DONE, ImageJobStatus.FAILED)
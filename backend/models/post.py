@@ -1,4 +1,5 @@
 from pydantic import BaseModel, UUID4
+from uuid import UUID
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -45,11 +46,11 @@ class PostSchedule(BaseModel):
 
 class PostResponse(PostBase):
     """Schema for post response"""
-    id: UUID4
-    user_id: UUID4
+    id: UUID
+    user_id: UUID  # Mock-auth user ids are UUID5
     status: PostStatus
     source_type: SourceType
-    source_article_id: Optional[UUID4] = None
+    source_article_id: Optional[UUID] = None
     scheduled_for: Optional[datetime] = None
     published_at: Optional[datetime] = None
     engagement_metrics: Optional[Dict[str, Any]] = None
@@ -65,3 +66,9 @@ class PostListResponse(BaseModel):
     posts: List[PostResponse]
     count: int
     filter: Optional[str] = None
+
+
+class PostDeleteResponse(BaseModel):
+    """Schema for post deletion response"""
+    deleted: bool
+    post_id: str
@@ -0,0 +1,55 @@
+"""
+Response envelope models
+
+Every endpoint answers with the same envelope:
+    {"status": "success", "data": <payload>, "message": "..."}
+
+Declaring routes with `response_model=Envelope[PayloadModel]` documents the
+payload in OpenAPI and lets FastAPI validate and serialize the response
+straight to JSON bytes in pydantic-core, instead of encoding an arbitrary
+dict with jsonable_encoder and json.dumps.
+
+Validation dominates that cost for large lists of database rows, whose
+shape the database already guarantees. Hot list routes use
+prevalidated_response() instead, which encodes the envelope with orjson
+and skips validation; their response_model still documents the payload.
+"""
+
+from fastapi import Response
+from pydantic import BaseModel
+from typing import Any, Dict, Generic, TypeVar
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; routes fall back to response_model serialization
+    orjson = None
+
+T = TypeVar("T")
+
+
+class Envelope(BaseModel, Generic[T]):
+    """Standard API response envelope"""
+    status: str = "success"
+    data: T
+    message: str
+
+
+def prevalidated_response(payload: Dict[str, Any], response: Response) -> Any:
+    """
+    Encode an envelope of database rows without validating it again.
+
+    Args:
+        payload: Envelope dict (JSON-native values only, as returned by Supabase)
+        response: The route's injected Response (its headers, e.g. ETag, are kept)
+
+    Returns:
+        A JSON Response encoded with orjson, or the payload itself (validated
+        and serialized through the route's response_model) if orjson is
+        not installed
+    """
+    if orjson is None:
+        return payload
+
+    encoded = Response(content=orjson.dumps(payload), media_type="application/json")
+    encoded.raw_headers.extend(response.raw_headers)
+    return encoded
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from middleware.auth_middleware import get_current_user
+from middleware.server_timing import TimedRoute
 from database import supabase
 from models.user import UserResponse
-from models.auth import LoginRequest, SignupRequest, AuthResponse
+from models.auth import LoginRequest, SignupRequest, AuthResponse, AuthUser
+from models.response import Envelope
 from typing import Dict, Any
 import secrets
 import hashlib
@@ -10,7 +12,7 @@ import uuid
 from jose import jwt
 from datetime import datetime, timedelta
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=TimedRoute)
 
 # Mock JWT secret for Phase 1 (for encoding user info in token)
 MOCK_JWT_SECRET = "mock_jwt_secret_phase1_development_do_not_use_in_production"
@@ -37,7 +39,7 @@ def generate_user_id_from_email(email: str) -> str:
     return str(uuid.uuid5(namespace, email.lower()))
 
 
-@router.post("/login", response_model=Dict[str, Any])
+@router.post("/login", response_model=Envelope[AuthResponse])
 async def login(credentials: LoginRequest):
     """
     Login user (Phase 1: Mock authentication)
@@ -88,7 +90,7 @@ async def login(credentials: LoginRequest):
         )
 
 
-@router.post("/signup", response_model=Dict[str, Any])
+@router.post("/signup", response_model=Envelope[AuthResponse])
 async def signup(user_data: SignupRequest):
     """
     Signup new user (Phase 1: Mock authentication)
@@ -137,7 +139,7 @@ async def signup(user_data: SignupRequest):
         )
 
 
-@router.get("/me", response_model=Dict[str, Any])
+@router.get("/me", response_model=Envelope[AuthUser])
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     """
     Get current authenticated user's information.
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from database import supabase
-from typing import Dict, Any
+from services.warmup_service import get_readiness
+from services import metrics
+from services.bulkhead import get_bulkhead_stats
+from middleware.auth_middleware import get_token_cache_stats
+from middleware.compression import get_compression_stats
+from middleware.server_timing import TimedRoute
+from config.settings import settings
+from typing import Dict, Any, Optional
+import hmac
 
-router = APIRouter(tags=["Health"])
+router = APIRouter(tags=["Health"], route_class=TimedRoute)
 
 
 @router.get("/health")
@@ -38,3 +48,76 @@ async def health_check() -> Dict[str, Any]:
             },
             "message": "API running but database connection issue"
         }
+
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness check for load balancers and orchestrators.
+
+    Returns 503 until startup warm-up has finished, then 200 with the
+    status of each warmed component (ready, degraded or unavailable).
+    """
+    readiness = get_readiness()
+
+    if settings.WARMUP_ON_STARTUP and not readiness["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": "starting",
+                "data": readiness,
+                "message": "Warm-up in progress"
+            }
+        )
+
+    return {
+        "status": "success",
+        "data": readiness,
+        "message": "Ready to serve traffic"
+    }
+
+
+def _require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> None:
+    """
+    Guard /metrics with the METRICS_TOKEN bearer token.
+
+    Raises:
+        HTTPException 404: If METRICS_TOKEN isn't set (endpoint disabled)
+        HTTPException 401: If the bearer token is missing or wrong
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    token = credentials.credentials if credentials else ""
+    if not hmac.compare_digest(token.encode("utf-8"), settings.METRICS_TOKEN.encode("utf-8")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/metrics", dependencies=[Depends(_require_metrics_token)])
+async def get_metrics() -> Dict[str, Any]:
+    """
+    In-process operational metrics for this worker.
+
+    Requires "Authorization: Bearer <METRICS_TOKEN>"; returns 404 when
+    METRICS_TOKEN is not configured.
+
+    Includes AI response parse outcomes (ai.parse.ok / repaired / failed)
+    bulkhead saturation (image, llm, db), the auth token cache hit rate and
+    bytes saved by response compression per resource (e.g. posts).
+    """
+    return {
+        "status": "success",
+        "data": {
+            **metrics.snapshot(),
+            "bulkheads": get_bulkhead_stats(),
+            "auth_token_cache": get_token_cache_stats(),
+            "compression": get_compression_stats(),
+        },
+        "message": "Metrics retrieved successfully"
+    }
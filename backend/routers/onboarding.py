@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Header
 from middleware.auth_middleware import get_current_user
+from middleware.server_timing import TimedRoute
 from services.onboarding_service import (
     create_brand_blueprint,
     get_brand_blueprint,
+    get_brand_blueprint_etag,
     update_brand_blueprint
 )
 from models.brand_blueprint import (
@@ -10,12 +12,14 @@ from models.brand_blueprint import (
     BrandBlueprintUpdate,
     BrandBlueprintResponse
 )
-from typing import Dict, Any
+from models.response import Envelope
+from services.etag import compute_etag, etag_matches, not_modified, set_etag
+from typing import Dict, Any, Optional
 
-router = APIRouter(prefix="/onboarding", tags=["Onboarding"])
+router = APIRouter(prefix="/onboarding", tags=["Onboarding"], route_class=TimedRoute)
 
 
-@router.post("/brand-blueprint", status_code=status.HTTP_201_CREATED)
+@router.post("/brand-blueprint", response_model=Envelope[BrandBlueprintResponse], status_code=status.HTTP_201_CREATED)
 async def create_user_brand_blueprint(
     blueprint: BrandBlueprintCreate,
     current_user: dict = Depends(get_current_user)
@@ -44,8 +48,10 @@ async def create_user_brand_blueprint(
     }
 
 
-@router.get("/brand-blueprint", response_model=Dict[str, Any])
+@router.get("/brand-blueprint", response_model=Envelope[BrandBlueprintResponse])
 async def get_user_brand_blueprint(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
@@ -57,13 +63,22 @@ async def get_user_brand_blueprint(
     - Display current preferences in Profile/Settings
     - Generate posts aligned with user's brand
 
+    **Caching**: Send the `ETag` back in `If-None-Match` to get `304 Not Modified`
+    if the blueprint hasn't changed.
+
     **Phase 1**: Uses mock authentication (no token required)
 
     **Returns**: User's brand blueprint or 404 if not found
     """
     user_id = current_user.get("id")
 
+    if if_none_match:
+        etag = await get_brand_blueprint_etag(user_id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, "brand_blueprint")
+
     result = await get_brand_blueprint(user_id)
+    set_etag(response, compute_etag([result]))
 
     return {
         "status": "success",
@@ -72,7 +87,7 @@ async def get_user_brand_blueprint(
     }
 
 
-@router.put("/brand-blueprint", response_model=Dict[str, Any])
+@router.put("/brand-blueprint", response_model=Envelope[BrandBlueprintResponse])
 async def update_user_brand_blueprint(
     blueprint: BrandBlueprintUpdate,
     current_user: dict = Depends(get_current_user)
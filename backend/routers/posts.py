@@ -1,32 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response, Header
+from fastapi.responses import JSONResponse, StreamingResponse
 from middleware.auth_middleware import get_current_user
+from middleware.disconnect import run_until_disconnected
+from middleware.server_timing import TimedRoute
 from services.post_service import (
     create_post,
     get_posts,
+    get_posts_etag,
+    posts_etag,
     get_post_by_id,
+    get_post_etag,
     update_post,
     delete_post,
     schedule_post,
     publish_post
 )
 from services.ai.generation_service import get_generation_service
+from services.ai.speculation_service import get_speculation_service
 from services.ai.image_service import get_image_service
+from services.ai.image_job_service import get_image_job_service
 from services.storage_service import get_storage_service
+from services.etag import compute_etag, etag_matches, not_modified, set_etag
 from models.post import (
     PostCreate,
     PostUpdate,
     PostSchedule,
     PostResponse,
+    PostListResponse,
+    PostDeleteResponse,
     PostStatus
 )
 from models.ai import AIAssistRequest, AIAssistResponse
-from models.image import ImageGenerateRequest
+from models.image import (
+    ImageGenerateRequest,
+    ImageGenerateResponse,
+    ImageJob,
+    StoredImage,
+    SignedUploadRequest,
+    SignedUploadResponse,
+    SignedUploadFinalizeRequest
+)
+from models.response import Envelope, prevalidated_response
+from config.settings import settings
 from typing import Dict, Any, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/posts", tags=["Posts"], route_class=TimedRoute)
+
 
-router = APIRouter(prefix="/posts", tags=["Posts"])
+def _speculate_continuation(user_id: str, post: Dict[str, Any]) -> None:
+    """Start a background "continue writing" for a saved draft (if enabled)"""
+    if not settings.SPECULATIVE_CONTINUE_ENABLED:
+        return
+    if post.get("status", "draft") != "draft":
+        return
+
+    try:
+        get_generation_service().speculate_continuation(
+            user_id, str(post["id"]), post.get("content") or ""
+        )
+    except Exception as e:
+        # Speculation is best-effort (e.g. LLM not configured)
+        logger.warning(f"⚠️  Could not start speculative continuation: {str(e)}")
 
 
-@router.post("", status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=Envelope[PostResponse], status_code=status.HTTP_201_CREATED)
 async def create_new_post(
     post: PostCreate,
     current_user: dict = Depends(get_current_user)
@@ -47,6 +88,7 @@ async def create_new_post(
     """
     user_id = current_user.get("id")
     result = await create_post(user_id, post)
+    _speculate_continuation(user_id, result)
 
     return {
         "status": "success",
@@ -55,10 +97,12 @@ async def create_new_post(
     }
 
 
-@router.get("", response_model=Dict[str, Any])
+@router.get("", response_model=Envelope[PostListResponse])
 async def list_posts(
+    response: Response,
     status_filter: Optional[str] = Query(None, description="Filter by status: draft, scheduled, or published"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of posts to return"),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
@@ -73,27 +117,39 @@ async def list_posts(
     - `/posts?status_filter=draft` - Get only drafts
     - `/posts?status_filter=scheduled&limit=10` - Get 10 scheduled posts
 
+    **Caching**: The response has an `ETag`. Send it back in `If-None-Match`
+    to get an empty `304 Not Modified` when no post in the list was added,
+    edited or deleted (checked without fetching the posts).
+
     **Phase 1**: Uses mock authentication (no token required)
 
     **Returns**: List of posts with count
     """
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"📋 GET /posts - status_filter={status_filter}, limit={limit}")
 
     user_id = current_user.get("id")
+
+    if if_none_match:
+        etag = await get_posts_etag(user_id, status_filter, limit)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, "posts")
+
     result = await get_posts(user_id, status_filter, limit)
+    set_etag(response, posts_etag(result["posts"], status_filter, limit))
 
-    return {
+    # Rows come straight from sparkle_posts; encode without re-validating them
+    return prevalidated_response({
         "status": "success",
         "data": result,
         "message": "Posts retrieved successfully"
-    }
+    }, response)
 
 
-@router.get("/{post_id}", response_model=Dict[str, Any])
+@router.get("/{post_id}", response_model=Envelope[PostResponse])
 async def get_post(
     post_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
@@ -101,12 +157,22 @@ async def get_post(
 
     **Security**: Users can only access their own posts.
 
+    **Caching**: Send the `ETag` back in `If-None-Match` to get `304 Not Modified`
+    if the post hasn't changed.
+
     **Phase 1**: Uses mock authentication (no token required)
 
     **Returns**: Post data or 404 if not found
     """
     user_id = current_user.get("id")
+
+    if if_none_match:
+        etag = await get_post_etag(user_id, post_id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, "post")
+
     result = await get_post_by_id(user_id, post_id)
+    set_etag(response, compute_etag([result]))
 
     return {
         "status": "success",
@@ -115,7 +181,7 @@ async def get_post(
     }
 
 
-@router.put("/{post_id}", response_model=Dict[str, Any])
+@router.put("/{post_id}", response_model=Envelope[PostResponse])
 async def edit_post(
     post_id: str,
     post: PostUpdate,
@@ -139,6 +205,7 @@ async def edit_post(
     """
     user_id = current_user.get("id")
     result = await update_post(user_id, post_id, post)
+    _speculate_continuation(user_id, result)
 
     return {
         "status": "success",
@@ -147,7 +214,7 @@ async def edit_post(
     }
 
 
-@router.delete("/{post_id}", status_code=status.HTTP_200_OK)
+@router.delete("/{post_id}", response_model=Envelope[PostDeleteResponse], status_code=status.HTTP_200_OK)
 async def discard_post(
     post_id: str,
     current_user: dict = Depends(get_current_user)
@@ -165,6 +232,7 @@ async def discard_post(
     """
     user_id = current_user.get("id")
     result = await delete_post(user_id, post_id)
+    get_speculation_service().cancel(post_id)
 
     return {
         "status": "success",
@@ -173,7 +241,7 @@ async def discard_post(
     }
 
 
-@router.post("/{post_id}/schedule", response_model=Dict[str, Any])
+@router.post("/{post_id}/schedule", response_model=Envelope[PostResponse])
 async def schedule_post_for_publication(
     post_id: str,
     schedule_data: PostSchedule,
@@ -204,7 +272,7 @@ async def schedule_post_for_publication(
     }
 
 
-@router.post("/{post_id}/publish", response_model=Dict[str, Any])
+@router.post("/{post_id}/publish", response_model=Envelope[PostResponse])
 async def publish_post_now(
     post_id: str,
     current_user: dict = Depends(get_current_user)
@@ -235,7 +303,7 @@ async def publish_post_now(
     }
 
 
-@router.post("/upload-image", response_model=Dict[str, Any])
+@router.post("/upload-image", response_model=Envelope[StoredImage])
 async def upload_post_image(
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
@@ -250,6 +318,8 @@ async def upload_post_image(
 
     **Returns:**
     - `image_url`: Public URL of uploaded image
+    - `variants`: Optimized versions (`large` WebP, `large_jpeg`, `thumb` WebP);
+      empty if optimization is unavailable
 
     **Phase 1**: Uses Supabase Storage
 
@@ -258,7 +328,12 @@ async def upload_post_image(
     {
         "status": "success",
         "data": {
-            "image_url": "https://...supabase.co/storage/v1/object/public/post-images/..."
+            "image_url": "https://...supabase.co/storage/v1/object/public/post-images/...",
+            "variants": {
+                "large": "https://.../{hash}_large.webp",
+                "large_jpeg": "https://.../{hash}_large_jpeg.jpg",
+                "thumb": "https://.../{hash}_thumb.webp"
+            }
         },
         "message": "Image uploaded successfully"
     }
@@ -268,11 +343,11 @@ async def upload_post_image(
     storage_service = get_storage_service()
 
     try:
-        image_url = await storage_service.upload_image(file, user_id)
+        image = await storage_service.upload_image_with_variants(file, user_id)
 
         return {
             "status": "success",
-            "data": {"image_url": image_url},
+            "data": image.model_dump(),
             "message": "Image uploaded successfully"
         }
 
@@ -284,10 +359,95 @@ async def upload_post_image(
             detail=f"Image upload failed: {str(e)}"
         )
 
+@router.post("/upload-image/sign", response_model=Envelope[SignedUploadResponse])
+async def sign_post_image_upload(
+    request: SignedUploadRequest,
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get a signed URL to upload a post image directly to storage.
+
+    The image bytes go straight from the device to Supabase Storage instead
+    of through the API. After uploading, call `/posts/upload-image/finalize`
+    with the returned `path`.
 
-@router.post("/ai-assist", response_model=Dict[str, Any])
+    **Request Body:**
+    - `content_type`: image/jpeg or image/png
+    - `file_size`: Size in bytes (max 2MB)
+
+    **Upload:** `PUT {signed_url}` with the file as the body and the
+    `Content-Type` header set (or `uploadToSignedUrl(path, token, file)` in
+    supabase-js).
+
+    **Example Response:**
+    ```json
+    {
+        "status": "success",
+        "data": {
+            "signed_url": "https://...supabase.co/storage/v1/object/upload/sign/sparkle_pic/...?token=...",
+            "token": "...",
+            "path": "{user_id}/direct_{uuid}.jpg"
+        },
+        "message": "Upload URL created successfully"
+    }
+    ```
+
+    **Errors:**
+    - 400: Content type not allowed or file too large
+    """
+    user_id = current_user.get("id")
+    storage_service = get_storage_service()
+
+    signed = await storage_service.create_signed_upload(user_id, request.content_type, request.file_size)
+
+    return {
+        "status": "success",
+        "data": signed,
+        "message": "Upload URL created successfully"
+    }
+
+
+@router.post("/upload-image/finalize", response_model=Envelope[StoredImage])
+async def finalize_post_image_upload(
+    request: SignedUploadFinalizeRequest,
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Finalize a direct-to-storage image upload.
+
+    Checks the stored object's type and size and returns its public URL.
+    Objects that fail validation are deleted (400). If the object can't be
+    read back, it is kept and the response is 503; retry the finalize call.
+
+    **Request Body:**
+    - `path`: Path returned by `/posts/upload-image/sign`
+
+    **Returns:**
+    - `image_url`: Public URL of uploaded image
+    - `variants`: Always empty for direct uploads
+
+    **Errors:**
+    - 400: Uploaded object is not a JPG/PNG or is larger than 2MB
+    - 403: Path does not belong to the current user
+    - 404: Nothing was uploaded to the path
+    """
+    user_id = current_user.get("id")
+    storage_service = get_storage_service()
+
+    image_url = await storage_service.finalize_signed_upload(user_id, request.path)
+
+    return {
+        "status": "success",
+        "data": {"image_url": image_url},
+        "message": "Image uploaded successfully"
+    }
+
+
+
+@router.post("/ai-assist", response_model=Envelope[AIAssistResponse])
 async def ai_assist(
     request: AIAssistRequest,
+    http_request: Request,
     current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
@@ -333,6 +493,9 @@ async def ai_assist(
     }
     ```
 
+    **Cancellation**: If the client disconnects, generation (including retries)
+    is cancelled so no tokens are spent on results nobody will see.
+
     **Returns**: Generated content with hashtags and hook suggestion
     """
     user_id = current_user.get("id")
@@ -341,21 +504,24 @@ async def ai_assist(
     try:
         # Route to appropriate action handler
         if request.action == "continue":
-            result = await generation_service.continue_writing(user_id, request.text)
+            work = generation_service.continue_writing(user_id, request.text)
         elif request.action == "rephrase":
-            result = await generation_service.rephrase(user_id, request.text)
+            work = generation_service.rephrase(user_id, request.text)
         elif request.action == "grammar":
-            result = await generation_service.correct_grammar(user_id, request.text)
+            work = generation_service.correct_grammar(user_id, request.text)
         elif request.action == "engagement":
-            result = await generation_service.improve_engagement(user_id, request.text)
+            work = generation_service.improve_engagement(user_id, request.text)
         elif request.action == "shorter":
-            result = await generation_service.make_shorter(user_id, request.text)
+            work = generation_service.make_shorter(user_id, request.text)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Unknown action: {request.action}"
             )
 
+        # Cancel generation if the client leaves the editor
+        result = await run_until_disconnected(http_request, work, "ai_assist")
+
         return {
             "status": "success",
             "data": result,
@@ -378,9 +544,11 @@ async def ai_assist(
         )
 
 
-@router.post("/generate-ai-image", response_model=Dict[str, Any])
+@router.post("/generate-ai-image", response_model=Envelope[ImageGenerateResponse])
 async def generate_ai_image(
     request: ImageGenerateRequest,
+    http_request: Request,
+    prefer: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
@@ -390,6 +558,8 @@ async def generate_ai_image(
     - `post_text`: Post content to generate image from (required for post_content source)
     - `source`: Generation source (post_content or custom_description)
     - `custom_prompt`: Custom image description (required for custom_description source)
+    - `force_new`: Generate a new image even if the same prompt was used recently (default false)
+    - `candidates`: Number of image options, 1-4 (default 1)
 
     **Phase 1**: "post_content" source - generate from post text
     **Phase 2**: "custom_description" source - generate from custom prompt
@@ -399,22 +569,52 @@ async def generate_ai_image(
     2. Generate DALL-E 3 image
     3. Download generated image
     4. Upload to Supabase Storage (sparkle_pic bucket)
-    5. Return public URL
+    5. Store optimized variants (WebP/JPEG, thumbnail)
+    6. Return public URLs
 
     **Returns:**
     ```json
     {
         "status": "success",
         "data": {
-            "image_url": "https://...supabase.co/storage/v1/object/public/sparkle_pic/..."
+            "image_url": "https://...supabase.co/storage/v1/object/public/sparkle_pic/...",
+            "variants": {"large": "https://...", "large_jpeg": "https://...", "thumb": "https://..."}
         },
         "message": "AI image generated successfully"
     }
     ```
 
+    **Multiple candidates**: With `candidates` > 1, style variations of the
+    prompt are generated concurrently and the response is NDJSON
+    (`application/x-ndjson`), one line per candidate as each finishes:
+    ```json
+    {"index": 1, "image_url": "https://...", "variants": {"thumb": "https://...", ...}, "error": null}
+    {"index": 0, "image_url": "https://...", "variants": {...}, "error": null}
+    ```
+    A failed candidate has `image_url: null` and an `error`. In async mode the
+    job's `candidates` list fills in the same way.
+
+    **Cancellation**: If the client disconnects, the remaining generation and
+    upload steps are cancelled.
+
+    **Async mode**: Send `Prefer: respond-async` (or enable
+    IMAGE_GENERATION_ASYNC_DEFAULT to make it the default) to get
+    `202 Accepted` with a job right away (and a `Location` header). Jobs live
+    in a per-process store, so polls only find them when the API runs as a
+    single worker; the mobile app uses the synchronous response until jobs
+    are kept in a shared store. Follow it with
+    `GET /posts/image-jobs/{job_id}` or `GET /posts/image-jobs/{job_id}/events` (SSE).
+    ```json
+    {
+        "status": "success",
+        "data": {"id": "...", "status": "queued", "image_url": null, ...},
+        "message": "Image generation queued"
+    }
+    ```
+
     **Errors:**
     - 400: Invalid input (empty text, too short/long, missing fields)
-    - 503: DALL-E API unavailable or API key not configured
+    - 503: DALL-E API unavailable, API key not configured, or job queue full
     - 500: Image generation or upload failed
 
     **Example Requests:**
@@ -433,26 +633,58 @@ async def generate_ai_image(
     ```
     """
     user_id = current_user.get("id")
-    image_service = get_image_service()
+
+    if request.source == "custom_description" and not request.custom_prompt:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="custom_prompt is required when source is 'custom_description'"
+        )
+
+    respond_async = settings.IMAGE_GENERATION_ASYNC_DEFAULT or bool(prefer and "respond-async" in prefer.lower())
+    if respond_async:
+        job = await get_image_job_service().submit(user_id, request)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": str(http_request.url_for("get_image_job", job_id=job.id))},
+            content={
+                "status": "success",
+                "data": job.model_dump(mode="json"),
+                "message": "Image generation queued"
+            }
+        )
 
     try:
+        image_service = get_image_service()
+
+        if request.candidates > 1:
+            # Several options: stream each one as soon as it is ready
+            if request.source == "custom_description":
+                dalle_prompt = image_service.build_custom_prompt(request.custom_prompt)
+            else:
+                dalle_prompt = image_service.build_post_content_prompt(request.post_text)
+
+            async def candidate_lines():
+                async for candidate in image_service.generate_candidates(
+                    dalle_prompt, user_id, request.candidates, request.force_new
+                ):
+                    yield json.dumps(candidate.model_dump()) + "\n"
+
+            return StreamingResponse(candidate_lines(), media_type="application/x-ndjson")
+
         # Route based on source type
         if request.source == "post_content":
             # Generate from post content
-            image_url = await image_service.generate_from_post_content(
+            work = image_service.generate_from_post_content(
                 request.post_text,
-                user_id
+                user_id,
+                force_new=request.force_new
             )
         elif request.source == "custom_description":
             # Generate from custom prompt
-            if not request.custom_prompt:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="custom_prompt is required when source is 'custom_description'"
-                )
-            image_url = await image_service.generate_from_custom_prompt(
+            work = image_service.generate_from_custom_prompt(
                 request.custom_prompt,
-                user_id
+                user_id,
+                force_new=request.force_new
             )
         else:
             raise HTTPException(
@@ -460,9 +692,12 @@ async def generate_ai_image(
                 detail=f"Invalid source: {request.source}. Must be 'post_content' or 'custom_description'"
             )
 
+        # Cancel generation/upload if the client disconnects
+        image = await run_until_disconnected(http_request, work, "generate_ai_image")
+
         return {
             "status": "success",
-            "data": {"image_url": image_url},
+            "data": image.model_dump(),
             "message": "AI image generated successfully"
         }
 
@@ -480,3 +715,71 @@ async def generate_ai_image(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"AI image generation error: {str(e)}"
         )
+
+
+@router.get("/image-jobs/{job_id}", response_model=Envelope[ImageJob])
+async def get_image_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get the status of an async image generation job.
+
+    **Status values:** queued, generating, uploading, done, failed
+
+    **Returns:**
+    ```json
+    {
+        "status": "success",
+        "data": {
+            "id": "...",
+            "status": "done",
+            "image_url": "https://...supabase.co/storage/v1/object/public/sparkle_pic/...",
+            "error": null
+        },
+        "message": "Image job retrieved successfully"
+    }
+    ```
+
+    **Errors:**
+    - 404: Job not found (unknown, expired or owned by another user)
+    """
+    user_id = current_user.get("id")
+    job = await get_image_job_service().get_job(job_id, user_id)
+
+    return {
+        "status": "success",
+        "data": job.model_dump(mode="json"),
+        "message": "Image job retrieved successfully"
+    }
+
+
+@router.get("/image-jobs/{job_id}/events")
+async def stream_image_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Follow an async image generation job with Server-Sent Events.
+
+    Emits a `status` event with the job each time its status changes; the
+    stream ends once the job is done or failed.
+
+    **Errors:**
+    - 404: Job not found (unknown, expired or owned by another user)
+    """
+    user_id = current_user.get("id")
+    job_service = get_image_job_service()
+
+    # Fail with 404 before the stream starts
+    await job_service.get_job(job_id, user_id)
+
+    async def events():
+        async for job in job_service.watch(job_id, user_id):
+            yield f"event: status\ndata: {json.dumps(job.model_dump(mode='json'))}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -11,15 +11,94 @@ This service coordinates the AI content generation process:
 import logging
 import re
 import json
-from typing import Dict, Any, List
+import hashlib
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
 from fastapi import HTTPException, status
 
 from .llm_service import get_llm_service
+from .speculation_service import get_speculation_service
 from config import prompts
+from config.settings import settings
+from models.ai import AIAction
+from services.cache import TTLCache
+from services import metrics
 from services.onboarding_service import get_brand_blueprint
+from services.quota_service import get_quota_service
 
 logger = logging.getLogger(__name__)
 
+# Paragraphs are separated by one or more blank lines
+PARAGRAPH_SEPARATOR = re.compile(r'(\n[ \t]*\n\s*)')
+
+# Characters of the full post sent as context with changed paragraphs
+GRAMMAR_CONTEXT_CHARS = 300
+
+# Typographic quotes models sometimes use instead of JSON quotes
+SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"'})
+
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """
+    Find the first balanced {...} object in text, ignoring braces in strings.
+
+    Args:
+        text: Text that may contain prose around a JSON object
+
+    Returns:
+        The JSON object substring, or None if no balanced object is found
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return None
+
+
+def _repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Best-effort repair of a malformed JSON response.
+
+    Args:
+        text: Raw response with code fences already removed
+
+    Returns:
+        Parsed JSON object, or None if it cannot be repaired
+    """
+    for candidate in (text, text.translate(SMART_QUOTES)):
+        extracted = _extract_json_object(candidate)
+        if extracted is None:
+            continue
+        # Drop trailing commas before closing brackets
+        for attempt in (extracted, re.sub(r',\s*([}\]])', r'\1', extracted)):
+            try:
+                data = json.loads(attempt)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                return data
+    return None
+
 
 class GenerationService:
     """
@@ -37,6 +116,59 @@ class GenerationService:
         """Initialize generation service"""
         self.llm = get_llm_service()
 
+        # Corrected paragraphs keyed by hash(user_id, paragraph)
+        self._grammar_cache = TTLCache(
+            max_size=settings.GRAMMAR_CACHE_SIZE,
+            ttl=settings.GRAMMAR_CACHE_TTL
+        )
+        # Hashtags/hook from a grammar check, keyed by hash(user_id, normalized text)
+        self._grammar_extras = TTLCache(
+            max_size=settings.GRAMMAR_CACHE_SIZE,
+            ttl=settings.GRAMMAR_CACHE_TTL
+        )
+
+    def _parse_json_response(self, response: str) -> Dict[str, Any]:
+        """
+        Parse a raw LLM response into a JSON object.
+
+        Structured outputs make the strict parse succeed almost always; the
+        repair step handles prose around the JSON, code fences, smart quotes
+        and trailing commas. Outcomes are counted in ai.parse.* metrics.
+
+        Args:
+            response: Raw response from LLM (may contain markdown code blocks)
+
+        Returns:
+            Parsed JSON object
+
+        Raises:
+            HTTPException: If response cannot be parsed or repaired
+        """
+        # Remove markdown code blocks if present (```json ... ```)
+        cleaned = re.sub(r'```(?:json)?\n?|\n?```', '', (response or "").strip())
+
+        try:
+            data = json.loads(cleaned)
+            if isinstance(data, dict):
+                metrics.increment("ai.parse.ok")
+                return data
+        except json.JSONDecodeError:
+            pass
+
+        data = _repair_json(cleaned)
+        if data is not None:
+            metrics.increment("ai.parse.repaired")
+            logger.warning("⚠️  Repaired malformed AI JSON response")
+            return data
+
+        metrics.increment("ai.parse.failed")
+        logger.error("❌ Failed to parse AI JSON response")
+        logger.error(f"Raw response: {(response or '')[:200]}...")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="AI returned invalid response format"
+        )
+
     def _parse_ai_response(self, response: str) -> Dict[str, Any]:
         """
         Parse JSON response from AI containing content, hashtags, and hook.
@@ -48,28 +180,202 @@ class GenerationService:
             Dict with content, hashtags array, and hook_suggestion string
 
         Raises:
-            json.JSONDecodeError: If response is not valid JSON
+            HTTPException: If response is not valid JSON
         """
-        try:
-            # Remove markdown code blocks if present (```json ... ```)
-            cleaned = re.sub(r'```json\n?|\n?```', '', response.strip())
+        data = self._parse_json_response(response)
+
+        # Extract and validate fields
+        return {
+            "content": data.get("content", "").strip(),
+            "hashtags": data.get("hashtags", []),
+            "hook_suggestion": data.get("hook", "")
+        }
+
+    def _grammar_cache_key(self, user_id: str, paragraph: str) -> str:
+        """Cache key for a corrected paragraph"""
+        return hashlib.sha256(f"{user_id}\x00{paragraph}".encode("utf-8")).hexdigest()
+
+    def _grammar_text_key(self, user_id: str, paragraphs: List[str]) -> str:
+        """Cache key for a whole post (paragraphs stripped, blank ones dropped)"""
+        normalized = "\n\n".join(paragraph for paragraph in paragraphs if paragraph)
+        return hashlib.sha256(f"{user_id}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    async def _correct_paragraphs(
+        self,
+        user_id: str,
+        text: str,
+        paragraphs: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Correct only the given paragraphs with a single LLM call.
 
-            # Parse JSON
-            data = json.loads(cleaned)
+        Args:
+            user_id: User's UUID
+            text: Full post text (an excerpt is sent for context)
+            paragraphs: Changed paragraphs (stripped)
 
-            # Extract and validate fields
-            return {
-                "content": data.get("content", "").strip(),
-                "hashtags": data.get("hashtags", []),
-                "hook_suggestion": data.get("hook", "")
-            }
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ Failed to parse AI JSON response: {str(e)}")
-            logger.error(f"Raw response: {response[:200]}...")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="AI returned invalid response format"
+        Returns:
+            Dict with corrected paragraphs, hashtags and hook_suggestion,
+            or None if the model did not return one paragraph per input
+        """
+        action_prompt = prompts.build_prompt(
+            prompts.CORRECT_GRAMMAR_PARAGRAPHS_PROMPT,
+            post_excerpt=text[:GRAMMAR_CONTEXT_CHARS],
+            paragraphs=json.dumps(paragraphs, ensure_ascii=False),
+            count=len(paragraphs)
+        )
+
+        response = await self.llm.generate_completion(
+            action_prompt,
+            user_id=user_id,
+            response_schema=prompts.GRAMMAR_PARAGRAPHS_SCHEMA,
+            action=AIAction.GRAMMAR.value
+        )
+        data = self._parse_json_response(response)
+
+        corrected = data.get("paragraphs")
+        if (
+            not isinstance(corrected, list)
+            or len(corrected) != len(paragraphs)
+            or not all(isinstance(p, str) for p in corrected)
+        ):
+            logger.warning(
+                f"⚠️  Paragraph count mismatch in grammar response "
+                f"(sent {len(paragraphs)}), falling back to full-text check"
+            )
+            return None
+
+        return {
+            "paragraphs": [p.strip() for p in corrected],
+            "hashtags": data.get("hashtags", []),
+            "hook_suggestion": data.get("hook", "")
+        }
+
+    def _split_into_chunks(self, text: str, chunk_size: int) -> List[str]:
+        """
+        Split text into chunks on paragraph boundaries.
+
+        Paragraphs are packed greedily until a chunk would exceed chunk_size.
+        A single paragraph longer than chunk_size becomes its own chunk.
+
+        Args:
+            text: Text to split
+            chunk_size: Target maximum characters per chunk
+
+        Returns:
+            List of chunks (paragraphs joined by blank lines)
+        """
+        paragraphs = [p.strip() for p in PARAGRAPH_SEPARATOR.split(text)[::2] if p.strip()]
+
+        chunks: List[str] = []
+        current: List[str] = []
+        current_len = 0
+        for paragraph in paragraphs:
+            if current and current_len + len(paragraph) > chunk_size:
+                chunks.append("\n\n".join(current))
+                current, current_len = [], 0
+            current.append(paragraph)
+            current_len += len(paragraph) + 2
+
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks
+
+    async def _process_in_chunks(
+        self,
+        user_id: str,
+        template: str,
+        text_field: str,
+        chunks: List[str],
+        user_context: Dict[str, Any],
+        action: str
+    ) -> Dict[str, Any]:
+        """
+        Run an action prompt over chunks concurrently and merge the results.
+
+        Each chunk gets the same blueprint context. After the chunks are
+        joined, one short consistency pass picks hashtags and a hook for the
+        whole post, so latency is bounded by chunk size, not post length.
+
+        Args:
+            user_id: User's UUID
+            template: Action prompt template
+            text_field: Name of the template placeholder for the text
+            chunks: Text chunks to process
+            user_context: Brand blueprint context (tone, topics, goal)
+            action: AI action (selects the model route)
+
+        Returns:
+            Dict with content, hashtags, hook_suggestion
+        """
+        logger.info(f"🧩 Processing {len(chunks)} chunks concurrently for user {user_id}")
+
+        async def process_chunk(chunk: str) -> Dict[str, Any]:
+            action_prompt = prompts.build_prompt(
+                template,
+                tone=user_context["tone"],
+                topics=user_context["topics"],
+                goal=user_context["goal"],
+                **{text_field: chunk}
+            )
+            response = await self.llm.generate_completion(
+                action_prompt,
+                user_id=user_id,
+                response_schema=prompts.POST_RESPONSE_SCHEMA,
+                action=action
             )
+            return self._parse_ai_response(response)
+
+        tasks = [asyncio.create_task(process_chunk(chunk)) for chunk in chunks]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # One chunk failed: stop the others instead of paying for them
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        content = "\n\n".join(r["content"] for r in results if r["content"])
+
+        # Deduplicate section hashtags (case-insensitive, order preserved)
+        candidate_hashtags: List[str] = []
+        seen = set()
+        for r in results:
+            for tag in r["hashtags"]:
+                key = str(tag).lstrip("#").lower()
+                if key and key not in seen:
+                    seen.add(key)
+                    candidate_hashtags.append(str(tag).lstrip("#"))
+
+        merge_prompt = prompts.build_prompt(
+            prompts.CHUNK_MERGE_PROMPT,
+            tone=user_context["tone"],
+            topics=user_context["topics"],
+            content=content,
+            candidate_hashtags=", ".join(candidate_hashtags) or "(none)"
+        )
+        try:
+            response = await self.llm.generate_completion(
+                merge_prompt,
+                max_tokens=200,
+                user_id=user_id,
+                response_schema=prompts.CHUNK_MERGE_SCHEMA,
+                action=action
+            )
+            merged = self._parse_json_response(response)
+            hashtags = merged.get("hashtags") or candidate_hashtags[:5]
+            hook = merged.get("hook") or results[0]["hook_suggestion"]
+        except HTTPException:
+            # Consistency pass is best-effort - fall back to section results
+            hashtags = candidate_hashtags[:5]
+            hook = results[0]["hook_suggestion"]
+
+        return {
+            "content": content,
+            "hashtags": hashtags,
+            "hook_suggestion": hook
+        }
 
     async def _get_user_context(self, user_id: str) -> Dict[str, Any]:
         """
@@ -105,10 +411,73 @@ class GenerationService:
                 "goal": "Build thought leadership",
             }
 
+    async def _generate_continuation(
+        self,
+        user_id: str,
+        current_text: str,
+        on_usage: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate the continuation paragraphs (without the original text).
+
+        Args:
+            user_id: User's UUID
+            current_text: Current post text
+            on_usage: Receives the tokens used instead of charging them (speculation)
+
+        Returns:
+            Dict with content (new paragraphs only), hashtags, hook_suggestion
+        """
+        # Get user context
+        user_context = await self._get_user_context(user_id)
+
+        # Build prompt (now returns JSON with content, hashtags, hook)
+        action_prompt = prompts.build_prompt(
+            prompts.CONTINUE_WRITING_PROMPT,
+            tone=user_context["tone"],
+            topics=user_context["topics"],
+            goal=user_context["goal"],
+            current_text=current_text
+        )
+
+        # Single API call - get continuation, hashtags, and hook all at once
+        response = await self.llm.generate_completion(
+            action_prompt,
+            user_id=user_id,
+            response_schema=prompts.POST_RESPONSE_SCHEMA,
+            action=AIAction.CONTINUE.value,
+            on_usage=on_usage
+        )
+
+        # Parse JSON response
+        return self._parse_ai_response(response)
+
+    def speculate_continuation(self, user_id: str, post_id: str, text: str) -> bool:
+        """
+        Pre-compute a continuation in the background after a draft is saved.
+
+        Args:
+            user_id: User's UUID
+            post_id: Saved post's UUID
+            text: Saved post content
+
+        Returns:
+            True if a speculative task was started
+        """
+        async def compute() -> Dict[str, Any]:
+            tokens: List[int] = []
+            parsed = await self._generate_continuation(user_id, text, on_usage=tokens.append)
+            return {"result": parsed, "total_tokens": sum(tokens)}
+
+        return get_speculation_service().schedule(user_id, post_id, text, compute)
+
     async def continue_writing(self, user_id: str, current_text: str) -> Dict[str, Any]:
         """
         Continue writing the user's post.
 
+        Returns a speculative result pre-computed when the draft was saved
+        if one is cached for this exact text; its tokens are charged now.
+
         Args:
             user_id: User's UUID
             current_text: Current post text
@@ -125,23 +494,15 @@ class GenerationService:
         try:
             logger.info(f"✏️  Continue writing for user {user_id}")
 
-            # Get user context
-            user_context = await self._get_user_context(user_id)
-
-            # Build prompt (now returns JSON with content, hashtags, hook)
-            action_prompt = prompts.build_prompt(
-                prompts.CONTINUE_WRITING_PROMPT,
-                tone=user_context["tone"],
-                topics=user_context["topics"],
-                goal=user_context["goal"],
-                current_text=current_text
-            )
-
-            # Single API call - get continuation, hashtags, and hook all at once
-            response = await self.llm.generate_completion(action_prompt)
-
-            # Parse JSON response
-            parsed = self._parse_ai_response(response)
+            speculative = get_speculation_service().get(user_id, current_text)
+            if speculative is not None:
+                quota = get_quota_service()
+                await quota.check_quota(user_id)
+                quota.record_usage(user_id, speculative["total_tokens"])
+                parsed = speculative["result"]
+                logger.info(f"🔮 Using speculative continuation for user {user_id}")
+            else:
+                parsed = await self._generate_continuation(user_id, current_text)
 
             # Combine original text + AI continuation
             full_content = current_text + "\n\n" + parsed["content"]
@@ -184,6 +545,15 @@ class GenerationService:
             # Get user context
             user_context = await self._get_user_context(user_id)
 
+            # Long inputs: process paragraph chunks concurrently
+            if len(text_to_rephrase) > settings.LLM_CHUNK_THRESHOLD_CHARS:
+                chunks = self._split_into_chunks(text_to_rephrase, settings.LLM_CHUNK_SIZE_CHARS)
+                if len(chunks) > 1:
+                    return await self._process_in_chunks(
+                        user_id, prompts.REPHRASE_PROMPT, "text_to_rephrase", chunks, user_context,
+                        AIAction.REPHRASE.value
+                    )
+
             # Build prompt (now returns JSON with content, hashtags, hook)
             action_prompt = prompts.build_prompt(
                 prompts.REPHRASE_PROMPT,
@@ -194,7 +564,12 @@ class GenerationService:
             )
 
             # Single API call - get rephrased text, hashtags, and hook all at once
-            response = await self.llm.generate_completion(action_prompt)
+            response = await self.llm.generate_completion(
+                action_prompt,
+                user_id=user_id,
+                response_schema=prompts.POST_RESPONSE_SCHEMA,
+                action=AIAction.REPHRASE.value
+            )
 
             # Parse JSON response
             return self._parse_ai_response(response)
@@ -228,20 +603,80 @@ class GenerationService:
         try:
             logger.info(f"✅ Correcting grammar for user {user_id}")
 
-            # Get user context (for context, though not used in prompt)
-            user_context = await self._get_user_context(user_id)
-
-            # Build prompt (now returns JSON with content, hashtags, hook)
-            action_prompt = prompts.build_prompt(
-                prompts.CORRECT_GRAMMAR_PROMPT,
-                text=text
+            # Split into paragraphs, keeping the original separators
+            pieces = PARAGRAPH_SEPARATOR.split(text)
+            paragraphs = [piece.strip() for piece in pieces[::2]]
+
+            # Reuse cached corrections for paragraphs that haven't changed
+            extras = self._grammar_extras.get(self._grammar_text_key(user_id, paragraphs))
+            corrections: Dict[str, str] = {}
+            changed: List[str] = []
+            for paragraph in paragraphs:
+                if not paragraph or paragraph in corrections or paragraph in changed:
+                    continue
+                cached = self._grammar_cache.get(self._grammar_cache_key(user_id, paragraph))
+                if cached is None:
+                    changed.append(paragraph)
+                else:
+                    corrections[paragraph] = cached
+
+            if extras is None and not changed:
+                # Every paragraph is cached but hashtags/hook for this post aren't
+                changed = list(corrections)
+                corrections = {}
+
+            logger.info(
+                f"📝 Grammar check: {len(changed)} changed, "
+                f"{len(corrections)} cached paragraph(s)"
             )
 
-            # Single API call - get corrected text, hashtags, and hook all at once
-            response = await self.llm.generate_completion(action_prompt)
+            if changed:
+                result = await self._correct_paragraphs(user_id, text, changed)
+
+                if result is None:
+                    # Fall back to correcting the whole post in one pass
+                    action_prompt = prompts.build_prompt(
+                        prompts.CORRECT_GRAMMAR_PROMPT,
+                        text=text
+                    )
+                    response = await self.llm.generate_completion(
+                        action_prompt,
+                        user_id=user_id,
+                        response_schema=prompts.POST_RESPONSE_SCHEMA,
+                        action=AIAction.GRAMMAR.value
+                    )
+                    return self._parse_ai_response(response)
+
+                for original, corrected in zip(changed, result["paragraphs"]):
+                    corrections[original] = corrected
+                    self._grammar_cache.set(self._grammar_cache_key(user_id, original), corrected)
+                    # Accepted corrections come back unchanged on the next check
+                    self._grammar_cache.set(self._grammar_cache_key(user_id, corrected), corrected)
+
+                extras = {
+                    "hashtags": result["hashtags"],
+                    "hook_suggestion": result["hook_suggestion"]
+                }
+                self._grammar_extras.set(self._grammar_text_key(user_id, paragraphs), extras)
+                # Checking the corrected post again finds the same hashtags/hook
+                self._grammar_extras.set(
+                    self._grammar_text_key(user_id, [corrections[p] for p in paragraphs if p]),
+                    extras
+                )
+
+            # Stitch corrected paragraphs back together with original separators
+            for index in range(0, len(pieces), 2):
+                paragraph = paragraphs[index // 2]
+                if paragraph:
+                    leading = pieces[index][:len(pieces[index]) - len(pieces[index].lstrip())]
+                    trailing = pieces[index][len(pieces[index].rstrip()):]
+                    pieces[index] = leading + corrections[paragraph] + trailing
 
-            # Parse JSON response
-            return self._parse_ai_response(response)
+            return {
+                "content": "".join(pieces).strip(),
+                "hashtags": extras["hashtags"],
+                "hook_suggestion": extras["hook_suggestion"]
+            }
 
         except HTTPException:
             raise
@@ -285,7 +720,12 @@ class GenerationService:
             )
 
             # Single API call - get improved text, hashtags, and hook all at once
-            response = await self.llm.generate_completion(action_prompt)
+            response = await self.llm.generate_completion(
+                action_prompt,
+                user_id=user_id,
+                response_schema=prompts.POST_RESPONSE_SCHEMA,
+                action=AIAction.ENGAGEMENT.value
+            )
 
             # Parse JSON response
             return self._parse_ai_response(response)
@@ -322,6 +762,15 @@ class GenerationService:
             # Get user context
             user_context = await self._get_user_context(user_id)
 
+            # Long inputs: process paragraph chunks concurrently
+            if len(text) > settings.LLM_CHUNK_THRESHOLD_CHARS:
+                chunks = self._split_into_chunks(text, settings.LLM_CHUNK_SIZE_CHARS)
+                if len(chunks) > 1:
+                    return await self._process_in_chunks(
+                        user_id, prompts.MAKE_SHORTER_PROMPT, "text", chunks, user_context,
+                        AIAction.SHORTER.value
+                    )
+
             # Build prompt (now returns JSON with content, hashtags, hook)
             action_prompt = prompts.build_prompt(
                 prompts.MAKE_SHORTER_PROMPT,
@@ -331,7 +780,12 @@ class GenerationService:
             )
 
             # Single API call - get shortened text, hashtags, and hook all at once
-            response = await self.llm.generate_completion(action_prompt)
+            response = await self.llm.generate_completion(
+                action_prompt,
+                user_id=user_id,
+                response_schema=prompts.POST_RESPONSE_SCHEMA,
+                action=AIAction.SHORTER.value
+            )
 
             # Parse JSON response
             return self._parse_ai_response(response)
@@ -0,0 +1,299 @@
+"""
+Image Job Service - Asynchronous DALL-E image generation
+
+Generating, decoding and uploading an image takes 10-30 seconds, which is
+longer than many mobile proxies keep a request open. Instead of holding the
+request, the client can submit a job:
+
+1. POST returns 202 with the job id right away
+2. A bounded pool of workers runs the generation
+3. The client polls the job (or follows it over SSE) through the stages
+   queued -> generating -> uploading -> done / failed
+
+Jobs live in a pluggable JobStore. InMemoryJobStore is the default; a
+shared store (e.g. Redis or a database table) can be plugged in for
+multi-worker deployments by implementing BaseJobStore.
+"""
+
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, List, Optional
+
+from fastapi import HTTPException, status
+
+from config.settings import settings
+from models.image import ImageGenerateRequest, ImageJob, ImageJobStatus, ImageSource
+from services import metrics
+from services.cache import TTLCache
+from services.timing import background_context
+from services.ai.image_service import get_image_service
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of finished/pending jobs kept by the in-memory store
+MAX_STORED_JOBS = 5000
+
+
+class BaseJobStore(ABC):
+    """Storage backend for image jobs"""
+
+    @abstractmethod
+    async def create(self, job: ImageJob) -> None:
+        """Persist a new job"""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[ImageJob]:
+        """Get a job by id (None if unknown or expired)"""
+
+    @abstractmethod
+    async def update(self, job_id: str, **fields: Any) -> Optional[ImageJob]:
+        """Update fields of a job and bump updated_at (None if unknown)"""
+
+
+class InMemoryJobStore(BaseJobStore):
+    """
+    Per-process job store backed by a bounded TTL cache.
+
+    Jobs are only visible to the worker process that created them, so this
+    store is meant for single-process deployments and development.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_size: int = MAX_STORED_JOBS):
+        """
+        Args:
+            ttl: Seconds a job is kept after its last update
+            max_size: Maximum number of jobs kept
+        """
+        self._jobs = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def create(self, job: ImageJob) -> None:
+        self._jobs.set(job.id, job)
+
+    async def get(self, job_id: str) -> Optional[ImageJob]:
+        return self._jobs.get(job_id)
+
+    async def update(self, job_id: str, **fields: Any) -> Optional[ImageJob]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        updated = job.model_copy(update={**fields, "updated_at": datetime.now(timezone.utc)})
+        self._jobs.set(job_id, updated)
+        return updated
+
+
+class ImageJobService:
+    """
+    Queue and run image generation jobs on a bounded worker pool.
+
+    Usage:
+        jobs = get_image_job_service()
+        job = await jobs.submit(user_id, request)
+        job = await jobs.get_job(job.id, user_id)
+    """
+
+    def __init__(self, store: Optional[BaseJobStore] = None):
+        """
+        Args:
+            store: Job store (defaults to InMemoryJobStore)
+        """
+        self.store = store or InMemoryJobStore(ttl=settings.IMAGE_JOB_TTL)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the worker pool (no-op if already running)"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.IMAGE_JOB_QUEUE_SIZE)
+        # Workers may be started by a request; they must not add to its timings
+        self._workers = [
+            asyncio.create_task(self._worker(n), context=background_context())
+            for n in range(settings.IMAGE_JOB_WORKERS)
+        ]
+        logger.info(f"✅ Image job workers started ({settings.IMAGE_JOB_WORKERS} workers)")
+
+    async def stop(self) -> None:
+        """Stop the worker pool; queued jobs are marked as failed"""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        while self._queue is not None and not self._queue.empty():
+            job_id, _, _ = self._queue.get_nowait()
+            await self.store.update(job_id, status=ImageJobStatus.FAILED, error="Server shutting down")
+
+    async def submit(self, user_id: str, request: ImageGenerateRequest) -> ImageJob:
+        """
+        Queue an image generation job.
+
+        Args:
+            user_id: User's UUID
+            request: Validated image generation request
+
+        Returns:
+            The queued job
+
+        Raises:
+            HTTPException 503: If the job queue is full
+        """
+        self.start()
+
+        if self._queue.full():
+            metrics.increment("image.jobs.rejected")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many image generations in progress. Please try again shortly.",
+                headers={"Retry-After": "10"}
+            )
+
+        now = datetime.now(timezone.utc)
+        job = ImageJob(id=str(uuid.uuid4()), user_id=user_id, created_at=now, updated_at=now)
+        await self.store.create(job)
+        self._queue.put_nowait((job.id, user_id, request))
+
+        metrics.increment("image.jobs.submitted")
+        metrics.set_gauge("image.jobs.queued", self._queue.qsize())
+        logger.info(f"📥 Image job {job.id} queued for user {user_id}")
+        return job
+
+    async def get_job(self, job_id: str, user_id: str) -> ImageJob:
+        """
+        Get a job owned by the user.
+
+        Raises:
+            HTTPException 404: If the job doesn't exist or belongs to another user
+        """
+        job = await self.store.get(job_id)
+        if job is None or job.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Image job not found"
+            )
+        return job
+
+    async def watch(self, job_id: str, user_id: str) -> AsyncIterator[ImageJob]:
+        """
+        Yield the job each time it changes, until it finishes.
+
+        Polls the store so it works with any JobStore backend.
+
+        Raises:
+            HTTPException 404: If the job doesn't exist or belongs to another user
+        """
+        job = await self.get_job(job_id, user_id)
+        yield job
+
+        last_update = job.updated_at
+        while not job.finished:
+            await asyncio.sleep(settings.IMAGE_JOB_POLL_INTERVAL)
+            job = await self.store.get(job_id)
+            if job is None:
+                return
+            if job.updated_at != last_update:
+                last_update = job.updated_at
+                yield job
+
+    async def _worker(self, n: int) -> None:
+        """Take jobs off the queue and run them one at a time"""
+        while True:
+            job_id, user_id, request = await self._queue.get()
+            metrics.set_gauge("image.jobs.queued", self._queue.qsize())
+            try:
+                await self._run(job_id, user_id, request)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str, user_id: str, request: ImageGenerateRequest) -> None:
+        """Run one job and record its outcome in the store"""
+
+        async def on_progress(stage: ImageJobStatus) -> None:
+            await self.store.update(job_id, status=stage)
+
+        try:
+            image_service = get_image_service()
+            if request.candidates > 1:
+                await self._run_candidates(job_id, user_id, request)
+                return
+
+            if request.source == ImageSource.CUSTOM_DESCRIPTION:
+                image = await image_service.generate_from_custom_prompt(
+                    request.custom_prompt, user_id, on_progress, request.force_new
+                )
+            else:
+                image = await image_service.generate_from_post_content(
+                    request.post_text, user_id, on_progress, request.force_new
+                )
+
+            await self.store.update(
+                job_id,
+                status=ImageJobStatus.DONE,
+                image_url=image.image_url,
+                variants=image.variants
+            )
+            metrics.increment("image.jobs.completed")
+            logger.info(f"✅ Image job {job_id} done")
+
+        except asyncio.CancelledError:
+            await self.store.update(job_id, status=ImageJobStatus.FAILED, error="Job cancelled")
+            raise
+        except HTTPException as e:
+            await self._fail(job_id, str(e.detail))
+        except Exception as e:
+            # ValueError here means the image service isn't configured
+            await self._fail(job_id, str(e))
+
+    async def _run_candidates(self, job_id: str, user_id: str, request: ImageGenerateRequest) -> None:
+        """Run a multi-candidate job, recording each candidate as it finishes"""
+        image_service = get_image_service()
+        if request.source == ImageSource.CUSTOM_DESCRIPTION:
+            dalle_prompt = image_service.build_custom_prompt(request.custom_prompt)
+        else:
+            dalle_prompt = image_service.build_post_content_prompt(request.post_text)
+
+        await self.store.update(job_id, status=ImageJobStatus.GENERATING)
+
+        candidates = []
+        async for candidate in image_service.generate_candidates(
+            dalle_prompt, user_id, request.candidates, request.force_new
+        ):
+            candidates.append(candidate)
+            fields = {"candidates": list(candidates)}
+            # The first successful candidate doubles as the job's image
+            if candidate.image_url and not any(c.image_url for c in candidates[:-1]):
+                fields.update(image_url=candidate.image_url, variants=candidate.variants)
+            await self.store.update(job_id, **fields)
+
+        if not any(c.image_url for c in candidates):
+            await self._fail(job_id, candidates[0].error if candidates else "No images generated")
+            return
+
+        await self.store.update(job_id, status=ImageJobStatus.DONE)
+        metrics.increment("image.jobs.completed")
+        logger.info(f"✅ Image job {job_id} done ({len(candidates)} candidates)")
+
+    async def _fail(self, job_id: str, error: str) -> None:
+        """Mark a job as failed"""
+        await self.store.update(job_id, status=ImageJobStatus.FAILED, error=error)
+        metrics.increment("image.jobs.failed")
+        logger.error(f"❌ Image job {job_id} failed: {error}")
+
+
+# Singleton instance
+_image_job_service: Optional[ImageJobService] = None
+
+
+def get_image_job_service() -> ImageJobService:
+    """
+    Get or create the global image job service instance.
+
+    Returns:
+        Image job service instance
+    """
+    global _image_job_service
+    if _image_job_service is None:
+        _image_job_service = ImageJobService()
+    return _image_job_service
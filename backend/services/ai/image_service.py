@@ -2,25 +2,58 @@
 Image Generation Service - AI-powered image generation for posts
 
 This service generates images using DALL-E 3 based on post content:
-1. Generate images from post text
-2. Download generated images
-3. Upload to Supabase Storage
+1. Generate images from post text (returned inline as base64)
+2. Upload the decoded bytes straight to Supabase Storage
+3. Store optimized WebP/JPEG variants and a thumbnail
 4. Return public URLs
+
+All network I/O is async (AsyncOpenAI + a pooled httpx client), so an
+image generation never blocks other requests on the same worker. If DALL-E
+ever answers with a URL instead of base64, the image is streamed from it.
 """
 
 import logging
-import os
-import io
-import requests
-from typing import Optional
-from fastapi import HTTPException, status, UploadFile
-from openai import OpenAI
+import base64
+import asyncio
+import hashlib
+import re
+import httpx
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from fastapi import HTTPException, status
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from models.image import ImageCandidate, ImageJobStatus, StoredImage
 
 from services.storage_service import get_storage_service
+from services.cache import TTLCache
+from services import metrics
+from services.bulkhead import get_bulkhead
+from services.timing import timed
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Safety cap for generated images (DALL-E 3 PNGs are ~1-3MB)
+MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+
+# DALL-E 3 output settings
+DALLE_SIZE = "1024x1024"
+DALLE_QUALITY = "standard"
+
+# DALL-E returns PNG images
+GENERATED_CONTENT_TYPE = "image/png"
+GENERATED_EXTENSION = "png"
+
+# Style variations used for extra candidates (candidate 0 uses the plain prompt)
+CANDIDATE_STYLES = [
+    "minimal flat illustration with a limited color palette",
+    "bold abstract geometric shapes",
+    "natural light editorial photography",
+]
+
+# Called with each stage as generation progresses (used by image jobs)
+ProgressCallback = Callable[[ImageJobStatus], Awaitable[None]]
+
 
 class ImageGenerationService:
     """
@@ -37,10 +70,34 @@ class ImageGenerationService:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not configured")
 
-        self.client = OpenAI(api_key=self.api_key)
+        # Dedicated connection pool, sized to the image bulkhead
+        concurrency = settings.BULKHEAD_IMAGE_CONCURRENCY
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            timeout=settings.IMAGE_GENERATION_TIMEOUT,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            )
+        )
+
         self.storage_service = get_storage_service()
+
+        # Pooled client for downloading generated images (owned by the storage service)
+        self.http = self.storage_service.http
+
+        # (user_id, prompt hash, size, quality) -> stored image
+        self._url_cache = TTLCache(max_size=settings.IMAGE_CACHE_SIZE, ttl=settings.IMAGE_CACHE_TTL)
+
         logger.info("✅ Image generation service initialized (DALL-E 3)")
 
+    async def warm_up(self) -> None:
+        """Open the TLS connection to OpenAI ahead of the first image request"""
+        await self.client.models.list()
+
+    async def close(self) -> None:
+        """Close pooled OpenAI connections"""
+        await self.client.close()
+
     def _summarize_text(self, text: str, max_length: int = 200) -> str:
         """
         Summarize text if it's too long for DALL-E prompt.
@@ -80,131 +137,183 @@ class ImageGenerationService:
 
         return prompt
 
-    async def generate_from_post_content(
+    def _cache_key(self, user_id: str, dalle_prompt: str) -> tuple:
+        """Cache key for a user's prompt (case and whitespace insensitive)"""
+        normalized = re.sub(r"\s+", " ", dalle_prompt).strip().lower()
+        prompt_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return (user_id, prompt_hash, DALLE_SIZE, DALLE_QUALITY)
+
+    async def _download_image(self, url: str) -> bytes:
+        """
+        Stream a generated image from DALL-E's URL.
+
+        Args:
+            url: Temporary image URL returned by DALL-E
+
+        Returns:
+            Image bytes
+
+        Raises:
+            HTTPException: If the image exceeds MAX_DOWNLOAD_BYTES
+            httpx.HTTPError: If the download fails or times out
+        """
+        buffer = bytearray()
+        async with self.http.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                buffer.extend(chunk)
+                if len(buffer) > MAX_DOWNLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="Generated image is too large"
+                    )
+        return bytes(buffer)
+
+    async def _generate_and_store(
         self,
-        post_text: str,
-        user_id: str
-    ) -> str:
+        dalle_prompt: str,
+        user_id: str,
+        on_progress: Optional[ProgressCallback] = None,
+        force_new: bool = False
+    ) -> StoredImage:
         """
-        Generate image from post content using DALL-E 3.
+        Generate an image with DALL-E 3 and upload it to storage.
+
+        The image is requested as base64 so it arrives in the API response;
+        there is no second request to DALL-E's CDN before the upload.
+        A repeat request for the same prompt returns the image stored last
+        time, unless force_new is set.
 
         Args:
-            post_text: Post text content
+            dalle_prompt: Final DALL-E prompt
             user_id: User's UUID (for file organization)
+            on_progress: Optional callback notified of each stage
+            force_new: Skip the cache and always generate a new image
 
         Returns:
-            Public URL of generated and uploaded image
+            Stored image with its public URL and variant URLs
 
         Raises:
             HTTPException: If generation or upload fails
         """
-        # Validate input
-        if not post_text or not post_text.strip():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Please write some content before generating an image"
-            )
-
-        if len(post_text.strip()) < 20:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Post content too short. Write at least 20 characters."
-            )
-
+        cache_key = self._cache_key(user_id, dalle_prompt)
+        if not force_new:
+            cached = self._url_cache.get(cache_key)
+            if cached is not None:
+                metrics.increment("image.cache.hit")
+                logger.info(f"⚡ Reusing generated image for user {user_id}")
+                return cached
+        metrics.increment("image.cache.miss")
+
+        # Generation, decoding and upload run inside the image bulkhead
+        async with get_bulkhead("image").acquire():
+            return await self._generate_uncached(dalle_prompt, user_id, cache_key, on_progress)
+
+    async def _generate_uncached(
+        self,
+        dalle_prompt: str,
+        user_id: str,
+        cache_key: tuple,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> StoredImage:
+        """Call DALL-E, store the image and its variants, and cache the result"""
         try:
-            # Build DALL-E prompt
-            dalle_prompt = self._build_dalle_prompt(post_text)
-            logger.info(f"🎨 Generating image for user {user_id}")
             logger.info(f"📝 DALL-E prompt: {dalle_prompt[:100]}...")
+            if on_progress:
+                await on_progress(ImageJobStatus.GENERATING)
 
             # Call DALL-E 3 API
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=dalle_prompt,
-                size="1024x1024",
-                quality="standard",
-                n=1
-            )
+            with timed("image"):
+                response = await self.client.images.generate(
+                    model="dall-e-3",
+                    prompt=dalle_prompt,
+                    size=DALLE_SIZE,
+                    quality=DALLE_QUALITY,
+                    response_format="b64_json",
+                    n=1
+                )
 
-            # Get image URL from response
             if not response.data or len(response.data) == 0:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="DALL-E returned no images"
                 )
 
-            dalle_image_url = response.data[0].url
-            logger.info(f"✅ Image generated by DALL-E: {dalle_image_url[:50]}...")
-
-            # Download image from DALL-E URL
-            logger.info("📥 Downloading generated image...")
-            image_response = requests.get(dalle_image_url, timeout=30)
-            image_response.raise_for_status()
-
-            image_bytes = image_response.content
-            image_size = len(image_bytes)
-            logger.info(f"✅ Image downloaded ({image_size} bytes)")
-
-            # Convert to UploadFile format for storage service
-            # DALL-E returns PNG images
-            image_file = io.BytesIO(image_bytes)
-
-            # Create UploadFile-like object
-            class DallEImageFile:
-                def __init__(self, file_bytes: bytes):
-                    self.file = io.BytesIO(file_bytes)
-                    self.filename = "dalle_generated.png"
-                    self.content_type = "image/png"
-
-                async def read(self):
-                    return self.file.read()
+            image = response.data[0]
+            if image.b64_json:
+                image_bytes = base64.b64decode(image.b64_json)
+                logger.info(f"✅ Image generated by DALL-E ({len(image_bytes)} bytes)")
+            elif image.url:
+                # Older deployments may ignore response_format - stream from the URL
+                logger.info("📥 Downloading generated image...")
+                with timed("image"):
+                    image_bytes = await self._download_image(image.url)
+                logger.info(f"✅ Image downloaded ({len(image_bytes)} bytes)")
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="DALL-E returned no image data"
+                )
 
-            upload_file = DallEImageFile(image_bytes)
+            if len(image_bytes) > MAX_DOWNLOAD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Generated image is too large"
+                )
 
-            # Upload to Supabase using existing storage service
             logger.info("☁️  Uploading to Supabase Storage...")
-            public_url = await self.storage_service.upload_image(
-                upload_file,
-                user_id
+            if on_progress:
+                await on_progress(ImageJobStatus.UPLOADING)
+            content_hash = hashlib.sha256(image_bytes).hexdigest()
+            public_url = await self.storage_service.upload_bytes(
+                image_bytes,
+                user_id,
+                GENERATED_CONTENT_TYPE,
+                GENERATED_EXTENSION,
+                content_hash=content_hash
             )
+            variants = await self.storage_service.create_variants(image_bytes, user_id, content_hash)
+
+            stored = StoredImage(image_url=public_url, variants=variants)
+            self._url_cache.set(cache_key, stored)
 
             logger.info(f"✅ Image uploaded successfully: {public_url[:50]}...")
-            return public_url
+            return stored
 
-        except HTTPException:
+        except asyncio.CancelledError:
+            # Client disconnected - nothing downstream runs
+            metrics.increment("image.generations.cancelled")
+            logger.info(f"🛑 Image generation cancelled for user {user_id}")
             raise
-        except requests.RequestException as e:
-            logger.error(f"❌ Failed to download DALL-E image: {str(e)}")
+
+    def build_post_content_prompt(self, post_text: str) -> str:
+        """
+        Validate post text and build its DALL-E prompt.
+
+        Raises:
+            HTTPException 400: If the post text is empty or too short
+        """
+        if not post_text or not post_text.strip():
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to download generated image"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Please write some content before generating an image"
             )
-        except Exception as e:
-            logger.error(f"❌ Image generation failed: {str(e)}")
+
+        if len(post_text.strip()) < 20:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to generate image: {str(e)}"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Post content too short. Write at least 20 characters."
             )
 
-    async def generate_from_custom_prompt(
-        self,
-        custom_prompt: str,
-        user_id: str
-    ) -> str:
-        """
-        Generate image from custom user prompt using DALL-E 3.
+        return self._build_dalle_prompt(post_text)
 
-        Args:
-            custom_prompt: User's custom image description
-            user_id: User's UUID (for file organization)
-
-        Returns:
-            Public URL of generated and uploaded image
+    def build_custom_prompt(self, custom_prompt: str) -> str:
+        """
+        Validate a custom image description and build its DALL-E prompt.
 
         Raises:
-            HTTPException: If generation or upload fails
+            HTTPException 400: If the description is empty, too short or too long
         """
-        # Validate input
         if not custom_prompt or not custom_prompt.strip():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -223,93 +332,179 @@ class ImageGenerationService:
                 detail="Image description too long. Maximum 500 characters."
             )
 
-        try:
-            # Build enhanced DALL-E prompt
-            dalle_prompt = (
-                f"Create a professional, high-quality image: {custom_prompt.strip()}. "
-                f"Style: modern, clean, professional for LinkedIn."
-            )
-            logger.info(f"🎨 Generating custom image for user {user_id}")
-            logger.info(f"📝 DALL-E prompt: {dalle_prompt[:100]}...")
-
-            # Call DALL-E 3 API
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=dalle_prompt,
-                size="1024x1024",
-                quality="standard",
-                n=1
-            )
-
-            # Get image URL from response
-            if not response.data or len(response.data) == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="DALL-E returned no images"
-                )
-
-            dalle_image_url = response.data[0].url
-            logger.info(f"✅ Image generated by DALL-E: {dalle_image_url[:50]}...")
-
-            # Download image from DALL-E URL
-            logger.info("📥 Downloading generated image...")
-            image_response = requests.get(dalle_image_url, timeout=30)
-            image_response.raise_for_status()
-
-            image_bytes = image_response.content
-            image_size = len(image_bytes)
-            logger.info(f"✅ Image downloaded ({image_size} bytes)")
-
-            # Create UploadFile-like object
-            class DallEImageFile:
-                def __init__(self, file_bytes: bytes):
-                    self.file = io.BytesIO(file_bytes)
-                    self.filename = "dalle_custom.png"
-                    self.content_type = "image/png"
-
-                async def read(self):
-                    return self.file.read()
-
-            upload_file = DallEImageFile(image_bytes)
-
-            # Upload to Supabase using existing storage service
-            logger.info("☁️  Uploading to Supabase Storage...")
-            public_url = await self.storage_service.upload_image(
-                upload_file,
-                user_id
-            )
+        # Build enhanced DALL-E prompt
+        return (
+            f"Create a professional, high-quality image: {custom_prompt.strip()}. "
+            f"Style: modern, clean, professional for LinkedIn."
+        )
 
-            logger.info(f"✅ Custom image uploaded successfully: {public_url[:50]}...")
-            return public_url
+    async def _generate(
+        self,
+        dalle_prompt: str,
+        user_id: str,
+        on_progress: Optional[ProgressCallback] = None,
+        force_new: bool = False
+    ) -> StoredImage:
+        """_generate_and_store with errors mapped to HTTPException"""
+        try:
+            return await self._generate_and_store(dalle_prompt, user_id, on_progress, force_new)
 
         except HTTPException:
             raise
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"❌ Failed to download DALL-E image: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to download generated image"
             )
         except Exception as e:
-            logger.error(f"❌ Custom image generation failed: {str(e)}")
+            logger.error(f"❌ Image generation failed: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to generate image: {str(e)}"
             )
 
+    async def generate_from_post_content(
+        self,
+        post_text: str,
+        user_id: str,
+        on_progress: Optional[ProgressCallback] = None,
+        force_new: bool = False
+    ) -> StoredImage:
+        """
+        Generate image from post content using DALL-E 3.
 
-# Singleton instance
+        Args:
+            post_text: Post text content
+            user_id: User's UUID (for file organization)
+            on_progress: Optional callback notified of each stage
+            force_new: Generate a new image even if this prompt was used before
+
+        Returns:
+            Generated image with its public URL and variant URLs
+
+        Raises:
+            HTTPException: If generation or upload fails
+        """
+        dalle_prompt = self.build_post_content_prompt(post_text)
+        logger.info(f"🎨 Generating image for user {user_id}")
+        return await self._generate(dalle_prompt, user_id, on_progress, force_new)
+
+    async def generate_from_custom_prompt(
+        self,
+        custom_prompt: str,
+        user_id: str,
+        on_progress: Optional[ProgressCallback] = None,
+        force_new: bool = False
+    ) -> StoredImage:
+        """
+        Generate image from custom user prompt using DALL-E 3.
+
+        Args:
+            custom_prompt: User's custom image description
+            user_id: User's UUID (for file organization)
+            on_progress: Optional callback notified of each stage
+            force_new: Generate a new image even if this prompt was used before
+
+        Returns:
+            Generated image with its public URL and variant URLs
+
+        Raises:
+            HTTPException: If generation or upload fails
+        """
+        dalle_prompt = self.build_custom_prompt(custom_prompt)
+        logger.info(f"🎨 Generating custom image for user {user_id}")
+        return await self._generate(dalle_prompt, user_id, on_progress, force_new)
+
+    async def generate_candidates(
+        self,
+        dalle_prompt: str,
+        user_id: str,
+        count: int,
+        force_new: bool = False
+    ) -> AsyncIterator[ImageCandidate]:
+        """
+        Generate several style variations of a prompt concurrently.
+
+        DALL-E 3 only returns one image per call, so each candidate is its
+        own call. At most IMAGE_CANDIDATE_CONCURRENCY run at once, and never
+        more than half the image bulkhead so other requests keep a slot.
+        Candidates are yielded as each finishes.
+        Candidate 0 uses the unmodified prompt.
+
+        Args:
+            dalle_prompt: Prompt from build_post_content_prompt/build_custom_prompt
+            user_id: User's UUID (for file organization)
+            count: Number of candidates (1 to len(CANDIDATE_STYLES) + 1)
+            force_new: Generate new images even if a prompt was used before
+
+        Yields:
+            ImageCandidate for each finished candidate (failed ones carry an error)
+        """
+        prompts = [dalle_prompt] + [
+            f"{dalle_prompt} Visual style: {style}." for style in CANDIDATE_STYLES
+        ]
+        semaphore = asyncio.Semaphore(max(1, min(
+            settings.IMAGE_CANDIDATE_CONCURRENCY,
+            settings.BULKHEAD_IMAGE_CONCURRENCY // 2
+        )))
+
+        async def generate_one(index: int) -> ImageCandidate:
+            async with semaphore:
+                try:
+                    image = await self._generate(prompts[index], user_id, force_new=force_new)
+                    return ImageCandidate(index=index, image_url=image.image_url, variants=image.variants)
+                except HTTPException as e:
+                    return ImageCandidate(index=index, error=str(e.detail))
+
+        logger.info(f"🎨 Generating {count} image candidates for user {user_id}")
+        tasks = [asyncio.create_task(generate_one(index)) for index in range(count)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Consumer stopped early (e.g. client disconnected)
+            for task in tasks:
+                task.cancel()
+
+
+# Singleton instance (or the configuration error that prevented building it)
 _image_service: Optional[ImageGenerationService] = None
+_image_config_error: Optional[str] = None
 
 
 def get_image_service() -> ImageGenerationService:
     """
     Get or create the global image generation service instance.
 
+    A configuration error (missing API key) is cached on the first attempt,
+    so later calls fail fast instead of rebuilding.
+
     Returns:
         Image generation service instance
+
+    Raises:
+        HTTPException 503: If the image API isn't configured
     """
-    global _image_service
+    global _image_service, _image_config_error
     if _image_service is None:
-        _image_service = ImageGenerationService()
+        if _image_config_error is None:
+            try:
+                _image_service = ImageGenerationService()
+            except ValueError as e:
+                _image_config_error = str(e)
+                logger.error(f"❌ Image service not configured: {_image_config_error}")
+        if _image_service is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI service unavailable"
+            )
     return _image_service
+
+
+async def close_image_service() -> None:
+    """Close the image service's HTTP clients if it was created"""
+    global _image_service
+    if _image_service is not None:
+        await _image_service.close()
+        _image_service = None
@@ -7,13 +7,35 @@ It handles retries, timeouts, error handling, and token usage logging.
 
 import logging
 import asyncio
+import json
+import time
+import httpx
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException, status
 from config.settings import settings
+from services.quota_service import get_quota_service
+from services import metrics
+from services.bulkhead import get_bulkhead
+from services.timing import timed
+from .model_router import ModelRouter
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class CompletionResult:
+    """Generated text plus the token usage reported by the provider"""
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers"""
 
@@ -22,8 +44,10 @@ class BaseLLMProvider(ABC):
         self,
         prompt: str,
         max_tokens: int = 1000,
-        temperature: float = 0.7
-    ) -> str:
+        temperature: float = 0.7,
+        response_schema: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
+    ) -> CompletionResult:
         """
         Generate a completion from the LLM.
 
@@ -31,23 +55,42 @@ class BaseLLMProvider(ABC):
             prompt: The input prompt
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature (0.0 - 1.0)
+            response_schema: Optional {"name", "schema"} JSON schema the
+                response must follow (text is then a JSON document)
+            model: Model override (defaults to the provider's model)
 
         Returns:
-            Generated text
+            Generated text with token usage
 
         Raises:
             Exception: If generation fails
         """
         pass
 
+    async def warm_up(self) -> None:
+        """Open a connection to the provider ahead of the first request"""
+        pass
+
+
+def _llm_http_limits() -> httpx.Limits:
+    """Connection pool for LLM providers, sized to the llm bulkhead"""
+    return httpx.Limits(
+        max_connections=settings.BULKHEAD_LLM_CONCURRENCY,
+        max_keepalive_connections=settings.BULKHEAD_LLM_CONCURRENCY
+    )
+
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI GPT-4 provider"""
 
     def __init__(self, api_key: str):
         try:
-            from openai import AsyncOpenAI
-            self.client = AsyncOpenAI(api_key=api_key, timeout=settings.LLM_TIMEOUT)
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            self.client = AsyncOpenAI(
+                api_key=api_key,
+                timeout=settings.LLM_TIMEOUT,
+                http_client=DefaultAsyncHttpxClient(limits=_llm_http_limits())
+            )
             self.model = "gpt-4o-mini"  # Fast, affordable, high-quality model
             logger.info("✅ OpenAI provider initialized (gpt-4o-mini)")
         except ImportError:
@@ -57,41 +100,72 @@ class OpenAIProvider(BaseLLMProvider):
         self,
         prompt: str,
         max_tokens: int = 1000,
-        temperature: float = 0.7
-    ) -> str:
+        temperature: float = 0.7,
+        response_schema: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
+    ) -> CompletionResult:
         """Generate completion using OpenAI GPT-4"""
         try:
+            extra_args: Dict[str, Any] = {}
+            if response_schema:
+                # Structured outputs: the model can only emit schema-valid JSON
+                extra_args["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": response_schema["name"],
+                        "schema": response_schema["schema"],
+                        "strict": True
+                    }
+                }
+
             response = await self.client.chat.completions.create(
-                model=self.model,
+                model=model or self.model,
                 messages=[
                     {"role": "system", "content": "You are a professional LinkedIn content creator helping users write engaging posts."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                **extra_args
             )
 
             # Log token usage
             usage = response.usage
             logger.info(
-                f"📊 OpenAI tokens: prompt={usage.prompt_tokens}, "
+                f"📊 OpenAI tokens ({model or self.model}): prompt={usage.prompt_tokens}, "
                 f"completion={usage.completion_tokens}, total={usage.total_tokens}"
             )
 
-            return response.choices[0].message.content
+            text = response.choices[0].message.content
+            if not text:
+                raise ValueError(f"OpenAI returned an empty response (finish_reason={response.choices[0].finish_reason})")
+
+            return CompletionResult(
+                text=text,
+                input_tokens=usage.prompt_tokens,
+                output_tokens=usage.completion_tokens
+            )
 
         except Exception as e:
             logger.error(f"❌ OpenAI generation error: {str(e)}")
             raise
 
+    async def warm_up(self) -> None:
+        """Open the TLS connection with a cheap authenticated request"""
+        await self.client.models.list()
+
 
 class AnthropicProvider(BaseLLMProvider):
     """Anthropic Claude provider"""
 
     def __init__(self, api_key: str):
         try:
-            from anthropic import AsyncAnthropic
-            self.client = AsyncAnthropic(api_key=api_key, timeout=settings.LLM_TIMEOUT)
+            from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+            self.client = AsyncAnthropic(
+                api_key=api_key,
+                timeout=settings.LLM_TIMEOUT,
+                http_client=DefaultAsyncHttpxClient(limits=_llm_http_limits())
+            )
             self.model = "claude-3-5-sonnet-20241022"
             logger.info("✅ Anthropic provider initialized")
         except ImportError:
@@ -101,32 +175,63 @@ class AnthropicProvider(BaseLLMProvider):
         self,
         prompt: str,
         max_tokens: int = 1000,
-        temperature: float = 0.7
-    ) -> str:
+        temperature: float = 0.7,
+        response_schema: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
+    ) -> CompletionResult:
         """Generate completion using Anthropic Claude"""
         try:
+            extra_args: Dict[str, Any] = {}
+            if response_schema:
+                # Force a tool call whose input schema is the response contract
+                extra_args["tools"] = [{
+                    "name": response_schema["name"],
+                    "description": "Return the result in the required structure.",
+                    "input_schema": response_schema["schema"]
+                }]
+                extra_args["tool_choice"] = {"type": "tool", "name": response_schema["name"]}
+
             response = await self.client.messages.create(
-                model=self.model,
+                model=model or self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 messages=[
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                **extra_args
             )
 
             # Log token usage
             usage = response.usage
             logger.info(
-                f"📊 Anthropic tokens: input={usage.input_tokens}, "
+                f"📊 Anthropic tokens ({model or self.model}): input={usage.input_tokens}, "
                 f"output={usage.output_tokens}"
             )
 
-            return response.content[0].text
+            text = None
+            for block in response.content:
+                if block.type == "tool_use":
+                    text = json.dumps(block.input)
+                    break
+            if text is None:
+                text = next((block.text for block in response.content if block.type == "text"), None)
+            if not text:
+                raise ValueError(f"Anthropic returned an empty response (stop_reason={response.stop_reason})")
+
+            return CompletionResult(
+                text=text,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens
+            )
 
         except Exception as e:
             logger.error(f"❌ Anthropic generation error: {str(e)}")
             raise
 
+    async def warm_up(self) -> None:
+        """Open the TLS connection with a cheap authenticated request"""
+        await self.client.models.list(limit=1)
+
 
 class LLMService:
     """
@@ -138,14 +243,25 @@ class LLMService:
     """
 
     def __init__(self):
-        """Initialize LLM service with configured provider"""
+        """Initialize LLM service with configured provider and model routes"""
         self.provider = self._initialize_provider()
+        self.router = ModelRouter()
         self.max_retries = 3
         self.retry_delays = [1, 2, 4]  # Exponential backoff (seconds)
 
-    def _initialize_provider(self) -> BaseLLMProvider:
+        # One client per provider referenced by a route (primary or fallback)
+        self.providers: Dict[str, BaseLLMProvider] = {settings.LLM_PROVIDER.lower(): self.provider}
+        for route in self.router.routes.values():
+            for candidate in (route, route.fallback):
+                if candidate is not None and candidate.provider not in self.providers:
+                    self.providers[candidate.provider] = self._initialize_provider(candidate.provider)
+
+    def _initialize_provider(self, provider_name: Optional[str] = None) -> BaseLLMProvider:
         """
-        Initialize the LLM provider based on configuration.
+        Initialize an LLM provider.
+
+        Args:
+            provider_name: openai or anthropic (defaults to settings.LLM_PROVIDER)
 
         Returns:
             Configured LLM provider instance
@@ -153,7 +269,7 @@ class LLMService:
         Raises:
             ValueError: If provider configuration is invalid
         """
-        provider_name = settings.LLM_PROVIDER.lower()
+        provider_name = (provider_name or settings.LLM_PROVIDER).lower()
 
         if provider_name == "openai":
             if not settings.OPENAI_API_KEY:
@@ -175,55 +291,96 @@ class LLMService:
                 f"Supported providers: openai, anthropic"
             )
 
+    async def warm_up(self) -> None:
+        """Pre-open the connection pool of every routed provider"""
+        await asyncio.gather(*(provider.warm_up() for provider in self.providers.values()))
+
     async def generate_completion(
         self,
         prompt: str,
         max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None
+        temperature: Optional[float] = None,
+        user_id: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        action: Optional[str] = None,
+        on_usage: Optional[Callable[[int], None]] = None
     ) -> str:
         """
         Generate a completion with retry logic.
 
         Args:
             prompt: The input prompt
-            max_tokens: Maximum tokens (defaults to settings.LLM_MAX_TOKENS)
-            temperature: Sampling temperature (defaults to settings.LLM_TEMPERATURE)
+            max_tokens: Maximum tokens (defaults to the route's max_tokens)
+            temperature: Sampling temperature (defaults to the route's temperature)
+            user_id: User's UUID for quota enforcement and usage accounting
+            response_schema: Optional JSON schema for structured output
+            action: AI action used to pick the model route (see model_router)
+            on_usage: Receives the tokens used instead of charging them to the
+                user's daily quota, for speculative work that is charged only
+                if the user takes the result (the quota is still checked)
 
         Returns:
             Generated text
 
         Raises:
+            HTTPException 429: If the user's daily token quota is exhausted
             Exception: If all retries fail
         """
-        max_tokens = max_tokens or settings.LLM_MAX_TOKENS
-        temperature = temperature or settings.LLM_TEMPERATURE
+        # Quota check (in-memory after the user's first check of the day)
+        quota = get_quota_service()
+        await quota.check_quota(user_id)
 
         last_error = None
 
         for attempt in range(self.max_retries):
-            try:
-                logger.info(f"🤖 LLM generation attempt {attempt + 1}/{self.max_retries}")
-
-                result = await self.provider.generate_completion(
-                    prompt=prompt,
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
-
-                logger.info(f"✅ LLM generation successful on attempt {attempt + 1}")
-                return result
-
-            except Exception as e:
-                last_error = e
-                logger.warning(
-                    f"⚠️  LLM attempt {attempt + 1} failed: {str(e)}"
-                )
-
-                # Don't sleep after last attempt
-                if attempt < self.max_retries - 1:
-                    delay = self.retry_delays[attempt]
-                    logger.info(f"⏳ Retrying in {delay} seconds...")
-                    await asyncio.sleep(delay)
+            # Resolve per attempt so retries can move to a fallback route
+            route = self.router.resolve(action)
+
+            # Hold an LLM bulkhead slot only while the provider call runs
+            async with get_bulkhead("llm").acquire():
+                started = time.perf_counter()
+                try:
+                    logger.info(
+                        f"🤖 LLM generation attempt {attempt + 1}/{self.max_retries} "
+                        f"({route.name}: {route.provider}/{route.model})"
+                    )
+
+                    with timed("llm"):
+                        result = await self.providers[route.provider].generate_completion(
+                            prompt=prompt,
+                            max_tokens=max_tokens or route.max_tokens,
+                            temperature=route.temperature if temperature is None else temperature,
+                            response_schema=response_schema,
+                            model=route.model
+                        )
+
+                    self.router.record(action, route, (time.perf_counter() - started) * 1000)
+                    logger.info(f"✅ LLM generation successful on attempt {attempt + 1}")
+                    if on_usage is None:
+                        quota.record_usage(user_id, result.total_tokens)
+                    else:
+                        metrics.increment("llm.tokens.uncharged", result.total_tokens)
+                        on_usage(result.total_tokens)
+                    return result.text
+
+                except asyncio.CancelledError:
+                    # Client went away - stop without retrying
+                    metrics.increment("llm.calls.cancelled")
+                    logger.info(f"🛑 LLM generation cancelled on attempt {attempt + 1}")
+                    raise
+
+                except Exception as e:
+                    self.router.record(action, route, (time.perf_counter() - started) * 1000, failed=True)
+                    last_error = e
+                    logger.warning(
+                        f"⚠️  LLM attempt {attempt + 1} failed: {str(e)}"
+                    )
+
+            # Don't sleep after last attempt
+            if attempt < self.max_retries - 1:
+                delay = self.retry_delays[attempt]
+                logger.info(f"⏳ Retrying in {delay} seconds...")
+                await asyncio.sleep(delay)
 
         # All retries failed
         logger.error(f"❌ All {self.max_retries} LLM attempts failed")
@@ -233,18 +390,35 @@ class LLMService:
         )
 
 
-# Singleton instance
+# Singleton instance (or the configuration error that prevented building it)
 _llm_service: Optional[LLMService] = None
+_llm_config_error: Optional[str] = None
 
 
 def get_llm_service() -> LLMService:
     """
     Get or create the global LLM service instance.
 
+    A configuration error (missing API key, unknown provider) is cached on
+    the first attempt, so later calls fail fast instead of rebuilding.
+
     Returns:
         LLM service instance
+
+    Raises:
+        HTTPException 503: If the LLM provider isn't configured
     """
-    global _llm_service
+    global _llm_service, _llm_config_error
     if _llm_service is None:
-        _llm_service = LLMService()
+        if _llm_config_error is None:
+            try:
+                _llm_service = LLMService()
+            except ValueError as e:
+                _llm_config_error = str(e)
+                logger.error(f"❌ LLM service not configured: {_llm_config_error}")
+        if _llm_service is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI service unavailable"
+            )
     return _llm_service
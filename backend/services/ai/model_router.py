@@ -0,0 +1,235 @@
+"""
+Model Router - Per-action model routing with latency SLOs
+
+Each AI action (continue, rephrase, grammar, engagement, shorter) maps to a
+route: provider, model, sampling parameters and a latency SLO. Mechanical
+edits (grammar, shorter) default to the provider's fast tier; creative
+actions use the standard model.
+
+When a route keeps missing its SLO (a configurable share of the recent
+calls is slower than the SLO or failed), it is switched to its fallback
+route for a cooldown period, then the primary route is tried again.
+
+Routes can be overridden per action with LLM_ROUTES in settings, e.g.
+    LLM_ROUTES='{"grammar": {"model": "gpt-4o-mini", "slo_ms": 3000}}'
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Deque, Dict, Optional
+
+from config.settings import settings
+from models.ai import AIAction
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Route used for calls that don't belong to an action
+DEFAULT_ROUTE = "default"
+
+# Model tiers per provider
+MODEL_TIERS: Dict[str, Dict[str, str]] = {
+    "openai": {
+        "standard": "gpt-4o-mini",
+        "fast": "gpt-4.1-nano",
+    },
+    "anthropic": {
+        "standard": "claude-3-5-sonnet-20241022",
+        "fast": "claude-3-5-haiku-20241022",
+    },
+}
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Provider, model and sampling parameters for one action"""
+    name: str
+    provider: str
+    model: str
+    temperature: float
+    max_tokens: int
+    slo_ms: float
+    fallback: Optional["ModelRoute"] = None
+
+
+def _build_default_routes() -> Dict[str, ModelRoute]:
+    """Default routes for the configured LLM_PROVIDER"""
+    provider = settings.LLM_PROVIDER.lower()
+    tiers = MODEL_TIERS.get(provider, MODEL_TIERS["openai"])
+
+    def route(name: str, tier: str, temperature: float, slo_ms: float) -> ModelRoute:
+        fallback = None
+        if tier != "fast":
+            fallback = ModelRoute(
+                name=f"{name}:fallback",
+                provider=provider,
+                model=tiers["fast"],
+                temperature=temperature,
+                max_tokens=settings.LLM_MAX_TOKENS,
+                slo_ms=slo_ms,
+            )
+        return ModelRoute(
+            name=name,
+            provider=provider,
+            model=tiers[tier],
+            temperature=temperature,
+            max_tokens=settings.LLM_MAX_TOKENS,
+            slo_ms=slo_ms,
+            fallback=fallback,
+        )
+
+    return {
+        DEFAULT_ROUTE: route(DEFAULT_ROUTE, "standard", settings.LLM_TEMPERATURE, 10000),
+        AIAction.CONTINUE.value: route(AIAction.CONTINUE.value, "standard", settings.LLM_TEMPERATURE, 12000),
+        AIAction.REPHRASE.value: route(AIAction.REPHRASE.value, "standard", settings.LLM_TEMPERATURE, 10000),
+        AIAction.ENGAGEMENT.value: route(AIAction.ENGAGEMENT.value, "standard", settings.LLM_TEMPERATURE, 12000),
+        AIAction.GRAMMAR.value: route(AIAction.GRAMMAR.value, "fast", 0.2, 5000),
+        AIAction.SHORTER.value: route(AIAction.SHORTER.value, "fast", 0.4, 6000),
+    }
+
+
+def _apply_overrides(routes: Dict[str, ModelRoute]) -> Dict[str, ModelRoute]:
+    """
+    Apply LLM_ROUTES overrides from settings.
+
+    Supported keys per action: provider, model, temperature, max_tokens,
+    slo_ms, fallback_provider, fallback_model (fallback_model=null disables
+    the fallback).
+
+    Raises:
+        ValueError: If an override names an unknown action or key
+    """
+    allowed = {"provider", "model", "temperature", "max_tokens", "slo_ms",
+               "fallback_provider", "fallback_model"}
+
+    for name, override in settings.LLM_ROUTES.items():
+        if name not in routes:
+            raise ValueError(
+                f"Unknown action in LLM_ROUTES: {name}. "
+                f"Valid actions: {', '.join(routes.keys())}"
+            )
+        unknown = set(override) - allowed
+        if unknown:
+            raise ValueError(f"Unknown LLM_ROUTES keys for {name}: {', '.join(sorted(unknown))}")
+
+        base = routes[name]
+        provider = override.get("provider", base.provider).lower()
+        if provider != base.provider and "model" not in override:
+            raise ValueError(f"LLM_ROUTES[{name}]: model is required when changing provider")
+
+        primary = replace(
+            base,
+            provider=provider,
+            model=override.get("model", base.model),
+            temperature=float(override.get("temperature", base.temperature)),
+            max_tokens=int(override.get("max_tokens", base.max_tokens)),
+            slo_ms=float(override.get("slo_ms", base.slo_ms)),
+            fallback=None,
+        )
+
+        if "fallback_model" in override:
+            fallback_model = override["fallback_model"]
+            fallback_provider = override.get("fallback_provider", provider).lower()
+        elif provider != base.provider:
+            fallback_model = MODEL_TIERS.get(provider, {}).get("fast")
+            fallback_provider = provider
+        else:
+            fallback_model = base.fallback.model if base.fallback else None
+            fallback_provider = provider
+
+        fallback = None
+        if fallback_model and fallback_model != primary.model:
+            fallback = replace(
+                primary,
+                name=f"{name}:fallback",
+                provider=fallback_provider,
+                model=fallback_model,
+            )
+
+        routes[name] = replace(primary, fallback=fallback)
+
+    return routes
+
+
+class ModelRouter:
+    """
+    Resolves the route for an action and tracks SLO compliance.
+
+    Usage:
+        router = ModelRouter()
+        route = router.resolve("grammar")
+        ...
+        router.record("grammar", route, latency_ms, failed=False)
+    """
+
+    def __init__(self):
+        """Build routes from defaults and settings overrides"""
+        self.routes = _apply_overrides(_build_default_routes())
+        self.window = settings.LLM_SLO_WINDOW
+        self.miss_ratio = settings.LLM_SLO_MISS_RATIO
+        self.cooldown = settings.LLM_SLO_COOLDOWN
+
+        self._lock = threading.Lock()
+        self._misses: Dict[str, Deque[bool]] = {}
+        self._degraded_until: Dict[str, float] = {}
+
+        for name, route in self.routes.items():
+            logger.info(f"🧭 Route {name}: {route.provider}/{route.model} (SLO {route.slo_ms:.0f}ms)")
+
+    def resolve(self, action: Optional[str] = None) -> ModelRoute:
+        """
+        Get the route to use for an action right now.
+
+        Args:
+            action: AI action name (None uses the default route)
+
+        Returns:
+            Primary route, or its fallback while the primary is degraded
+        """
+        name = action if action in self.routes else DEFAULT_ROUTE
+        route = self.routes[name]
+
+        with self._lock:
+            until = self._degraded_until.get(name)
+            if until is not None:
+                if time.monotonic() < until and route.fallback is not None:
+                    return route.fallback
+                # Cooldown over - give the primary route another chance
+                del self._degraded_until[name]
+
+        return route
+
+    def record(self, action: Optional[str], route: ModelRoute, latency_ms: float, failed: bool = False) -> None:
+        """
+        Record the outcome of a call made on a route.
+
+        Args:
+            action: AI action name used to resolve the route
+            route: Route that served the call
+            latency_ms: Call latency in milliseconds
+            failed: True if the call raised (counts as an SLO miss)
+        """
+        name = action if action in self.routes else DEFAULT_ROUTE
+        missed = failed or latency_ms > route.slo_ms
+        if missed:
+            metrics.increment(f"llm.route.{name}.slo_miss")
+
+        # Only the primary route's health decides fallback
+        if route is not self.routes[name] or route.fallback is None:
+            return
+
+        with self._lock:
+            samples = self._misses.setdefault(name, deque(maxlen=self.window))
+            samples.append(missed)
+
+            if len(samples) == self.window and sum(samples) / self.window >= self.miss_ratio:
+                self._degraded_until[name] = time.monotonic() + self.cooldown
+                samples.clear()
+                metrics.increment(f"llm.route.{name}.fallback")
+                logger.warning(
+                    f"🐢 Route {name} missing its {route.slo_ms:.0f}ms SLO - "
+                    f"using {route.fallback.provider}/{route.fallback.model} for {self.cooldown:.0f}s"
+                )
@@ -0,0 +1,163 @@
+"""
+Speculation Service - Pre-compute "continue writing" after a draft is saved
+
+Users usually ask for a continuation right after saving a draft, and it is
+the slowest AI action. When enabled, saving a post schedules a low-priority
+background task that generates the continuation for the saved text and keeps
+it in a short-TTL cache. A later continue request for the same text returns
+the cached result instantly.
+
+- Saving the draft again cancels the pending speculation for that post
+- Speculation is throttled per user and capped globally
+- Speculative tokens are charged to the user's daily quota only when the
+  result is used; users already over quota get no speculation
+- Failures are silent; the normal request path is the fallback
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config.settings import settings
+from services.cache import TTLCache
+from services.timing import background_context
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculationService:
+    """
+    Service for speculative background continuations.
+
+    Usage:
+        speculation = get_speculation_service()
+        speculation.schedule(user_id, post_id, text, compute)
+        result = speculation.get(user_id, text)  # None if not ready
+    """
+
+    def __init__(self):
+        """Initialize speculation service"""
+        self._cache = TTLCache(max_size=1000, ttl=settings.SPECULATIVE_CONTINUE_TTL)
+        self._tasks: Dict[str, Tuple[str, asyncio.Task]] = {}  # post_id -> (key, task)
+        # Users who started a speculation within the throttle interval
+        self._recent_users = TTLCache(max_size=10000, ttl=settings.SPECULATIVE_CONTINUE_MIN_INTERVAL)
+        self._semaphore = asyncio.Semaphore(settings.SPECULATIVE_CONTINUE_CONCURRENCY)
+
+    def _key(self, user_id: str, text: str) -> str:
+        """Cache key for a user's draft text"""
+        return hashlib.sha256(f"{user_id}\x00{text.strip()}".encode("utf-8")).hexdigest()
+
+    def get(self, user_id: str, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a pre-computed continuation for this exact text.
+
+        Args:
+            user_id: User's UUID
+            text: Current post text
+
+        Returns:
+            Cached {"result", "total_tokens"} or None
+        """
+        return self._cache.get(self._key(user_id, text))
+
+    def cancel(self, post_id: str) -> None:
+        """Cancel pending speculation for a post (draft changed or deleted)"""
+        entry = self._tasks.pop(post_id, None)
+        if entry is not None:
+            entry[1].cancel()
+
+    def schedule(
+        self,
+        user_id: str,
+        post_id: str,
+        text: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> bool:
+        """
+        Schedule a speculative continuation for a saved draft.
+
+        Args:
+            user_id: User's UUID
+            post_id: Post's UUID (one pending speculation per post)
+            text: Saved post text
+            compute: Coroutine factory that generates the continuation
+
+        Returns:
+            True if a background task was started
+        """
+        if not text or not text.strip():
+            self.cancel(post_id)
+            return False
+
+        key = self._key(user_id, text)
+
+        # Same text already being computed for this post - keep it
+        pending = self._tasks.get(post_id)
+        if pending is not None and pending[0] == key and not pending[1].done():
+            return False
+
+        # Draft changed - previous speculation is stale
+        self.cancel(post_id)
+
+        if self._cache.get(key) is not None:
+            return False
+
+        if self._recent_users.get(user_id) is not None:
+            logger.info(f"⏭️  Speculation throttled for user {user_id}")
+            return False
+        self._recent_users.set(user_id, True)
+
+        # Not timed as part of the request that saved the draft
+        task = asyncio.create_task(self._run(post_id, key, compute), context=background_context())
+        self._tasks[post_id] = (key, task)
+        return True
+
+    async def _run(
+        self,
+        post_id: str,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> None:
+        """Debounce, then compute under the global concurrency cap"""
+        try:
+            # Low priority: give live requests (and further edits) a head start
+            await asyncio.sleep(settings.SPECULATIVE_CONTINUE_DELAY)
+            async with self._semaphore:
+                result = await compute()
+            self._cache.set(key, result)
+            logger.info(f"🔮 Speculative continuation ready for post {post_id}")
+        except asyncio.CancelledError:
+            logger.info(f"🛑 Speculative continuation cancelled for post {post_id}")
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️  Speculative continuation failed for post {post_id}: {str(e)}")
+        finally:
+            entry = self._tasks.get(post_id)
+            if entry is not None and entry[0] == key:
+                del self._tasks[post_id]
+
+    async def shutdown(self) -> None:
+        """Cancel all pending speculation"""
+        tasks = [task for _, task in self._tasks.values()]
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Singleton instance
+_speculation_service: Optional[SpeculationService] = None
+
+
+def get_speculation_service() -> SpeculationService:
+    """
+    Get or create the global speculation service instance.
+
+    Returns:
+        Speculation service instance
+    """
+    global _speculation_service
+    if _speculation_service is None:
+        _speculation_service = SpeculationService()
+    return _speculation_service
@@ -0,0 +1,206 @@
+"""
+Bulkheads - Isolate classes of work from each other
+
+Slow AI and image work shares the worker with millisecond CRUD queries.
+Without isolation, a burst of image generations fills the default thread
+pool and delays /posts listing. Each class of work gets its own bulkhead:
+
+- image: DALL-E generation, decoding and storage uploads
+- llm: LLM completions
+- db: Supabase table queries (post and onboarding CRUD)
+
+A bulkhead has a concurrency budget (semaphore), a bounded wait queue
+(requests beyond it are rejected with 503 instead of piling up) and a
+dedicated thread pool for the blocking calls it makes. In-flight and
+queued counts are exported as gauges, rejections and waits as counters.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from config.settings import settings
+from services import metrics
+from services.timing import timed
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Bulkhead:
+    """
+    Concurrency budget, wait queue and thread pool for one class of work.
+
+    Usage:
+        bulkhead = get_bulkhead("db")
+        result = await bulkhead.run(query.execute)
+
+        async with get_bulkhead("llm").acquire():
+            await provider.generate_completion(...)
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_threads: int):
+        """
+        Args:
+            name: Name used in metrics (bulkhead.<name>.*)
+            max_concurrent: Work items allowed to run at once
+            max_queue: Work items allowed to wait for a slot
+            max_threads: Threads for blocking calls made by this work
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix=f"bulkhead-{name}")
+
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._in_flight = 0
+        self._waiting = 0
+
+    def _report(self) -> None:
+        """Export current saturation"""
+        metrics.set_gauge(f"bulkhead.{self.name}.in_flight", self._in_flight)
+        metrics.set_gauge(f"bulkhead.{self.name}.queued", self._waiting)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """
+        Hold one of the bulkhead's slots for the duration of the block.
+
+        Raises:
+            HTTPException 503: If the wait queue is full
+        """
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                metrics.increment(f"bulkhead.{self.name}.rejected")
+                logger.warning(f"🚧 Bulkhead {self.name} full ({self.max_concurrent} running, {self._waiting} waiting)")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is busy. Please try again shortly.",
+                    headers={"Retry-After": "5"}
+                )
+            metrics.increment(f"bulkhead.{self.name}.waited")
+
+        self._waiting += 1
+        self._report()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        self._report()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+            self._report()
+
+    async def offload(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking call on the bulkhead's thread pool without taking a slot.
+
+        For blocking calls made by work that already holds a slot (e.g. a
+        storage upload during an image generation).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Take a slot and run a blocking call on the bulkhead's thread pool"""
+        async with self.acquire():
+            return await self.offload(fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current saturation for monitoring"""
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the bulkhead's threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Bulkhead instances by name
+_bulkheads: Dict[str, Bulkhead] = {}
+
+
+def _build_bulkhead(name: str) -> Bulkhead:
+    """Create a bulkhead with its limits from settings"""
+    if name == "image":
+        return Bulkhead(
+            "image",
+            max_concurrent=settings.BULKHEAD_IMAGE_CONCURRENCY,
+            max_queue=settings.BULKHEAD_IMAGE_QUEUE,
+            max_threads=settings.BULKHEAD_IMAGE_THREADS,
+        )
+    if name == "llm":
+        return Bulkhead(
+            "llm",
+            max_concurrent=settings.BULKHEAD_LLM_CONCURRENCY,
+            max_queue=settings.BULKHEAD_LLM_QUEUE,
+            max_threads=1,  # LLM calls are async; no blocking work
+        )
+    if name == "db":
+        return Bulkhead(
+            "db",
+            max_concurrent=settings.BULKHEAD_DB_CONCURRENCY,
+            max_queue=settings.BULKHEAD_DB_QUEUE,
+            max_threads=settings.BULKHEAD_DB_CONCURRENCY,
+        )
+    raise ValueError(f"Unknown bulkhead: {name}. Valid bulkheads: image, llm, db")
+
+
+def get_bulkhead(name: str) -> Bulkhead:
+    """
+    Get or create a bulkhead by name.
+
+    Args:
+        name: "image", "llm" or "db"
+
+    Returns:
+        Bulkhead instance
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    bulkhead = _bulkheads.get(name)
+    if bulkhead is None:
+        bulkhead = _bulkheads[name] = _build_bulkhead(name)
+    return bulkhead
+
+
+def get_bulkhead_stats() -> Dict[str, Dict[str, Any]]:
+    """Saturation of every bulkhead created so far"""
+    return {name: bulkhead.stats() for name, bulkhead in _bulkheads.items()}
+
+
+def shutdown_bulkheads() -> None:
+    """Stop all bulkhead thread pools"""
+    for bulkhead in _bulkheads.values():
+        bulkhead.shutdown()
+    _bulkheads.clear()
+
+
+async def run_query(query: Any) -> Any:
+    """
+    Execute a Supabase query builder in the db bulkhead.
+
+    Args:
+        query: Query builder (e.g. supabase.table(...).select(...))
+
+    Returns:
+        Query response
+    """
+    with timed("db"):
+        return await get_bulkhead("db").run(query.execute)
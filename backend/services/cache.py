@@ -0,0 +1,113 @@
+"""
+In-process cache - Bounded LRU cache with optional per-entry TTL
+
+Used by services that keep small amounts of hot data in memory
+(e.g. per-paragraph grammar corrections). Thread-safe, so it can be
+shared between the event loop and worker threads.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU cache where entries may expire after a TTL.
+
+    Usage:
+        cache = TTLCache(max_size=1000, ttl=3600)
+        cache.set("key", value)
+        value = cache.get("key")  # None if missing or expired
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: Maximum number of entries (least recently used are evicted)
+            ttl: Default time-to-live in seconds (None = no expiry)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time-to-live in seconds (defaults to the cache's ttl)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value without counting a hit/miss or refreshing its LRU position"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            return default
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a value (expired entries count as missing)"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            return default
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
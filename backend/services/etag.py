@@ -0,0 +1,83 @@
+"""
+ETags - Conditional GET support for polled resources
+
+The mobile app re-fetches the post list, open posts and the brand blueprint
+whenever a screen gains focus. ETags let it send If-None-Match and get an
+empty 304 when nothing changed.
+
+ETags are derived from each row's (id, updated_at), plus any parameters
+that shape the response (status filter, limit). Services can check them
+against a projection query that only selects those columns, which is far
+cheaper than fetching and serializing full rows.
+
+ETags are weak (W/"..."): the same tag is sent whether the compression
+middleware returns the body as Brotli, gzip or identity, which a strong
+ETag must not do. Responses vary on Accept-Encoding, 304s included.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Response, status
+
+from services import metrics
+
+# Clients may cache, but must revalidate every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(rows: Iterable[Dict[str, Any]], *params: Any) -> str:
+    """
+    Weak ETag for a set of rows.
+
+    Args:
+        rows: Rows with at least id and updated_at (in response order)
+        *params: Request parameters that change the response
+
+    Returns:
+        Weak ETag value (W/"...")
+    """
+    digest = hashlib.sha256()
+    for param in params:
+        digest.update(f"{param}\x1f".encode("utf-8"))
+    for row in rows:
+        digest.update(f"{row.get('id')}\x1e{row.get('updated_at')}\x1f".encode("utf-8"))
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    True if an If-None-Match header matches the ETag.
+
+    Uses weak comparison (RFC 9110): W/ prefixes are ignored on both sides.
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str, label: str) -> Response:
+    """
+    Empty 304 response for a matched ETag.
+
+    Args:
+        etag: The current ETag
+        label: Resource name for metrics (e.g. "posts")
+    """
+    metrics.increment(f"etag.{label}.not_modified")
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach the ETag and revalidation headers to a full response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
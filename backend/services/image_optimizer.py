@@ -0,0 +1,165 @@
+"""
+Image Optimizer - Transcode images into web-friendly variants
+
+DALL-E PNGs are 1-3MB and user uploads are stored as sent, while the mobile
+feed only needs small previews. After an image is stored, the optimizer
+produces:
+- large: 1200px wide WebP (LinkedIn post width)
+- large_jpeg: 1200px wide JPEG (for clients without WebP)
+- thumb: 400px wide WebP (feed previews)
+
+Metadata (EXIF, ICC comments, etc.) is stripped and orientation is applied.
+Decoding and encoding are CPU-bound, so they run in a process pool instead
+of on the event loop.
+"""
+
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    """Target size and encoding for one optimized variant"""
+    name: str
+    max_width: int
+    format: str  # Pillow format name
+    quality: int
+    content_type: str
+    extension: str
+
+
+VARIANTS: List[ImageVariant] = [
+    ImageVariant("large", 1200, "WEBP", 82, "image/webp", "webp"),
+    ImageVariant("large_jpeg", 1200, "JPEG", 85, "image/jpeg", "jpg"),
+    ImageVariant("thumb", 400, "WEBP", 75, "image/webp", "webp"),
+]
+
+
+def _transcode(data: bytes, variants: List[ImageVariant]) -> Dict[str, Tuple[bytes, str, str]]:
+    """
+    Decode an image once and encode every variant (runs in a worker process).
+
+    Args:
+        data: Original image bytes
+        variants: Variants to produce
+
+    Returns:
+        Dict of variant name -> (bytes, content_type, extension)
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+
+        # Flatten transparency onto white; JPEG has no alpha and the feed is opaque
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        results = {}
+        for variant in variants:
+            resized = image
+            if image.width > variant.max_width:
+                height = round(image.height * variant.max_width / image.width)
+                resized = image.resize((variant.max_width, height), Image.LANCZOS)
+
+            # Saving a fresh pixel buffer without exif/icc args drops metadata
+            output = io.BytesIO()
+            resized.save(output, format=variant.format, quality=variant.quality, optimize=True)
+            results[variant.name] = (output.getvalue(), variant.content_type, variant.extension)
+
+    return results
+
+
+class ImageOptimizer:
+    """
+    Produce optimized image variants in a process pool.
+
+    Usage:
+        optimizer = ImageOptimizer()
+        variants = await optimizer.optimize(image_bytes)
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Args:
+            max_workers: Worker processes for transcoding
+
+        Raises:
+            ImportError: If Pillow is not installed
+        """
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise ImportError("Pillow package not installed. Run: pip install Pillow>=10.0.0")
+
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def optimize(
+        self,
+        data: bytes,
+        variants: Optional[List[ImageVariant]] = None
+    ) -> Dict[str, Tuple[bytes, str, str]]:
+        """
+        Transcode an image into its variants off the event loop.
+
+        Args:
+            data: Original image bytes
+            variants: Variants to produce (defaults to VARIANTS)
+
+        Returns:
+            Dict of variant name -> (bytes, content_type, extension)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _transcode, data, variants or VARIANTS)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+_image_optimizer: Optional[ImageOptimizer] = None
+
+
+def get_image_optimizer() -> ImageOptimizer:
+    """
+    Get or create the global image optimizer instance.
+
+    Returns:
+        Image optimizer instance
+
+    Raises:
+        ImportError: If Pillow is not installed
+    """
+    global _image_optimizer
+    if _image_optimizer is None:
+        _image_optimizer = ImageOptimizer(max_workers=settings.IMAGE_OPTIMIZE_WORKERS)
+    return _image_optimizer
+
+
+def shutdown_image_optimizer() -> None:
+    """Stop the optimizer's process pool if it was started"""
+    if _image_optimizer is not None:
+        _image_optimizer.shutdown()
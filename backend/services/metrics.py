@@ -0,0 +1,59 @@
+"""
+Metrics - Lightweight in-process counters and gauges
+
+Services record operational counters here (e.g. AI response parse
+failures) and the /metrics endpoint exposes a snapshot. Values are
+per worker process and reset on restart.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, Any
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, float] = {}
+
+
+def increment(name: str, value: float = 1) -> None:
+    """
+    Increment a counter.
+
+    Args:
+        name: Dotted metric name (e.g. "ai.parse.failed")
+        value: Amount to add
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """
+    Set a gauge to its current value.
+
+    Args:
+        name: Dotted metric name (e.g. "bulkhead.llm.in_flight")
+        value: Current value
+    """
+    with _lock:
+        _gauges[name] = value
+
+
+def get_counter(name: str) -> float:
+    """Current value of a counter (0 if never incremented)"""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Get a copy of all metrics.
+
+    Returns:
+        Dict with counters and gauges
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+        }
@@ -1,8 +1,10 @@
 from fastapi import HTTPException, status
 from database import supabase
+from services.bulkhead import run_query
+from services.etag import compute_etag
 from models.brand_blueprint import BrandBlueprintCreate, BrandBlueprintUpdate
 from config.settings import settings
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 from datetime import datetime
 
@@ -30,6 +32,26 @@ def _parse_posting_frequency(frequency_str: str) -> int:
         return int(match.group(1)) if match else 3
 
 
+def _map_blueprint_row(blueprint: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a sparkle_brand_blueprints row to the API format"""
+    return {
+        "id": blueprint.get("id"),
+        "user_id": blueprint.get("user_id"),
+        "topics": blueprint.get("topics", []),
+        "main_goal": blueprint.get("goal"),  # Map goal -> main_goal
+        "inspirations": blueprint.get("inspiration_sources", []),  # Map inspiration_sources -> inspirations
+        "tone": blueprint.get("tone"),
+        "posting_preferences": {
+            "preferred_days": blueprint.get("preferred_days", []),
+            "preferred_hours": [int(blueprint.get("best_time_to_post", "14:00:00").split(":")[0])] if blueprint.get("best_time_to_post") else [14],
+            "posts_per_week": _parse_posting_frequency(blueprint.get("posting_frequency", "3x/week")),
+            "ask_before_publish": blueprint.get("ask_before_publish", True),
+        },
+        "created_at": blueprint.get("created_at"),
+        "updated_at": blueprint.get("updated_at"),
+    }
+
+
 async def create_brand_blueprint(user_id: str, data: BrandBlueprintCreate) -> Dict[str, Any]:
     """
     Create a new brand blueprint for a user during onboarding.
@@ -52,7 +74,7 @@ async def create_brand_blueprint(user_id: str, data: BrandBlueprintCreate) -> Di
     # This allows testing database integration while using simple mock auth
     try:
         # Check if blueprint already exists
-        existing = supabase.table("sparkle_brand_blueprints").select("id").eq("user_id", user_id).execute()
+        existing = await run_query(supabase.table("sparkle_brand_blueprints").select("id").eq("user_id", user_id))
 
         if existing.data and len(existing.data) > 0:
             raise HTTPException(
@@ -93,7 +115,7 @@ async def create_brand_blueprint(user_id: str, data: BrandBlueprintCreate) -> Di
         }
 
         # Insert brand blueprint
-        result = supabase.table("sparkle_brand_blueprints").insert(blueprint_data).execute()
+        result = await run_query(supabase.table("sparkle_brand_blueprints").insert(blueprint_data))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -102,7 +124,7 @@ async def create_brand_blueprint(user_id: str, data: BrandBlueprintCreate) -> Di
             )
 
         logger.info(f"✅ Created brand blueprint for user {user_id}")
-        return result.data[0]
+        return _map_blueprint_row(result.data[0])
 
     except HTTPException:
         raise
@@ -132,7 +154,7 @@ async def get_brand_blueprint(user_id: str) -> Dict[str, Any]:
     # REAL DATABASE MODE (Always enabled for onboarding data)
     # ==============================================================================
     try:
-        result = supabase.table("sparkle_brand_blueprints").select("*").eq("user_id", user_id).execute()
+        result = await run_query(supabase.table("sparkle_brand_blueprints").select("*").eq("user_id", user_id))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -141,27 +163,7 @@ async def get_brand_blueprint(user_id: str) -> Dict[str, Any]:
             )
 
         # Map database columns back to our API model
-        blueprint = result.data[0]
-
-        # Convert database format to API format
-        mapped_blueprint = {
-            "id": blueprint.get("id"),
-            "user_id": blueprint.get("user_id"),
-            "topics": blueprint.get("topics", []),
-            "main_goal": blueprint.get("goal"),  # Map goal -> main_goal
-            "inspirations": blueprint.get("inspiration_sources", []),  # Map inspiration_sources -> inspirations
-            "tone": blueprint.get("tone"),
-            "posting_preferences": {
-                "preferred_days": blueprint.get("preferred_days", []),
-                "preferred_hours": [int(blueprint.get("best_time_to_post", "14:00:00").split(":")[0])] if blueprint.get("best_time_to_post") else [14],
-                "posts_per_week": _parse_posting_frequency(blueprint.get("posting_frequency", "3x/week")),
-                "ask_before_publish": blueprint.get("ask_before_publish", True),
-            },
-            "created_at": blueprint.get("created_at"),
-            "updated_at": blueprint.get("updated_at"),
-        }
-
-        return mapped_blueprint
+        return _map_blueprint_row(result.data[0])
 
     except HTTPException:
         raise
@@ -173,6 +175,28 @@ async def get_brand_blueprint(user_id: str) -> Dict[str, Any]:
         )
 
 
+async def get_brand_blueprint_etag(user_id: str) -> Optional[str]:
+    """
+    Current ETag of the user's brand blueprint, from an (id, updated_at) projection.
+
+    Args:
+        user_id: User's UUID
+
+    Returns:
+        ETag, or None if there is no blueprint or the query failed
+    """
+    try:
+        result = await run_query(supabase.table("sparkle_brand_blueprints").select("id, updated_at").eq("user_id", user_id))
+        if not result.data:
+            return None
+        return compute_etag(result.data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"⚠️  Could not compute brand blueprint ETag: {str(e)}")
+        return None
+
+
 async def update_brand_blueprint(user_id: str, data: BrandBlueprintUpdate) -> Dict[str, Any]:
     """
     Update user's brand blueprint (partial update).
@@ -195,7 +219,7 @@ async def update_brand_blueprint(user_id: str, data: BrandBlueprintUpdate) -> Di
     # This allows testing database integration while using simple mock auth
     try:
         # Check if blueprint exists
-        existing = supabase.table("sparkle_brand_blueprints").select("id").eq("user_id", user_id).execute()
+        existing = await run_query(supabase.table("sparkle_brand_blueprints").select("id").eq("user_id", user_id))
 
         if not existing.data or len(existing.data) == 0:
             raise HTTPException(
@@ -240,7 +264,7 @@ async def update_brand_blueprint(user_id: str, data: BrandBlueprintUpdate) -> Di
                 update_data["ask_before_publish"] = prefs.ask_before_publish
 
         # Update the blueprint
-        result = supabase.table("sparkle_brand_blueprints").update(update_data).eq("user_id", user_id).execute()
+        result = await run_query(supabase.table("sparkle_brand_blueprints").update(update_data).eq("user_id", user_id))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -249,7 +273,7 @@ async def update_brand_blueprint(user_id: str, data: BrandBlueprintUpdate) -> Di
             )
 
         logger.info(f"✅ Updated brand blueprint for user {user_id}")
-        return result.data[0]
+        return _map_blueprint_row(result.data[0])
 
     except HTTPException:
         raise
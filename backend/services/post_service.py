@@ -1,5 +1,7 @@
 from fastapi import HTTPException, status
 from database import supabase
+from services.bulkhead import run_query
+from services.etag import compute_etag
 from models.post import PostCreate, PostUpdate, PostStatus
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
@@ -24,7 +26,7 @@ async def _verify_post_ownership(user_id: str, post_id: str) -> Dict[str, Any]:
         HTTPException 403: If user doesn't own the post
     """
     try:
-        result = supabase.table("sparkle_posts").select("*").eq("id", post_id).execute()
+        result = await run_query(supabase.table("sparkle_posts").select("*").eq("id", post_id))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -71,7 +73,7 @@ async def create_post(user_id: str, data: PostCreate) -> Dict[str, Any]:
         post_data["user_id"] = user_id
         post_data["status"] = PostStatus.DRAFT.value  # New posts start as draft
 
-        result = supabase.table("sparkle_posts").insert(post_data).execute()
+        result = await run_query(supabase.table("sparkle_posts").insert(post_data))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -92,6 +94,71 @@ async def create_post(user_id: str, data: PostCreate) -> Dict[str, Any]:
         )
 
 
+def _posts_query(columns: str, user_id: str, status_filter: Optional[str], limit: int):
+    """Query for the user's posts, newest first (shared by the list and its ETag)"""
+    query = supabase.table("sparkle_posts").select(columns).eq("user_id", user_id)
+
+    # Apply status filter if provided
+    if status_filter:
+        query = query.eq("status", status_filter)
+
+    # Order by created_at descending and limit
+    return query.order("created_at", desc=True).limit(limit)
+
+
+def posts_etag(posts: List[Dict[str, Any]], status_filter: Optional[str], limit: int) -> str:
+    """ETag of a post list response"""
+    return compute_etag(posts, status_filter, limit)
+
+
+async def get_posts_etag(user_id: str, status_filter: Optional[str] = None, limit: int = 50) -> Optional[str]:
+    """
+    Current ETag of the user's post list, from an (id, updated_at) projection.
+
+    Args:
+        user_id: User's UUID
+        status_filter: Optional status filter (draft/scheduled/published)
+        limit: Maximum number of posts in the list
+
+    Returns:
+        ETag, or None if it couldn't be computed (fall back to a full fetch)
+    """
+    try:
+        result = await run_query(_posts_query("id, updated_at", user_id, status_filter, limit))
+        return posts_etag(result.data or [], status_filter, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"⚠️  Could not compute posts ETag: {str(e)}")
+        return None
+
+
+async def get_post_etag(user_id: str, post_id: str) -> Optional[str]:
+    """
+    Current ETag of a post owned by the user, from an (id, updated_at) projection.
+
+    Args:
+        user_id: User's UUID
+        post_id: Post's UUID
+
+    Returns:
+        ETag, or None if the post is missing, not owned by the user or the
+        query failed (the full fetch then reports the error)
+    """
+    try:
+        result = await run_query(
+            supabase.table("sparkle_posts").select("id, user_id, updated_at").eq("id", post_id)
+        )
+        if not result.data or result.data[0]["user_id"] != user_id:
+            return None
+        return compute_etag(result.data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"⚠️  Could not compute post ETag: {str(e)}")
+        return None
+
+
 async def get_posts(
     user_id: str,
     status_filter: Optional[str] = None,
@@ -112,14 +179,7 @@ async def get_posts(
         HTTPException 500: If database error occurs
     """
     try:
-        query = supabase.table("sparkle_posts").select("*").eq("user_id", user_id)
-
-        # Apply status filter if provided
-        if status_filter:
-            query = query.eq("status", status_filter)
-
-        # Order by created_at descending and limit
-        result = query.order("created_at", desc=True).limit(limit).execute()
+        result = await run_query(_posts_query("*", user_id, status_filter, limit))
 
         posts = result.data if result.data else []
 
@@ -129,6 +189,8 @@ async def get_posts(
             "filter": status_filter
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error getting posts: {str(e)}")
         raise HTTPException(
@@ -190,7 +252,7 @@ async def update_post(user_id: str, post_id: str, data: PostUpdate) -> Dict[str,
             )
 
         # Update the post
-        result = supabase.table("sparkle_posts").update(update_data).eq("id", post_id).execute()
+        result = await run_query(supabase.table("sparkle_posts").update(update_data).eq("id", post_id))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -232,7 +294,7 @@ async def delete_post(user_id: str, post_id: str) -> Dict[str, Any]:
         await _verify_post_ownership(user_id, post_id)
 
         # Delete the post
-        result = supabase.table("sparkle_posts").delete().eq("id", post_id).execute()
+        result = await run_query(supabase.table("sparkle_posts").delete().eq("id", post_id))
 
         logger.info(f"✅ Deleted post {post_id}")
         return {"deleted": True, "post_id": post_id}
@@ -288,7 +350,7 @@ async def schedule_post(user_id: str, post_id: str, scheduled_for: datetime) ->
             "scheduled_for": scheduled_for.isoformat()
         }
 
-        result = supabase.table("sparkle_posts").update(update_data).eq("id", post_id).execute()
+        result = await run_query(supabase.table("sparkle_posts").update(update_data).eq("id", post_id))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
@@ -338,7 +400,7 @@ async def publish_post(user_id: str, post_id: str) -> Dict[str, Any]:
             "published_at": datetime.now(timezone.utc).isoformat()
         }
 
-        result = supabase.table("sparkle_posts").update(update_data).eq("id", post_id).execute()
+        result = await run_query(supabase.table("sparkle_posts").update(update_data).eq("id", post_id))
 
         if not result.data or len(result.data) == 0:
             raise HTTPException(
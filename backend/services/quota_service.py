@@ -0,0 +1,281 @@
+"""
+Quota Service - Per-user daily LLM token quotas
+
+Token usage is accounted in memory so quota checks never hit the database:
+1. LLM calls report provider token usage via record_usage()
+2. check_quota() compares the in-memory daily total against the limit
+3. A background task flushes accumulated deltas to sparkle_token_usage
+   in one batched RPC call and re-syncs totals from the database
+
+The first check for a user on a given day loads their persisted total, so
+a fresh or restarted worker doesn't grant a full quota on top of usage
+already recorded. After that, totals written by other workers are picked
+up on the next flush, so enforcement may lag by at most one flush interval.
+"""
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, date
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import HTTPException, status
+
+from database import supabase
+from config.settings import settings
+from services.bulkhead import run_query
+
+logger = logging.getLogger(__name__)
+
+# Postgres function created by migrations/07_create_token_usage_table.sql
+INCREMENT_USAGE_RPC = "sparkle_increment_token_usage"
+
+
+@dataclass
+class _UsageCounter:
+    """In-memory usage for one user on one UTC day"""
+    persisted_tokens: int = 0  # Last known database total
+    pending_tokens: int = 0  # Not yet flushed
+    pending_requests: int = 0
+    loaded: bool = False  # persisted_tokens reflects the database
+
+    @property
+    def total_tokens(self) -> int:
+        return self.persisted_tokens + self.pending_tokens
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _seconds_until_reset() -> int:
+    """Seconds until the next UTC midnight (when daily quotas reset)"""
+    now = datetime.now(timezone.utc)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    return max(1, int((tomorrow - now).total_seconds()))
+
+
+class QuotaService:
+    """
+    Service for enforcing per-user daily token quotas.
+
+    Usage:
+        quota = get_quota_service()
+        await quota.check_quota(user_id)     # Raises 429 if over quota
+        quota.record_usage(user_id, tokens)  # After each LLM call
+    """
+
+    def __init__(self):
+        """Initialize quota service"""
+        self.daily_limit = settings.DAILY_TOKEN_QUOTA
+        self.flush_interval = settings.USAGE_FLUSH_INTERVAL
+        self._counters: Dict[Tuple[str, date], _UsageCounter] = {}
+        self._lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        logger.info(
+            f"✅ Quota service initialized (daily limit: {self.daily_limit or 'unlimited'} tokens)"
+        )
+
+    def get_usage(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get the user's token usage for today.
+
+        Args:
+            user_id: User's UUID
+
+        Returns:
+            Dict with tokens_used, daily_limit and remaining
+        """
+        with self._lock:
+            counter = self._counters.get((user_id, _today()))
+            used = counter.total_tokens if counter else 0
+
+        remaining = max(0, self.daily_limit - used) if self.daily_limit else None
+        return {
+            "tokens_used": used,
+            "daily_limit": self.daily_limit or None,
+            "remaining": remaining,
+        }
+
+    async def _load_persisted(self, user_id: str, usage_date: date) -> None:
+        """
+        Load the user's persisted total for the day into their counter.
+
+        Failures are logged and retried on the next check (fail open).
+        """
+        try:
+            result = await run_query(
+                supabase.table("sparkle_token_usage")
+                .select("tokens_used")
+                .eq("user_id", user_id)
+                .eq("usage_date", usage_date.isoformat())
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load token usage for user {user_id}: {str(e)}")
+            return
+
+        tokens_used = int(result.data[0]["tokens_used"]) if result.data else 0
+        with self._lock:
+            counter = self._counters.setdefault((user_id, usage_date), _UsageCounter())
+            # A flush that finished meanwhile already synced a newer total
+            if not counter.loaded:
+                counter.persisted_tokens = tokens_used
+                counter.loaded = True
+
+    async def check_quota(self, user_id: Optional[str]) -> None:
+        """
+        Verify the user still has quota left today.
+
+        Only the first check for a user each day reads the database (to load
+        usage recorded by earlier or other workers); later checks are in-memory.
+
+        Args:
+            user_id: User's UUID (None skips the check)
+
+        Raises:
+            HTTPException 429: If the daily token quota is exhausted
+        """
+        if not user_id or self.daily_limit <= 0:
+            return
+
+        key = (user_id, _today())
+        with self._lock:
+            counter = self._counters.get(key)
+            loaded = counter is not None and counter.loaded
+
+        if not loaded:
+            await self._load_persisted(*key)
+
+        with self._lock:
+            counter = self._counters.get(key)
+            used = counter.total_tokens if counter else 0
+
+        if used >= self.daily_limit:
+            logger.warning(f"🚫 Token quota exceeded for user {user_id} ({used}/{self.daily_limit})")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Daily AI usage limit reached. Please try again tomorrow.",
+                headers={"Retry-After": str(_seconds_until_reset())},
+            )
+
+    def record_usage(self, user_id: Optional[str], tokens: int) -> None:
+        """
+        Add tokens consumed by an LLM call to the user's daily counter.
+
+        Args:
+            user_id: User's UUID (None is ignored)
+            tokens: Total tokens reported by the provider
+        """
+        if not user_id or tokens <= 0:
+            return
+
+        with self._lock:
+            counter = self._counters.setdefault((user_id, _today()), _UsageCounter())
+            counter.pending_tokens += tokens
+            counter.pending_requests += 1
+
+    def _take_pending(self) -> List[Dict[str, Any]]:
+        """Move pending deltas out of the counters and build RPC rows"""
+        rows = []
+        today = _today()
+
+        with self._lock:
+            for (user_id, usage_date), counter in list(self._counters.items()):
+                if counter.pending_tokens or counter.pending_requests:
+                    rows.append({
+                        "user_id": user_id,
+                        "usage_date": usage_date.isoformat(),
+                        "tokens": counter.pending_tokens,
+                        "requests": counter.pending_requests,
+                    })
+                    # Count the delta as persisted until the DB confirms the total
+                    counter.persisted_tokens += counter.pending_tokens
+                    counter.pending_tokens = 0
+                    counter.pending_requests = 0
+                elif usage_date < today:
+                    # Previous days are fully flushed - drop them
+                    del self._counters[(user_id, usage_date)]
+
+        return rows
+
+    def _restore_pending(self, rows: List[Dict[str, Any]]) -> None:
+        """Put deltas back after a failed flush so they are retried"""
+        with self._lock:
+            for row in rows:
+                key = (row["user_id"], date.fromisoformat(row["usage_date"]))
+                counter = self._counters.setdefault(key, _UsageCounter())
+                counter.persisted_tokens -= row["tokens"]
+                counter.pending_tokens += row["tokens"]
+                counter.pending_requests += row["requests"]
+
+    async def flush(self) -> int:
+        """
+        Persist pending usage in a single batched RPC call.
+
+        Returns:
+            Number of user/day rows flushed
+        """
+        rows = self._take_pending()
+        if not rows:
+            return 0
+
+        try:
+            result = await asyncio.to_thread(
+                lambda: supabase.rpc(INCREMENT_USAGE_RPC, {"p_rows": rows}).execute()
+            )
+        except Exception as e:
+            logger.error(f"❌ Token usage flush failed ({len(rows)} rows): {str(e)}")
+            self._restore_pending(rows)
+            return 0
+
+        # Re-sync with database totals (includes usage from other workers)
+        with self._lock:
+            for row in result.data or []:
+                key = (row["user_id"], date.fromisoformat(row["usage_date"]))
+                counter = self._counters.get(key)
+                if counter:
+                    counter.persisted_tokens = int(row["tokens_used"])
+                    counter.loaded = True
+
+        logger.info(f"📊 Flushed token usage for {len(rows)} user(s)")
+        return len(rows)
+
+    async def _flush_loop(self) -> None:
+        """Flush usage on a fixed interval until cancelled"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background flush task (call from the running event loop)"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            logger.info(f"⏱️  Token usage flush every {self.flush_interval}s")
+
+    async def stop(self) -> None:
+        """Stop the background flush task and persist remaining usage"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+# Singleton instance
+_quota_service: Optional[QuotaService] = None
+
+
+def get_quota_service() -> QuotaService:
+    """
+    Get or create the global quota service instance.
+
+    Returns:
+        Quota service instance
+    """
+    global _quota_service
+    if _quota_service is None:
+        _quota_service = QuotaService()
+    return _quota_service
@@ -0,0 +1,325 @@
+"""
+Rate Limiter - Token-bucket limits per client and route
+
+Expensive endpoints (AI assist, DALL-E generation, uploads) get their own
+limits; every other /api route shares a default per-client budget. Each
+(client, rule) pair has a token bucket: `capacity` requests may burst, and
+tokens refill continuously at capacity / period per second.
+
+Two backends:
+- InMemoryRateLimitBackend: per-process buckets in a bounded LRU dict
+  (single worker or development)
+- RedisRateLimitBackend: buckets shared by all workers, updated atomically
+  by a Lua script (RATE_LIMIT_BACKEND=redis, needs REDIS_URL)
+
+Both do O(1) work per check. If the shared backend is unreachable the
+request is allowed (fail open) so a Redis outage doesn't take the API down.
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds per period name accepted in limit specs ("20/minute")
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+# Name of the rule applied to routes without their own limit
+DEFAULT_RULE = "default"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket parameters: `capacity` requests per `period` seconds"""
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second"""
+        return self.capacity / self.period
+
+
+def parse_rate_limit(spec: str) -> RateLimit:
+    """
+    Parse a limit spec such as "20/minute" or "5/hour".
+
+    Args:
+        spec: "<count>/<second|minute|hour|day>"
+
+    Returns:
+        RateLimit
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    try:
+        count, period = spec.strip().split("/")
+        capacity = int(count)
+        seconds = PERIODS[period.strip().lower()]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {spec!r}. Expected e.g. '20/minute'")
+    if capacity < 1:
+        raise ValueError(f"Invalid rate limit: {spec!r}. Count must be at least 1")
+    return RateLimit(capacity=capacity, period=seconds)
+
+
+class BaseRateLimitBackend(ABC):
+    """Storage for token buckets"""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        """
+        Take one token from the bucket.
+
+        Args:
+            key: Bucket key (client and rule)
+            limit: Bucket parameters
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until a token is available
+        """
+
+    async def close(self) -> None:
+        """Release backend connections"""
+
+
+class InMemoryRateLimitBackend(BaseRateLimitBackend):
+    """
+    Per-process token buckets.
+
+    Buckets live in an LRU-ordered dict capped at max_keys; evicting the
+    least recently used bucket only forgets a client that has been idle
+    the longest. Only touched from the event loop, so no lock is needed.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        """
+        Args:
+            max_keys: Maximum number of buckets kept
+        """
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            self._buckets[key] = [limit.capacity - 1.0, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+        self._buckets.move_to_end(key)
+        tokens = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+
+        bucket[0] = tokens
+        return (1.0 - tokens) / limit.rate
+
+
+# Refill and take a token atomically. Returns the wait in seconds as a
+# string (Lua numbers are truncated to integers in Redis replies).
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend(BaseRateLimitBackend):
+    """
+    Token buckets shared between workers in Redis.
+
+    Works with any client exposing redis-py's asyncio register_script API
+    (redis.asyncio.Redis, or a stand-in such as fakeredis for local runs).
+    Buckets expire once they would be full again.
+    """
+
+    def __init__(self, client: Any, prefix: str = "sparkle:ratelimit:"):
+        """
+        Args:
+            client: redis.asyncio-compatible client
+            prefix: Key prefix for the buckets
+        """
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        """
+        Connect to Redis by URL.
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        try:
+            from redis.asyncio import Redis
+        except ImportError:
+            raise ImportError("redis package not installed. Run: pip install redis>=5.0.0")
+        return cls(Redis.from_url(url))
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        # Wall clock, so every worker measures refill against the same time
+        wait = await self._script(
+            keys=[self.prefix + key],
+            args=[limit.capacity, limit.rate, time.time()]
+        )
+        return float(wait)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """
+    Match requests to rules and check them against the backend.
+
+    Usage:
+        limiter = get_rate_limiter()
+        retry_after = await limiter.check(client_key, "POST", "/api/v1/posts/ai-assist")
+    """
+
+    def __init__(
+        self,
+        backend: BaseRateLimitBackend,
+        routes: Dict[str, str],
+        default: Optional[str] = None,
+        default_prefix: str = "/api/"
+    ):
+        """
+        Args:
+            backend: Bucket storage
+            routes: Limit spec per "METHOD /path" (exact path match)
+            default: Limit spec for other paths under default_prefix (None = unlimited)
+            default_prefix: Paths the default limit applies to
+
+        Raises:
+            ValueError: If a route key or limit spec is malformed
+        """
+        self.backend = backend
+        self.default_prefix = default_prefix
+        self.default = parse_rate_limit(default) if default else None
+
+        self.routes: Dict[Tuple[str, str], Tuple[str, RateLimit]] = {}
+        for route, spec in routes.items():
+            try:
+                method, path = route.split()
+            except ValueError:
+                raise ValueError(f"Invalid rate limit route: {route!r}. Expected e.g. 'POST /api/v1/posts/ai-assist'")
+            self.routes[(method.upper(), path)] = (route, parse_rate_limit(spec))
+
+    def rule_for(self, method: str, path: str) -> Optional[Tuple[str, RateLimit]]:
+        """Rule name and limit for a request (None if it isn't limited)"""
+        rule = self.routes.get((method, path))
+        if rule is not None:
+            return rule
+        if self.default is not None and path.startswith(self.default_prefix):
+            return DEFAULT_RULE, self.default
+        return None
+
+    async def check(self, client_key: str, method: str, path: str) -> float:
+        """
+        Count a request against its rule.
+
+        Args:
+            client_key: Identifies the caller (verified user id, token hash or IP)
+            method: HTTP method
+            path: Request path
+
+        Returns:
+            0 if allowed, otherwise seconds the client should wait
+        """
+        rule = self.rule_for(method, path)
+        if rule is None:
+            return 0.0
+
+        name, limit = rule
+        try:
+            retry_after = await self.backend.hit(f"{client_key}:{name}", limit)
+        except Exception as e:
+            metrics.increment("rate_limit.backend_errors")
+            logger.warning(f"⚠️  Rate limit backend error, allowing request: {str(e)}")
+            return 0.0
+
+        if retry_after > 0:
+            metrics.increment(f"rate_limit.rejected.{name}")
+        return retry_after
+
+    async def close(self) -> None:
+        """Release backend connections"""
+        await self.backend.close()
+
+
+# Singleton instance
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def _build_backend() -> BaseRateLimitBackend:
+    """Create the backend selected by RATE_LIMIT_BACKEND"""
+    backend = settings.RATE_LIMIT_BACKEND.lower()
+    if backend == "memory":
+        return InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if backend == "redis":
+        if not settings.REDIS_URL:
+            raise ValueError("REDIS_URL not configured. Required when RATE_LIMIT_BACKEND=redis")
+        return RedisRateLimitBackend.from_url(settings.REDIS_URL)
+    raise ValueError(f"Unsupported rate limit backend: {backend}. Supported backends: memory, redis")
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get or create the global rate limiter instance.
+
+    Returns:
+        Rate limiter instance
+
+    Raises:
+        ValueError: If the backend or a limit spec is misconfigured
+        ImportError: If RATE_LIMIT_BACKEND=redis and redis is not installed
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(
+            backend=_build_backend(),
+            routes=settings.RATE_LIMIT_ROUTES,
+            default=settings.RATE_LIMIT_DEFAULT or None,
+        )
+        logger.info(f"✅ Rate limiter initialized ({settings.RATE_LIMIT_BACKEND} backend)")
+    return _rate_limiter
+
+
+async def close_rate_limiter() -> None:
+    """Close the rate limiter's backend if it was created"""
+    global _rate_limiter
+    if _rate_limiter is not None:
+        await _rate_limiter.close()
+        _rate_limiter = None
@@ -0,0 +1,279 @@
+"""
+Storage Garbage Collector - Remove orphaned images from the bucket
+
+Images end up unreferenced when a post is deleted, when its image is
+replaced, or when an upload/generation is never attached to a post.
+Because objects are content-addressed and shared between posts, they are
+not deleted together with a post; this sweeper removes them instead:
+
+1. List the user folders in the 'sparkle_pic' bucket
+2. For each user, list the objects and the image_url values still
+   referenced by their rows in sparkle_posts
+3. Delete unreferenced objects not used within the grace period in
+   batched remove() calls
+
+Optimized variants ({hash}_{variant}.{ext}) are kept as long as their
+original is referenced. The grace period is measured from an object's
+last use: the latest of created_at, updated_at and last_accessed_at, which
+deduplication refreshes whenever it hands out an existing object (in any
+worker). It must be longer than the generated-image cache (IMAGE_CACHE_TTL)
+and the signed upload URL lifetime, so images that are about to be
+attached are never collected.
+
+Every worker runs the loop, but a sweep only starts in the worker holding
+the 'storage_gc' lease in sparkle_job_leases, so one worker sweeps at a
+time. If it stops, another worker takes over once the lease expires.
+
+Sweeps pause between pages and batches so they don't compete with live
+traffic, and dry-run mode only logs what would be deleted.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from config.settings import settings
+from database import supabase
+from services import metrics
+from services.storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+# Objects listed per storage API call
+LIST_PAGE_SIZE = 1000
+
+# Postgres function and lease created by migrations/09_storage_reuse_and_gc_lease.sql
+ACQUIRE_LEASE_RPC = "sparkle_acquire_lease"
+LEASE_NAME = "storage_gc"
+
+
+def _stem(object_path: str) -> str:
+    """Object path without its extension"""
+    return object_path.rsplit(".", 1)[0]
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a storage API timestamp (ISO 8601, may end in Z)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _last_used(entry: Dict[str, Any]) -> Optional[datetime]:
+    """Latest of an object's created_at, updated_at and last_accessed_at"""
+    timestamps = [
+        _parse_timestamp(entry.get(field))
+        for field in ("created_at", "updated_at", "last_accessed_at")
+    ]
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+class StorageGarbageCollector:
+    """
+    Periodically delete images that no post references.
+
+    Usage:
+        gc = get_storage_gc()
+        stats = await gc.sweep(dry_run=True)
+    """
+
+    def __init__(self):
+        """Initialize storage garbage collector"""
+        self.storage = get_storage_service()
+        self.interval = settings.STORAGE_GC_INTERVAL
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    def _bucket(self):
+        return supabase.storage.from_(self.storage.bucket)
+
+    async def _list(self, prefix: str) -> List[Dict[str, Any]]:
+        """List all entries under a prefix, page by page"""
+        entries: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            page = await asyncio.to_thread(
+                self._bucket().list,
+                prefix,
+                {"limit": LIST_PAGE_SIZE, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}
+            )
+            entries.extend(page)
+            if len(page) < LIST_PAGE_SIZE:
+                return entries
+            offset += LIST_PAGE_SIZE
+            await asyncio.sleep(settings.STORAGE_GC_PAUSE)
+
+    async def _referenced_stems(self, user_id: str) -> Set[str]:
+        """Object stems of the images referenced by the user's posts"""
+        result = await asyncio.to_thread(
+            lambda: supabase.table("sparkle_posts")
+            .select("image_url")
+            .eq("user_id", user_id)
+            .not_.is_("image_url", "null")
+            .execute()
+        )
+
+        stems = set()
+        for row in result.data or []:
+            object_path = self.storage.object_path_from_url(row.get("image_url"))
+            if object_path:
+                stems.add(_stem(object_path))
+        return stems
+
+    def _is_referenced(self, object_path: str, referenced: Set[str]) -> bool:
+        """True if the object or the original it is a variant of is referenced"""
+        stem = _stem(object_path)
+        if stem in referenced:
+            return True
+        original = stem.rsplit("_", 1)[0]
+        return original != stem and original in referenced
+
+    async def _find_orphans(self, user_id: str, cutoff: datetime) -> List[str]:
+        """Paths in the user's folder that are unreferenced and unused since cutoff"""
+        objects = [entry for entry in await self._list(user_id) if entry.get("id")]
+        if not objects:
+            return []
+
+        referenced = await self._referenced_stems(user_id)
+
+        orphans = []
+        for entry in objects:
+            object_path = f"{user_id}/{entry['name']}"
+            last_used = _last_used(entry)
+            if last_used is None or last_used > cutoff:
+                continue
+            if self._is_referenced(object_path, referenced):
+                continue
+            orphans.append(object_path)
+        return orphans
+
+    async def _remove(self, paths: List[str]) -> int:
+        """Delete paths in rate-limited batches; returns the number deleted"""
+        deleted = 0
+        batch_size = settings.STORAGE_GC_BATCH_SIZE
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            await asyncio.to_thread(self._bucket().remove, batch)
+            self.storage.forget(batch)
+            deleted += len(batch)
+            await asyncio.sleep(settings.STORAGE_GC_PAUSE)
+        return deleted
+
+    async def sweep(self, dry_run: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Run one pass over the bucket.
+
+        Args:
+            dry_run: Only log orphans (defaults to STORAGE_GC_DRY_RUN)
+
+        Returns:
+            Dict with users, orphaned, deleted and dry_run
+        """
+        dry_run = settings.STORAGE_GC_DRY_RUN if dry_run is None else dry_run
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.STORAGE_GC_GRACE_PERIOD)
+
+        # Top-level entries without an id are the per-user folders
+        folders = [entry["name"] for entry in await self._list("") if not entry.get("id")]
+
+        stats = {"users": len(folders), "orphaned": 0, "deleted": 0, "dry_run": dry_run}
+        for user_id in folders:
+            try:
+                orphans = await self._find_orphans(user_id, cutoff)
+                stats["orphaned"] += len(orphans)
+
+                if orphans:
+                    if dry_run:
+                        logger.info(f"🧹 [dry run] {len(orphans)} orphaned images for user {user_id}")
+                    else:
+                        stats["deleted"] += await self._remove(orphans)
+                        logger.info(f"🧹 Deleted {len(orphans)} orphaned images for user {user_id}")
+            except Exception as e:
+                # Skip this user; the next sweep retries
+                logger.error(f"❌ Storage GC failed for user {user_id}: {str(e)}")
+
+            await asyncio.sleep(settings.STORAGE_GC_PAUSE)
+
+        metrics.increment("storage.gc.orphaned", stats["orphaned"])
+        metrics.increment("storage.gc.deleted", stats["deleted"])
+        logger.info(
+            f"🧹 Storage GC done: {stats['users']} users, {stats['orphaned']} orphaned, "
+            f"{stats['deleted']} deleted{' (dry run)' if dry_run else ''}"
+        )
+        return stats
+
+    async def _acquire_lease(self) -> bool:
+        """
+        Take or renew the sweeper lease, so only one worker sweeps.
+
+        The lease outlives one interval, so its holder renews it on the next
+        sweep and other workers take over only if the holder stops.
+
+        Returns:
+            True if this worker holds the lease
+        """
+        try:
+            result = await asyncio.to_thread(
+                lambda: supabase.rpc(ACQUIRE_LEASE_RPC, {
+                    "p_name": LEASE_NAME,
+                    "p_holder": self.holder,
+                    "p_ttl_seconds": int(self.interval * 1.5),
+                }).execute()
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Storage GC lease check failed, skipping sweep: {str(e)}")
+            return False
+
+        if result.data is not True:
+            logger.info("🧹 Storage GC skipped: another worker holds the lease")
+            return False
+        return True
+
+    async def _sweep_loop(self) -> None:
+        """Sweep on a fixed interval until cancelled (only while holding the lease)"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if await self._acquire_lease():
+                    await self.sweep()
+            except Exception as e:
+                logger.error(f"❌ Storage GC sweep failed: {str(e)}")
+
+    def start(self) -> None:
+        """Start the background sweep task (call from the running event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sweep_loop())
+            logger.info(f"🧹 Storage GC every {self.interval:.0f}s (dry run: {settings.STORAGE_GC_DRY_RUN})")
+
+    async def stop(self) -> None:
+        """Stop the background sweep task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+_storage_gc: Optional[StorageGarbageCollector] = None
+
+
+def get_storage_gc() -> StorageGarbageCollector:
+    """
+    Get or create the global storage garbage collector instance.
+
+    Returns:
+        Storage garbage collector instance
+    """
+    global _storage_gc
+    if _storage_gc is None:
+        _storage_gc = StorageGarbageCollector()
+    return _storage_gc
@@ -6,13 +6,35 @@ This service manages image uploads to Supabase Storage:
 2. Generate public URLs for uploaded images
 3. Handle image compression and validation
 4. Delete images when posts are deleted
+
+Objects are content-addressed (user_id/<sha256>.<ext>), so uploading the
+same image again reuses the stored object instead of sending it twice.
+Reused objects get their last_accessed_at refreshed, which keeps the
+orphan collector (services/storage_gc.py) away from them in every worker.
+Optimized WebP/JPEG variants and thumbnails are stored next to the original
+as user_id/<sha256>_<variant>.<ext>.
+
+Mobile clients can also upload directly to storage with a signed URL
+(user_id/direct_<uuid>.<ext>) and then finalize the upload, so the image
+bytes never pass through the API.
 """
 
 import logging
+import hashlib
+import asyncio
+import re
 import uuid
-from typing import Optional
+import httpx
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from fastapi import HTTPException, status, UploadFile
+from config.settings import settings
 from database import supabase
+from models.image import StoredImage
+from services.cache import TTLCache
+from services.image_optimizer import VARIANTS, get_image_optimizer
+from services import metrics
+from services.bulkhead import get_bulkhead, run_query
+from services.timing import timed
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +46,100 @@ MAX_FILE_SIZE = 2 * 1024 * 1024  # 2MB
 ALLOWED_MIME_TYPES = ["image/jpeg", "image/jpg", "image/png"]
 ALLOWED_EXTENSIONS = [".jpg", ".jpeg", ".png"]
 
+# Canonical extension per MIME type (same bytes -> same object path)
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+}
+
+# Direct (signed URL) uploads: {user_id}/direct_{uuid}.{ext}
+DIRECT_UPLOAD_PREFIX = "direct_"
+DIRECT_UPLOAD_NAME = re.compile(DIRECT_UPLOAD_PREFIX + r"[0-9a-f-]{36}\.(jpg|png)")
+
+# Size of each read when hashing an uploaded file
+READ_CHUNK_SIZE = 64 * 1024
+
+# Bytes of a direct upload read back to check its signature and dimensions
+# (JPEG frame headers follow EXIF/ICC segments, so a few KB is not always enough)
+SNIFF_SIZE = 64 * 1024
+
+# Object paths known to exist in the bucket. Entries expire quickly, since
+# other workers (or the orphan collector) may delete the object meanwhile.
+EXISTENCE_CACHE_SIZE = 10000
+EXISTENCE_CACHE_TTL = 60.0  # seconds
+
+# Postgres function created by migrations/09_storage_reuse_and_gc_lease.sql
+TOUCH_OBJECTS_RPC = "sparkle_touch_storage_objects"
+
+# Largest accepted width/height for uploaded images (guards against decompression bombs)
+MAX_IMAGE_DIMENSION = 8192
+
+# File signatures (magic bytes) of the allowed image types
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+
+# JPEG start-of-frame markers (carry the image dimensions)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _sniff_image_type(header: bytes) -> Optional[str]:
+    """
+    Detect the image type from its first bytes.
+
+    Args:
+        header: Start of the file (at least 8 bytes)
+
+    Returns:
+        "image/png", "image/jpeg", or None if neither
+    """
+    if header.startswith(PNG_SIGNATURE):
+        return "image/png"
+    if header.startswith(JPEG_SIGNATURE):
+        return "image/jpeg"
+    return None
+
+
+def _read_dimensions(data: bytes, content_type: str) -> Optional[Tuple[int, int]]:
+    """
+    Read image width and height from the file headers without decoding pixels.
+
+    Args:
+        data: Image bytes
+        content_type: Sniffed type ("image/png" or "image/jpeg")
+
+    Returns:
+        (width, height), or None if the headers are malformed
+    """
+    if content_type == "image/png":
+        # IHDR is always the first chunk: 8-byte signature, length, "IHDR", width, height
+        if len(data) < 24 or data[12:16] != b"IHDR":
+            return None
+        return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+
+    # JPEG: walk the marker segments up to the first start-of-frame
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Fill byte
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # No length field
+            i += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            if i + 9 > len(data):
+                return None
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height
+        if marker == 0xD9:  # End of image before any frame
+            return None
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
 
 class StorageService:
     """
@@ -37,8 +153,30 @@ class StorageService:
     def __init__(self):
         """Initialize storage service"""
         self.bucket = STORAGE_BUCKET
+        self._known_paths = TTLCache(max_size=EXISTENCE_CACHE_SIZE, ttl=EXISTENCE_CACHE_TTL)
+
+        # Pooled client for reading images over HTTP (shared with the image service)
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.IMAGE_DOWNLOAD_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
         logger.info(f"✅ Storage service initialized (bucket: {self.bucket})")
 
+    async def close(self) -> None:
+        """Close pooled HTTP connections"""
+        await self.http.aclose()
+
+    async def _offload(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking storage call on the image bulkhead's threads, timed as storage"""
+        with timed("storage"):
+            return await get_bulkhead("image").offload(fn, *args, **kwargs)
+
+    async def warm_up(self) -> None:
+        """Open the connection to Supabase Storage ahead of the first upload"""
+        await self._offload(
+            lambda: supabase.storage.from_(self.bucket).list(options={"limit": 1})
+        )
+
     def _validate_image(self, file: UploadFile) -> None:
         """
         Validate image file type and size.
@@ -64,6 +202,96 @@ class StorageService:
                 detail=f"Invalid content type. Allowed: {', '.join(ALLOWED_MIME_TYPES)}"
             )
 
+    async def _read_upload(self, file: UploadFile) -> Tuple[bytes, str, str]:
+        """
+        Validate and read an uploaded image, hashing it as it is read.
+
+        The file is read in chunks and rejected as soon as it exceeds
+        MAX_FILE_SIZE or its first bytes are not a PNG/JPEG signature, so
+        bad uploads never get buffered in full. Dimensions are read from the
+        image headers (no decoding).
+
+        Args:
+            file: Uploaded image file
+
+        Returns:
+            Tuple of (file bytes, SHA-256 hex digest, sniffed content type)
+
+        Raises:
+            HTTPException: If validation fails
+        """
+        self._validate_image(file)
+
+        too_large = HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+        )
+
+        # Size is known up front for spooled multipart uploads
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            metrics.increment("storage.upload.rejected")
+            raise too_large
+
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        content_type = None
+        while chunk := await file.read(READ_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) > MAX_FILE_SIZE:
+                metrics.increment("storage.upload.rejected")
+                raise too_large
+
+            if content_type is None and len(buffer) >= len(PNG_SIGNATURE):
+                content_type = self._check_signature(bytes(buffer[:len(PNG_SIGNATURE)]), file.content_type)
+
+            digest.update(chunk)
+
+        if content_type is None:
+            content_type = self._check_signature(bytes(buffer), file.content_type)
+
+        dimensions = _read_dimensions(buffer, content_type)
+        if dimensions is None:
+            metrics.increment("storage.upload.rejected")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid image file. The image appears to be corrupted."
+            )
+
+        width, height = dimensions
+        if not (0 < width <= MAX_IMAGE_DIMENSION and 0 < height <= MAX_IMAGE_DIMENSION):
+            metrics.increment("storage.upload.rejected")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Image dimensions too large. Maximum: {MAX_IMAGE_DIMENSION}x{MAX_IMAGE_DIMENSION} pixels"
+            )
+
+        logger.info(f"🔍 Upload validated: {content_type}, {width}x{height}, {len(buffer)} bytes")
+        return bytes(buffer), digest.hexdigest(), content_type
+
+    @staticmethod
+    def _check_signature(header: bytes, declared_type: str) -> str:
+        """
+        Check the file signature against the declared content type.
+
+        Args:
+            header: First bytes of the file
+            declared_type: Content type sent by the client
+
+        Returns:
+            Sniffed content type
+
+        Raises:
+            HTTPException: If the signature is not PNG/JPEG or doesn't match
+        """
+        sniffed = _sniff_image_type(header)
+        if sniffed is None or CONTENT_TYPE_EXTENSIONS[sniffed] != CONTENT_TYPE_EXTENSIONS.get(declared_type):
+            metrics.increment("storage.upload.rejected")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File content does not match its type. Allowed: JPG, PNG"
+            )
+        return sniffed
+
     async def upload_image(
         self,
         file: UploadFile,
@@ -83,41 +311,105 @@ class StorageService:
             HTTPException: If upload fails or validation fails
         """
         try:
-            # Validate image
-            self._validate_image(file)
+            contents, content_hash, content_type = await self._read_upload(file)
+            return await self.upload_bytes(
+                contents,
+                user_id,
+                content_type,
+                CONTENT_TYPE_EXTENSIONS[content_type],
+                content_hash=content_hash
+            )
 
-            # Read file content
-            contents = await file.read()
-            file_size = len(contents)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Image upload failed: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to upload image: {str(e)}"
+            )
 
-            # Check file size
-            if file_size > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
-                )
+    async def upload_image_with_variants(
+        self,
+        file: UploadFile,
+        user_id: str
+    ) -> StoredImage:
+        """
+        Upload image and its optimized variants (WebP/JPEG, thumbnail).
 
-            # Generate unique filename
-            file_extension = file.filename.split('.')[-1].lower()
-            unique_filename = f"{user_id}/{uuid.uuid4()}.{file_extension}"
+        Args:
+            file: Uploaded image file
+            user_id: User's UUID (for organizing files)
 
-            logger.info(f"📤 Uploading image: {unique_filename} ({file_size} bytes)")
+        Returns:
+            StoredImage with the original URL and variant URLs
 
-            # Upload to Supabase Storage
-            response = supabase.storage.from_(self.bucket).upload(
-                path=unique_filename,
-                file=contents,
-                file_options={"content-type": file.content_type}
+        Raises:
+            HTTPException: If upload fails or validation fails
+        """
+        try:
+            contents, content_hash, content_type = await self._read_upload(file)
+            image_url = await self.upload_bytes(
+                contents,
+                user_id,
+                content_type,
+                CONTENT_TYPE_EXTENSIONS[content_type],
+                content_hash=content_hash
             )
+            variants = await self.create_variants(contents, user_id, content_hash)
+            return StoredImage(image_url=image_url, variants=variants)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Image upload failed: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to upload image: {str(e)}"
+            )
+
+    async def upload_bytes(
+        self,
+        data: bytes,
+        user_id: str,
+        content_type: str,
+        extension: str,
+        content_hash: Optional[str] = None
+    ) -> str:
+        """
+        Upload raw image bytes (already validated) and return the public URL.
+
+        Used directly for server-generated images, so they go to storage
+        without being wrapped in an UploadFile or copied again. The object
+        path is derived from the content, so an image that is already
+        stored is not uploaded again.
+
+        Args:
+            data: Image bytes
+            user_id: User's UUID (for organizing files)
+            content_type: MIME type stored with the object
+            extension: File extension without the dot (e.g. "png")
+            content_hash: SHA-256 hex digest of data, if already computed
+
+        Returns:
+            Public URL of uploaded image
+
+        Raises:
+            HTTPException: If upload fails
+        """
+        content_hash = content_hash or hashlib.sha256(data).hexdigest()
+        extension = CONTENT_TYPE_EXTENSIONS.get(content_type, extension)
+        object_path = f"{user_id}/{content_hash}.{extension}"
+
+        try:
+            await self._store_object(object_path, data, content_type)
 
             # Get public URL
-            public_url = supabase.storage.from_(self.bucket).get_public_url(unique_filename)
+            public_url = supabase.storage.from_(self.bucket).get_public_url(object_path)
 
             logger.info(f"✅ Image uploaded successfully: {public_url}")
             return public_url
 
-        except HTTPException:
-            raise
         except Exception as e:
             logger.error(f"❌ Image upload failed: {str(e)}")
             raise HTTPException(
@@ -125,6 +417,383 @@ class StorageService:
                 detail=f"Failed to upload image: {str(e)}"
             )
 
+    async def create_variants(
+        self,
+        data: bytes,
+        user_id: str,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Store optimized variants of an image (best-effort).
+
+        Variants live next to the original as {user_id}/{hash}_{variant}.{ext},
+        so an image whose variants already exist is not transcoded again.
+
+        Args:
+            data: Original image bytes
+            user_id: User's UUID (for organizing files)
+            content_hash: SHA-256 hex digest of data, if already computed
+
+        Returns:
+            Dict of variant name -> public URL (empty if optimization is
+            disabled or fails)
+        """
+        if not settings.IMAGE_OPTIMIZE_ENABLED:
+            return {}
+
+        content_hash = content_hash or hashlib.sha256(data).hexdigest()
+        paths = {
+            variant.name: f"{user_id}/{content_hash}_{variant.name}.{variant.extension}"
+            for variant in VARIANTS
+        }
+
+        try:
+            existing = await asyncio.gather(*(self.exists(path) for path in paths.values()))
+            reused = [path for path, found in zip(paths.values(), existing) if found]
+            present = await self._confirm_reused(reused) if reused else set()
+
+            # Variants never stored, or deleted since they were cached
+            missing = {name: path for name, path in paths.items() if path not in present}
+            if missing:
+                self.forget(list(missing.values()))
+                optimized = await get_image_optimizer().optimize(data)
+                await asyncio.gather(*(
+                    self._store_object(missing[name], variant_bytes, content_type)
+                    for name, (variant_bytes, content_type, _) in optimized.items()
+                    if name in missing
+                ))
+                metrics.increment("storage.variants.created")
+
+            bucket = supabase.storage.from_(self.bucket)
+            return {name: bucket.get_public_url(path) for name, path in paths.items()}
+
+        except Exception as e:
+            # The original is stored; clients fall back to it
+            metrics.increment("storage.variants.failed")
+            logger.warning(f"⚠️  Image optimization failed: {str(e)}")
+            return {}
+
+    async def _store_object(self, object_path: str, data: bytes, content_type: str) -> None:
+        """
+        Upload an object unless it is already stored.
+
+        Args:
+            object_path: Content-addressed path inside the bucket
+            data: Object bytes
+            content_type: MIME type stored with the object
+        """
+        file_options = {"content-type": content_type}
+
+        if await self.exists(object_path):
+            if object_path in await self._confirm_reused([object_path]):
+                metrics.increment("storage.upload.deduplicated")
+                logger.info(f"♻️  Image already stored: {object_path}")
+                return
+
+            # Deleted since it was cached: upload again
+            self.forget([object_path])
+            metrics.increment("storage.upload.restored")
+
+        logger.info(f"📤 Uploading image: {object_path} ({len(data)} bytes)")
+        try:
+            # Upload to Supabase Storage on the image bulkhead's threads (off the event loop)
+            await self._offload(
+                supabase.storage.from_(self.bucket).upload,
+                path=object_path,
+                file=data,
+                file_options=file_options
+            )
+            metrics.increment("storage.upload.stored")
+        except Exception as e:
+            # Same content uploaded concurrently (or cache was cold) - nothing to do
+            if not self._is_duplicate_error(e):
+                raise
+            await self._mark_reused([object_path])
+            metrics.increment("storage.upload.deduplicated")
+        self._known_paths.set(object_path, True)
+
+    async def _confirm_reused(self, object_paths: List[str]) -> Set[str]:
+        """
+        Refresh reused objects and return the ones that still exist.
+
+        If the refresh fails (e.g. migration 09 not applied), existence is
+        checked again against storage, bypassing the cache, so stored
+        objects are never uploaded twice because of it.
+
+        Args:
+            object_paths: Paths inside the bucket, believed to exist
+
+        Returns:
+            The paths confirmed to exist
+        """
+        present = await self._mark_reused(object_paths)
+        if present is not None:
+            return present
+
+        self.forget(object_paths)
+        found = await asyncio.gather(*(self.exists(path) for path in object_paths))
+        return {path for path, exists in zip(object_paths, found) if exists}
+
+    async def _mark_reused(self, object_paths: List[str]) -> Optional[Set[str]]:
+        """
+        Refresh last_accessed_at of existing objects handed out again.
+
+        The orphan collector measures its grace period from an object's last
+        access, so a reused object is safe from collection in every worker
+        until a post references it.
+
+        Args:
+            object_paths: Paths inside the bucket
+
+        Returns:
+            The paths that exist, or None if the refresh failed
+        """
+        try:
+            result = await run_query(
+                supabase.rpc(TOUCH_OBJECTS_RPC, {"p_bucket": self.bucket, "p_names": object_paths})
+            )
+        except Exception as e:
+            metrics.increment("storage.touch.failed")
+            logger.warning(f"⚠️  Could not refresh reused objects {object_paths}: {str(e)}")
+            return None
+        return {row["name"] for row in result.data or []}
+
+    async def create_signed_upload(self, user_id: str, content_type: str, file_size: int) -> Dict[str, str]:
+        """
+        Issue a signed URL the client can upload an image to directly.
+
+        The object path is generated here and scoped to the user's folder, so
+        the signed URL can't be used to write anywhere else.
+
+        Args:
+            user_id: User's UUID (for organizing files)
+            content_type: MIME type the client will upload
+            file_size: Size in bytes the client will upload
+
+        Returns:
+            Dict with signed_url, token and path
+
+        Raises:
+            HTTPException: If the type or size is not allowed, or signing fails
+        """
+        if content_type not in ALLOWED_MIME_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid content type. Allowed: {', '.join(ALLOWED_MIME_TYPES)}"
+            )
+        if file_size > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+            )
+
+        object_path = f"{user_id}/{DIRECT_UPLOAD_PREFIX}{uuid.uuid4()}.{CONTENT_TYPE_EXTENSIONS[content_type]}"
+
+        try:
+            signed = await self._offload(
+                supabase.storage.from_(self.bucket).create_signed_upload_url, object_path
+            )
+            metrics.increment("storage.direct_upload.signed")
+            logger.info(f"✍️  Signed upload URL issued: {object_path}")
+            return {
+                "signed_url": signed["signed_url"],
+                "token": signed["token"],
+                "path": object_path,
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Signed upload URL failed: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to create upload URL: {str(e)}"
+            )
+
+    async def _read_head(self, public_url: str) -> bytes:
+        """Read the first SNIFF_SIZE bytes of a stored object (ranged GET)"""
+        async with self.http.stream(
+            "GET", public_url, headers={"Range": f"bytes=0-{SNIFF_SIZE - 1}"}
+        ) as response:
+            response.raise_for_status()
+            head = bytearray()
+            async for chunk in response.aiter_bytes():
+                head.extend(chunk)
+                if len(head) >= SNIFF_SIZE:
+                    break
+        return bytes(head[:SNIFF_SIZE])
+
+    async def _validate_stored_object(self, object_path: str, info: Dict[str, Any], public_url: str) -> str:
+        """
+        Check a direct upload's size, signature and dimensions.
+
+        The client sets the object's content type, so the type is sniffed
+        from the stored bytes, the same way as for API uploads.
+
+        Args:
+            object_path: Path of the uploaded object (its extension was fixed at signing)
+            info: Object info from the storage API
+            public_url: Public URL of the object
+
+        Returns:
+            Sniffed content type
+
+        Raises:
+            HTTPException 400: If the object is not an allowed image
+        """
+        invalid = HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Invalid image. Allowed: {', '.join(ALLOWED_MIME_TYPES)}, "
+                f"maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+            )
+        )
+
+        # Newer Storage API versions return flat fields; older ones nest them in metadata
+        metadata = info.get("metadata") or {}
+        size = info.get("size") or metadata.get("size")
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            raise invalid
+        if not 0 < size <= MAX_FILE_SIZE:
+            raise invalid
+
+        head = await self._read_head(public_url)
+        content_type = _sniff_image_type(head)
+        if content_type is None or CONTENT_TYPE_EXTENSIONS[content_type] != object_path.rsplit(".", 1)[-1]:
+            raise invalid
+
+        dimensions = _read_dimensions(head, content_type)
+        if dimensions is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid image file. The image appears to be corrupted."
+            )
+        width, height = dimensions
+        if not (0 < width <= MAX_IMAGE_DIMENSION and 0 < height <= MAX_IMAGE_DIMENSION):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Image dimensions too large. Maximum: {MAX_IMAGE_DIMENSION}x{MAX_IMAGE_DIMENSION} pixels"
+            )
+
+        logger.info(f"🔍 Direct upload validated: {content_type}, {width}x{height}, {size} bytes")
+        return content_type
+
+    async def finalize_signed_upload(self, user_id: str, object_path: str) -> str:
+        """
+        Validate an object uploaded through a signed URL and return its public URL.
+
+        The client could have uploaded anything to the signed URL, so the
+        stored size is checked and the first bytes are read back to check the
+        signature and dimensions. Objects failing a check are deleted; objects
+        that couldn't be checked (storage errors) are kept so the client can
+        finalize again.
+
+        Args:
+            user_id: User's UUID (must own the path)
+            object_path: Path returned by create_signed_upload
+
+        Returns:
+            Public URL of the uploaded image
+
+        Raises:
+            HTTPException: If the path is not the user's (403), the object is
+                missing (404), its size/type/dimensions are not allowed (400),
+                or it could not be verified (503)
+        """
+        folder, _, name = object_path.partition("/")
+        if folder != user_id or not DIRECT_UPLOAD_NAME.fullmatch(name):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid upload path"
+            )
+
+        bucket = supabase.storage.from_(self.bucket)
+        try:
+            info = await self._offload(bucket.info, object_path)
+        except Exception as e:
+            logger.warning(f"⚠️  Uploaded object not found: {object_path} ({str(e)})")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Uploaded image not found. Upload the file before finalizing."
+            )
+
+        public_url = bucket.get_public_url(object_path)
+        try:
+            await self._validate_stored_object(object_path, info, public_url)
+        except HTTPException as e:
+            # Not an allowed image: never leave it behind
+            try:
+                await self._offload(bucket.remove, [object_path])
+            except Exception as remove_error:
+                logger.error(f"❌ Could not delete rejected upload {object_path}: {str(remove_error)}")
+            metrics.increment("storage.direct_upload.rejected")
+            logger.warning(f"⚠️  Rejected direct upload {object_path}: {e.detail}")
+            raise
+        except Exception as e:
+            # Couldn't read the object back; keep it (the orphan collector
+            # removes it if it is never finalized)
+            metrics.increment("storage.direct_upload.unverified")
+            logger.error(f"❌ Direct upload verification failed for {object_path}: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not verify the uploaded image. Please try again."
+            )
+
+        self._known_paths.set(object_path, True)
+        metrics.increment("storage.direct_upload.finalized")
+        logger.info(f"✅ Direct upload finalized: {public_url}")
+        return public_url
+
+    async def exists(self, object_path: str) -> bool:
+        """
+        Check whether an object exists in the bucket.
+
+        Paths seen in the last EXISTENCE_CACHE_TTL seconds are answered from
+        the local existence cache.
+
+        Args:
+            object_path: Path inside the bucket (e.g. "{user_id}/{hash}.png")
+
+        Returns:
+            True if the object exists
+        """
+        if self._known_paths.get(object_path):
+            return True
+
+        found = await self._offload(supabase.storage.from_(self.bucket).exists, object_path)
+        if found:
+            self._known_paths.set(object_path, True)
+        return found
+
+    @staticmethod
+    def _is_duplicate_error(error: Exception) -> bool:
+        """True if Supabase rejected an upload because the object already exists"""
+        status_code = str(getattr(error, "status", "") or getattr(error, "statusCode", ""))
+        message = str(error).lower()
+        return status_code == "409" or "duplicate" in message or "already exists" in message
+
+    def object_path_from_url(self, image_url: str) -> Optional[str]:
+        """
+        Extract the object path from a public URL of this bucket.
+
+        Args:
+            image_url: Public URL (https://.../object/public/{bucket}/{path})
+
+        Returns:
+            Object path inside the bucket, or None for other URLs
+        """
+        if not image_url:
+            return None
+        parts = image_url.split("?", 1)[0].split(f"/{self.bucket}/", 1)
+        if len(parts) < 2 or not parts[1]:
+            return None
+        return parts[1]
+
+    def forget(self, object_paths: List[str]) -> None:
+        """Drop deleted objects from the existence cache"""
+        for object_path in object_paths:
+            self._known_paths.pop(object_path)
+
     async def delete_image(self, image_url: str) -> bool:
         """
         Delete image from Supabase Storage.
@@ -154,6 +823,7 @@ class StorageService:
 
             # Delete from storage
             supabase.storage.from_(self.bucket).remove([filename])
+            self.forget([filename])
 
             logger.info(f"✅ Image deleted successfully: {filename}")
             return True
@@ -178,3 +848,11 @@ def get_storage_service() -> StorageService:
     if _storage_service is None:
         _storage_service = StorageService()
     return _storage_service
+
+
+async def close_storage_service() -> None:
+    """Close the storage service's HTTP client if it was created"""
+    global _storage_service
+    if _storage_service is not None:
+        await _storage_service.close()
+        _storage_service = None
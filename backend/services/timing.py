@@ -0,0 +1,102 @@
+"""
+Request Timing - Per-request time spent in each phase
+
+Service layers wrap their slow calls in timed("<phase>"); the time is added
+to the current request's breakdown, which ServerTimingMiddleware turns
+into a Server-Timing header and an access-log line.
+
+Phases:
+- auth: token verification (get_current_user)
+- db: Supabase table queries (including bulkhead wait)
+- llm: LLM provider calls
+- image: DALL-E generation and image downloads
+- storage: Supabase Storage calls
+- serialize: response validation and JSON encoding (measured by the route class)
+
+The breakdown lives in a ContextVar, so concurrent requests never mix and
+tasks spawned by a request (e.g. concurrent LLM chunks) add to the same
+breakdown. Phases that overlap inside one request are summed. Outside a
+sampled request (background jobs, unsampled traffic) timed() is a no-op.
+
+Tasks that outlive the request (speculation, image job workers) must be
+started in background_context(), or they would keep adding to a breakdown
+that was already reported.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, Token, copy_context
+from typing import Dict, Iterator, Optional
+
+# Phase -> seconds for the current request (None outside a sampled request)
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+# Key holding when the endpoint function returned (perf_counter)
+ENDPOINT_DONE = "_endpoint_done"
+
+
+def start_request() -> Token:
+    """Begin collecting timings for the current request"""
+    return _timings.set({})
+
+
+def end_request(token: Token) -> None:
+    """Stop collecting timings"""
+    _timings.reset(token)
+
+
+def background_context() -> Context:
+    """
+    Copy of the current context without the request's timings.
+
+    Usage:
+        asyncio.create_task(work(), context=background_context())
+    """
+    context = copy_context()
+    context.run(_timings.set, None)
+    return context
+
+
+def get_timings() -> Optional[Dict[str, float]]:
+    """Timings collected so far for the current request (None if not collecting)"""
+    return _timings.get()
+
+
+def record(phase: str, seconds: float) -> None:
+    """
+    Add time to a phase of the current request.
+
+    Args:
+        phase: Phase name (auth, db, llm, image, storage, serialize)
+        seconds: Elapsed time
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+def mark_endpoint_done() -> None:
+    """Note that the endpoint returned; the rest until the response starts is serialization"""
+    timings = _timings.get()
+    if timings is not None:
+        timings[ENDPOINT_DONE] = time.perf_counter()
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """
+    Time a block and add it to a phase of the current request.
+
+    Usage:
+        with timed("db"):
+            result = await run_query(query)
+    """
+    if _timings.get() is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
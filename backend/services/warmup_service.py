@@ -0,0 +1,111 @@
+"""
+Warm-up Service - Build clients and open connections at startup
+
+Run from the FastAPI lifespan so the first request on a new worker does not
+pay for SDK imports, client construction and cold TLS handshakes:
+1. Build the LLM, generation, image and storage singletons
+2. Pre-open provider, storage and database connection pools
+3. Record per-component status for the /ready endpoint
+
+Configuration errors (e.g. a missing API key) are caught once here and
+cached by the service getters, which then answer 503 without rebuilding
+the client on every request. The key must be configured and the worker
+restarted.
+
+/ready is public, so it reports only a generic reason per component; the
+underlying error is in the log.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import HTTPException
+
+from database import supabase
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Readiness state reported by /ready
+_readiness: Dict[str, Any] = {"ready": False, "components": {}}
+
+
+async def _warm_database() -> None:
+    """Open the PostgREST connection with a tiny query"""
+    await asyncio.to_thread(
+        lambda: supabase.table("sparkle_posts").select("id").limit(1).execute()
+    )
+
+
+async def _warm_storage() -> None:
+    from services.storage_service import get_storage_service
+    await get_storage_service().warm_up()
+
+
+async def _warm_llm() -> None:
+    from services.ai.llm_service import get_llm_service
+    from services.ai.generation_service import get_generation_service
+    get_generation_service()  # Builds the LLM service too
+    await get_llm_service().warm_up()
+
+
+async def _warm_image() -> None:
+    from services.ai.image_service import get_image_service
+    await get_image_service().warm_up()
+
+
+async def _warm_component(name: str, warm: Callable[[], Awaitable[None]]) -> None:
+    """Warm one component and record its status"""
+    try:
+        await asyncio.wait_for(warm(), timeout=settings.WARMUP_TIMEOUT)
+        _readiness["components"][name] = {"status": "ready"}
+        logger.info(f"🔥 Warmed up {name}")
+    except HTTPException:
+        # Configuration error cached by the service getter (already logged)
+        _readiness["components"][name] = {"status": "unavailable", "error": "not configured"}
+    except ValueError as e:
+        # Configuration error (missing API key, unknown provider, ...)
+        _readiness["components"][name] = {"status": "unavailable", "error": "not configured"}
+        logger.error(f"❌ {name} not configured: {str(e)}")
+    except asyncio.TimeoutError:
+        _readiness["components"][name] = {"status": "degraded", "error": "warm-up timed out"}
+        logger.warning(f"⚠️  {name} warm-up timed out after {settings.WARMUP_TIMEOUT}s")
+    except Exception as e:
+        # Client was built but the connection check failed
+        _readiness["components"][name] = {"status": "degraded", "error": "connection check failed"}
+        logger.warning(f"⚠️  {name} warm-up failed: {str(e)}")
+
+
+async def warm_up() -> Dict[str, Any]:
+    """
+    Build service singletons and pre-open their connection pools concurrently.
+
+    Returns:
+        Readiness state with per-component status
+    """
+    logger.info("🔥 Warming up clients...")
+
+    await asyncio.gather(
+        _warm_component("database", _warm_database),
+        _warm_component("storage", _warm_storage),
+        _warm_component("llm", _warm_llm),
+        _warm_component("image", _warm_image),
+    )
+
+    _readiness["ready"] = True
+    logger.info("✅ Warm-up complete")
+    return get_readiness()
+
+
+def get_readiness() -> Dict[str, Any]:
+    """
+    Get the current readiness state.
+
+    Returns:
+        Dict with ready flag and per-component status
+    """
+    return {
+        "ready": _readiness["ready"],
+        "components": dict(_readiness["components"]),
+    }